@@ -845,10 +845,13 @@ function createFleetAdminPanel(options = {}) {
           .filter(Boolean)
           .map((part) => escapeHtml(part))
           .join(' • ');
-        const dataUrl = escapeHtml(image?.dataUrl || '');
+        const source = image?.thumbnailUrl || image?.url;
+        const imageUrl = escapeHtml(
+          source ? buildFleetApiUrl(source.replace(/^\/api(?=\/)/, '')) : image?.dataUrl || ''
+        );
         return `
           <figure class="pending-card__image">
-            <img src="${dataUrl}" alt="Submitted image ${index + 1} for ${escapeHtml(registration)}" loading="lazy" />
+            <img src="${imageUrl}" alt="Submitted image ${index + 1} for ${escapeHtml(registration)}" loading="lazy" />
             <figcaption>${caption}</figcaption>
           </figure>
         `;
@@ -1,5 +1,10 @@
 import base64
 import binascii
+import bisect
+import gzip
+import hashlib
+import heapq
+import io
 import json
 import os
 import random
@@ -8,25 +13,37 @@ import statistics
 import threading
 import time
 import uuid
-from collections import Counter, defaultdict, deque
+import zlib
+from collections import Counter, OrderedDict, defaultdict, deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from math import atan2, cos, radians, sin, sqrt
 from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from urllib.parse import parse_qsl, quote, urljoin, urlparse
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+import psycopg2
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPDigestAuth
 from dotenv import load_dotenv
 from flask import Flask, Response, jsonify, make_response, request
-from psycopg2.extras import Json, RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import Json, RealDictCursor, execute_values
 from psycopg2.extensions import (
     TRANSACTION_STATUS_IDLE,
     TRANSACTION_STATUS_UNKNOWN,
+    TransactionRollbackError,
 )
 
+try:
+    from PIL import Image as PILImage, ImageOps
+except ImportError:
+    PILImage = None
+    ImageOps = None
+
+
 def _as_bool(value, default: bool = False) -> bool:
     if value is None:
         return default
@@ -49,7 +66,16 @@ def _env_int(name: str, default: int) -> int:
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "5"))
+MAX_CONNECTIONS = max(int(os.getenv("DB_MAX_CONNECTIONS", "5")), 1)
+DB_MIN_CONNECTIONS = min(max(_env_int("DB_MIN_CONNECTIONS", 1), 0), MAX_CONNECTIONS)
+DB_POOL_ACQUIRE_TIMEOUT_SECONDS = max(_env_int("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", 10), 1)
+DB_POOL_IDLE_TIMEOUT_SECONDS = max(_env_int("DB_POOL_IDLE_TIMEOUT_SECONDS", 300), 0)
+DB_POOL_MAX_LIFETIME_SECONDS = max(_env_int("DB_POOL_MAX_LIFETIME_SECONDS", 1800), 0)
+DB_POOL_PING_AFTER_SECONDS = max(_env_int("DB_POOL_PING_AFTER_SECONDS", 30), 0)
+DB_POOL_QUOTAS: Dict[str, int] = {
+    "ingest": min(max(_env_int("DB_POOL_INGEST_MAX", max(MAX_CONNECTIONS - 2, 1)), 1), MAX_CONNECTIONS),
+    "maintenance": min(max(_env_int("DB_POOL_MAINTENANCE_MAX", 1), 1), MAX_CONNECTIONS),
+}
 TFL_APP_ID = os.getenv("TFL_APP_ID")
 TFL_APP_KEY = os.getenv("TFL_APP_KEY") or os.getenv("TFL_API_KEY") or os.getenv("TFL_KEY")
 TFL_SUBSCRIPTION_KEY = os.getenv("TFL_SUBSCRIPTION_KEY") or os.getenv("TFL_SUBSCRIPTION")
@@ -70,6 +96,52 @@ FLEET_VEHICLE_HISTORY_DAYS = max(
     _env_int("FLEET_VEHICLE_HISTORY_DAYS", _env_int("FLEET_HISTORY_DAYS", 30)),
     1,
 )
+FLEET_DOCUMENT_CACHE_ENABLED = _as_bool(os.getenv("FLEET_DOCUMENT_CACHE_ENABLED"), default=True)
+FLEET_DOCUMENT_REFRESH_SECONDS = max(_env_int("FLEET_DOCUMENT_REFRESH_SECONDS", 5), 0)
+FLEET_DOCUMENT_REBUILD_SECONDS = max(_env_int("FLEET_DOCUMENT_REBUILD_SECONDS", 300), 30)
+FLEET_DOCUMENT_WATERMARK_OVERLAP_SECONDS = max(
+    _env_int("FLEET_DOCUMENT_WATERMARK_OVERLAP_SECONDS", 30),
+    0,
+)
+FLEET_SEARCH_INDEX_ENABLED = _as_bool(os.getenv("FLEET_SEARCH_INDEX_ENABLED"), default=True)
+FLEET_SEARCH_REFRESH_SECONDS = max(_env_int("FLEET_SEARCH_REFRESH_SECONDS", 5), 0)
+FLEET_SEARCH_REBUILD_SECONDS = max(_env_int("FLEET_SEARCH_REBUILD_SECONDS", 300), 30)
+FLEET_SEARCH_FUZZY_THRESHOLD_PERCENT = min(
+    max(_env_int("FLEET_SEARCH_FUZZY_THRESHOLD_PERCENT", 30), 1),
+    100,
+)
+BADGE_EXPIRY_SWEEPER_ENABLED = _as_bool(os.getenv("BADGE_EXPIRY_SWEEPER_ENABLED"), default=True)
+BADGE_EXPIRY_HORIZON_SECONDS = max(_env_int("BADGE_EXPIRY_HORIZON_SECONDS", 3600), 60)
+BADGE_EXPIRY_RELOAD_SECONDS = max(_env_int("BADGE_EXPIRY_RELOAD_SECONDS", 300), 10)
+BADGE_EXPIRY_BATCH_SIZE = max(_env_int("BADGE_EXPIRY_BATCH_SIZE", 200), 1)
+FLEET_SIGHTING_BATCH_SIZE = max(_env_int("FLEET_SIGHTING_BATCH_SIZE", 500), 1)
+FLEET_COPY_MIN_ROWS = max(_env_int("FLEET_COPY_MIN_ROWS", 50), 1)
+FLEET_COPY_FLUSH_ROWS = max(_env_int("FLEET_COPY_FLUSH_ROWS", 1000), 1)
+FLEET_COPY_FLUSH_SECONDS = max(_env_int("FLEET_COPY_FLUSH_SECONDS", 5), 1)
+FLEET_COPY_MAX_BUFFERED_ROWS = max(
+    _env_int("FLEET_COPY_MAX_BUFFERED_ROWS", 50_000),
+    FLEET_COPY_FLUSH_ROWS,
+)
+FLEET_PARTITION_INTERVAL = (os.getenv("FLEET_PARTITION_INTERVAL") or "week").strip().lower()
+if FLEET_PARTITION_INTERVAL not in {"day", "week"}:
+    FLEET_PARTITION_INTERVAL = "week"
+FLEET_PARTITION_AHEAD_DAYS = max(_env_int("FLEET_PARTITION_AHEAD_DAYS", 14), 1)
+FLEET_PARTITION_MAINTENANCE_ENABLED = _as_bool(
+    os.getenv("FLEET_PARTITION_MAINTENANCE_ENABLED"), default=True
+)
+FLEET_PARTITION_MAINTENANCE_INTERVAL_SECONDS = max(
+    _env_int("FLEET_PARTITION_MAINTENANCE_INTERVAL_SECONDS", 3600),
+    60,
+)
+FLEET_PARTITION_ARCHIVE_POLICY = (os.getenv("FLEET_PARTITION_ARCHIVE_POLICY") or "drop").strip().lower()
+if FLEET_PARTITION_ARCHIVE_POLICY not in {"drop", "detach"}:
+    FLEET_PARTITION_ARCHIVE_POLICY = "drop"
+FLEET_PARTITION_ARCHIVE_SCHEMA = (os.getenv("FLEET_PARTITION_ARCHIVE_SCHEMA") or "archive").strip().lower()
+if not re.fullmatch(r"[a-z_][a-z0-9_]{0,62}", FLEET_PARTITION_ARCHIVE_SCHEMA):
+    FLEET_PARTITION_ARCHIVE_SCHEMA = "archive"
+FLEET_SIGHTINGS_RETENTION_DAYS = max(_env_int("FLEET_SIGHTINGS_RETENTION_DAYS", 180), 0)
+FLEET_BUS_HISTORY_RETENTION_DAYS = max(_env_int("FLEET_BUS_HISTORY_RETENTION_DAYS", 0), 0)
+FLEET_VEHICLE_HISTORY_RETENTION_DAYS = max(_env_int("FLEET_VEHICLE_HISTORY_RETENTION_DAYS", 30), 0)
 
 MAX_FLEET_IMAGE_BYTES = max(
     _env_int("FLEET_IMAGE_MAX_BYTES", 2_097_152),
@@ -83,6 +155,12 @@ MAX_FLEET_GALLERY_IMAGES = max(
     _env_int("FLEET_GALLERY_MAX", 24),
     1,
 )
+FLEET_IMAGE_THUMBNAIL_SIZE = max(_env_int("FLEET_IMAGE_THUMBNAIL_SIZE", 320), 32)
+FLEET_IMAGE_MAX_PIXELS = max(_env_int("FLEET_IMAGE_MAX_PIXELS", 16_000_000), 1)
+FLEET_IMAGE_CACHE_MAX_AGE_SECONDS = max(_env_int("FLEET_IMAGE_CACHE_MAX_AGE_SECONDS", 31_536_000), 0)
+FLEET_IMAGE_ORPHAN_GRACE_HOURS = max(_env_int("FLEET_IMAGE_ORPHAN_GRACE_HOURS", 24), 1)
+FLEET_IMAGE_URL_PREFIX = "/api/fleet/images/"
+FLEET_IMAGE_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
 
 LIVE_TRACKING_ENABLED = _as_bool(os.getenv("FLEET_LIVE_TRACKING_ENABLED"), default=False)
 LIVE_TRACKING_INTERVAL_SECONDS = max(
@@ -91,7 +169,7 @@ LIVE_TRACKING_INTERVAL_SECONDS = max(
 )
 LIVE_TRACKING_CONCURRENCY = max(_env_int("FLEET_LIVE_TRACKING_CONCURRENCY", 6), 1)
 LIVE_TRACKING_LAUNCH_DELAY_MS = max(
-    _env_int("FLEET_LIVE_TRACKING_LAUNCH_DELAY_MS", 150),
+    _env_int("FLEET_LIVE_TRACKING_LAUNCH_DELAY_MS", 0),
     0,
 )
 LIVE_TRACKING_MAX_RETRIES = max(_env_int("FLEET_LIVE_TRACKING_MAX_RETRIES", 3), 1)
@@ -107,6 +185,26 @@ LIVE_TRACKING_LOG_LIMIT = max(
     _env_int("FLEET_LIVE_TRACKING_LOG_LIMIT", 2000),
     100,
 )
+LIVE_TRACKING_MAX_LINE_INTERVAL_SECONDS = max(
+    _env_int("FLEET_LIVE_TRACKING_MAX_LINE_INTERVAL_SECONDS", 300),
+    LIVE_TRACKING_INTERVAL_SECONDS,
+)
+LIVE_TRACKING_BUSY_VEHICLES = max(_env_int("FLEET_LIVE_TRACKING_BUSY_VEHICLES", 8), 1)
+LIVE_TRACKING_LINES_PER_ROUND = max(_env_int("FLEET_LIVE_TRACKING_LINES_PER_ROUND", 60), 1)
+LIVE_TRACKING_BATCH_SIZE = max(_env_int("FLEET_LIVE_TRACKING_BATCH_SIZE", 10), 1)
+LIVE_TRACKING_TIMEZONE = os.getenv("FLEET_LIVE_TRACKING_TIMEZONE", "Europe/London")
+LIVE_TRACKING_GZIP_LEVEL = min(max(_env_int("FLEET_LIVE_TRACKING_GZIP_LEVEL", 6), 0), 9)
+LIVE_TRACKING_DELTA_HISTORY = max(_env_int("FLEET_LIVE_TRACKING_DELTA_HISTORY", 30), 1)
+LIVE_FLEET_FIELD_ALIASES = {"key": "vehicleKey", "lat": "latitude", "lon": "longitude"}
+LIVE_FLEET_VARIANT_CACHE_SIZE = 64
+LIVE_PUSH_ENABLED = _as_bool(os.getenv("FLEET_LIVE_PUSH_ENABLED"), default=True)
+LIVE_PUSH_MAX_SUBSCRIBERS = max(_env_int("FLEET_LIVE_PUSH_MAX_SUBSCRIBERS", 2000), 1)
+LIVE_PUSH_HEARTBEAT_SECONDS = max(_env_int("FLEET_LIVE_PUSH_HEARTBEAT_SECONDS", 15), 1)
+LIVE_PUSH_CHANNEL_BUFFER = max(_env_int("FLEET_LIVE_PUSH_CHANNEL_BUFFER", 20_000), 100)
+LIVE_PUSH_GRID_CELLS_PER_DEGREE = 20
+LIVE_PUSH_SOURCE_FIELDS = frozenset(
+    {"registration", "lineId", "route", "operator", "latitude", "longitude", "bearing", "destination"}
+)
 
 FLEET_STREAM_ENABLED = _as_bool(os.getenv("FLEET_STREAM_ENABLED"), default=False)
 FLEET_STREAM_BACKOFF_SECONDS = max(_env_int("FLEET_STREAM_BACKOFF_SECONDS", 5), 1)
@@ -130,6 +228,13 @@ FLEET_STREAM_CLEANUP_INTERVAL_SECONDS = max(
     _env_int("FLEET_STREAM_CLEANUP_INTERVAL_SECONDS", 180),
     30,
 )
+FLEET_STREAM_QUEUE_SIZE = max(_env_int("FLEET_STREAM_QUEUE_SIZE", 20_000), 100)
+FLEET_STREAM_QUEUE_OVERFLOW = (os.getenv("FLEET_STREAM_QUEUE_OVERFLOW") or "coalesce").strip().lower()
+if FLEET_STREAM_QUEUE_OVERFLOW not in {"block", "drop-oldest", "coalesce"}:
+    FLEET_STREAM_QUEUE_OVERFLOW = "coalesce"
+FLEET_STREAM_WRITER_WORKERS = max(_env_int("FLEET_STREAM_WRITER_WORKERS", 2), 1)
+FLEET_STREAM_WRITE_BATCH_SIZE = max(_env_int("FLEET_STREAM_WRITE_BATCH_SIZE", 5000), 1)
+FLEET_STREAM_COALESCE_WINDOW_MS = max(_env_int("FLEET_STREAM_COALESCE_WINDOW_MS", 1000), 0)
 TFL_STREAM_PATH = (
     os.getenv("TFL_STREAM_URL")
     or os.getenv("TFL_STREAM_PATH")
@@ -184,6 +289,29 @@ DISRUPTION_CACHE_TTL_SECONDS = max(
     _env_int("FLEET_DISRUPTION_CACHE_TTL_SECONDS", 300),
     60,
 )
+TFL_HTTP_POOL_SIZE = max(
+    _env_int("TFL_HTTP_POOL_SIZE", max(LIVE_TRACKING_CONCURRENCY, ROUTE_CACHE_CONCURRENCY) + 4),
+    1,
+)
+TFL_HTTP_MAX_ATTEMPTS = max(_env_int("TFL_HTTP_MAX_ATTEMPTS", 2), 1)
+TFL_HTTP_BACKOFF_MS = max(_env_int("TFL_HTTP_BACKOFF_MS", 500), 0)
+TFL_HTTP_LATENCY_SAMPLES = max(_env_int("TFL_HTTP_LATENCY_SAMPLES", 200), 10)
+TFL_RATE_LIMIT_ENABLED = _as_bool(os.getenv("TFL_RATE_LIMIT_ENABLED"), default=True)
+TFL_RATE_LIMIT_PER_MINUTE = max(_env_int("TFL_RATE_LIMIT_PER_MINUTE", 500), 1)
+TFL_RATE_LIMIT_BURST = max(_env_int("TFL_RATE_LIMIT_BURST", 50), 1)
+TFL_RATE_LIMIT_BACKGROUND_RESERVE_PERCENT = min(
+    max(_env_int("TFL_RATE_LIMIT_BACKGROUND_RESERVE_PERCENT", 20), 0),
+    90,
+)
+TFL_RATE_LIMIT_PROXY_WAIT_SECONDS = max(_env_int("TFL_RATE_LIMIT_PROXY_WAIT_SECONDS", 5), 0)
+TFL_RATE_LIMIT_MAX_RETRY_AFTER_SECONDS = max(_env_int("TFL_RATE_LIMIT_MAX_RETRY_AFTER_SECONDS", 120), 1)
+TFL_PROXY_CACHE_ENABLED = _as_bool(os.getenv("TFL_PROXY_CACHE_ENABLED"), default=True)
+TFL_PROXY_CACHE_MAX_BYTES = max(_env_int("TFL_PROXY_CACHE_MAX_MB", 64), 1) * 1024 * 1024
+TFL_PROXY_CACHE_MAX_ENTRY_BYTES = max(_env_int("TFL_PROXY_CACHE_MAX_ENTRY_KB", 4096), 1) * 1024
+TFL_PROXY_CACHE_DEFAULT_TTL_SECONDS = max(_env_int("TFL_PROXY_CACHE_DEFAULT_TTL_SECONDS", 30), 0)
+TFL_PROXY_CACHE_MAX_TTL_SECONDS = max(_env_int("TFL_PROXY_CACHE_MAX_TTL_SECONDS", 3600), 1)
+TFL_PROXY_CACHE_STALE_IF_ERROR_SECONDS = max(_env_int("TFL_PROXY_CACHE_STALE_IF_ERROR_SECONDS", 300), 0)
+OPERATOR_CACHE_TTL_SECONDS = max(_env_int("FLEET_OPERATOR_CACHE_TTL_SECONDS", 300), 0)
 
 DEFAULT_TFL_REGISTRATION_ENDPOINTS: Tuple[str, ...] = (
     "Vehicle/Occupancy/Buses",
@@ -250,6 +378,7 @@ RARE_ZSCORE_THRESHOLD = -2.5
 RARE_DECAY_DAYS = 14
 RARE_OPERATOR_MISMATCH_THRESHOLD = 2
 RARE_OPERATOR_MISMATCH_WINDOW_MINUTES = 45
+USUAL_ROUTES_WINDOW_DAYS = 90
 
 BADGE_NEW_BUS = "new-bus"
 BADGE_RARE_WORKING = "rare-working"
@@ -286,14 +415,252 @@ def _ensure_sslmode(url: str) -> str:
     return f"{url}{separator}sslmode=require"
 
 
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ThreadedConnectionPool:
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        min_size: int = DB_MIN_CONNECTIONS,
+        max_size: int = MAX_CONNECTIONS,
+        quotas: Optional[Dict[str, int]] = None,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT_SECONDS,
+        idle_timeout: float = DB_POOL_IDLE_TIMEOUT_SECONDS,
+        max_lifetime: float = DB_POOL_MAX_LIFETIME_SECONDS,
+        ping_after: float = DB_POOL_PING_AFTER_SECONDS,
+    ) -> None:
+        self._dsn = dsn
+        self._max_size = max(int(max_size), 1)
+        self._min_size = min(max(int(min_size), 0), self._max_size)
+        self._quotas = dict(quotas or {})
+        self._acquire_timeout = float(acquire_timeout)
+        self._idle_timeout = float(idle_timeout)
+        self._max_lifetime = float(max_lifetime)
+        self._ping_after = float(ping_after)
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle: deque = deque()
+        self._checked_out: Dict[int, Tuple[str, float]] = {}
+        self._created_at: Dict[int, float] = {}
+        self._in_use_by_class: Counter = Counter()
+        self._size = 0
+        self._closed = False
+        self._stats: Dict[str, Any] = {
+            "acquired": 0,
+            "waits": 0,
+            "waitSecondsTotal": 0.0,
+            "waitSecondsMax": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "recycled": 0,
+            "pingFailures": 0,
+            "peakInUse": 0,
+        }
+        for _ in range(self._min_size):
+            connection = self._open()
+            self._size += 1
+            self._idle.append((connection, time.monotonic()))
+
+    def _open(self):
+        connection = psycopg2.connect(self._dsn)
+        with self._lock:
+            self._created_at[id(connection)] = time.monotonic()
+            self._stats["created"] += 1
+        return connection
+
+    def _discard(self, connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+            self._size -= 1
+            self._stats["closed"] += 1
+            self._available.notify_all()
+
+    def _expired(self, connection, now: float) -> bool:
+        if not self._max_lifetime:
+            return False
+        created = self._created_at.get(id(connection), now)
+        return now - created >= self._max_lifetime
+
+    def _can_acquire_locked(self, caller: str) -> bool:
+        quota = self._quotas.get(caller)
+        if quota is not None and self._in_use_by_class[caller] >= quota:
+            return False
+        return bool(self._idle) or self._size < self._max_size
+
+    def _is_alive(self, connection) -> bool:
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except Exception:
+            with self._lock:
+                self._stats["pingFailures"] += 1
+            return False
+
+    def getconn(self, caller: str = "http", timeout: Optional[float] = None):
+        wait_for = self._acquire_timeout if timeout is None else float(timeout)
+        started = time.monotonic()
+        waited = False
+        with self._lock:
+            if self._closed:
+                raise PoolTimeoutError("Connection pool is closed")
+            while not self._can_acquire_locked(caller):
+                remaining = wait_for - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {wait_for:.1f}s waiting for a {caller} database connection"
+                    )
+                waited = True
+                self._available.wait(timeout=remaining)
+            entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                self._size += 1
+            self._in_use_by_class[caller] += 1
+            in_use = sum(self._in_use_by_class.values())
+            if in_use > self._stats["peakInUse"]:
+                self._stats["peakInUse"] = in_use
+            elapsed = time.monotonic() - started
+            self._stats["acquired"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["waitSecondsTotal"] += elapsed
+                if elapsed > self._stats["waitSecondsMax"]:
+                    self._stats["waitSecondsMax"] = elapsed
+
+        try:
+            connection = self._checkout(entry)
+        except Exception:
+            with self._lock:
+                self._in_use_by_class[caller] -= 1
+                self._available.notify_all()
+            raise
+        with self._lock:
+            self._checked_out[id(connection)] = (caller, time.monotonic())
+        return connection
+
+    def _checkout(self, entry: Optional[Tuple[Any, float]]):
+        if entry is None:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+
+        connection, idle_since = entry
+        now = time.monotonic()
+        stale = connection.closed or self._expired(connection, now)
+        if not stale and self._ping_after and now - idle_since >= self._ping_after:
+            stale = not self._is_alive(connection)
+        if not stale:
+            return connection
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+            self._stats["recycled"] += 1
+        try:
+            return self._open()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+
+    def putconn(self, connection, close: bool = False) -> None:
+        with self._lock:
+            caller, _ = self._checked_out.pop(id(connection), ("http", 0.0))
+            if self._in_use_by_class[caller] > 0:
+                self._in_use_by_class[caller] -= 1
+            now = time.monotonic()
+            keep = not (close or self._closed or connection.closed or self._expired(connection, now))
+            if keep:
+                self._idle.append((connection, now))
+                self._available.notify_all()
+                self._trim_idle_locked(now)
+                return
+        self._discard(connection)
+
+    def _trim_idle_locked(self, now: float) -> None:
+        if not self._idle_timeout:
+            return
+        while len(self._idle) > 1 and self._size > self._min_size:
+            connection, idle_since = self._idle[0]
+            if now - idle_since < self._idle_timeout:
+                break
+            self._idle.popleft()
+            self._created_at.pop(id(connection), None)
+            self._size -= 1
+            self._stats["closed"] += 1
+            self._stats["recycled"] += 1
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def closeall(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._available.notify_all()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            in_use = sum(self._in_use_by_class.values())
+            now = time.monotonic()
+            longest = max((now - since for _, since in self._checked_out.values()), default=0.0)
+            by_class = {
+                name: {"inUse": self._in_use_by_class.get(name, 0), "quota": self._quotas.get(name)}
+                for name in sorted(set(self._quotas) | set(self._in_use_by_class))
+            }
+            stats.update(
+                {
+                    "size": self._size,
+                    "idle": len(self._idle),
+                    "inUse": in_use,
+                    "maxSize": self._max_size,
+                    "utilisation": round(in_use / self._max_size, 3),
+                    "longestCheckoutSeconds": round(longest, 3),
+                    "byClass": by_class,
+                }
+            )
+        acquired = stats["acquired"] or 1
+        stats["waitSecondsAvg"] = round(stats["waitSecondsTotal"] / acquired, 4)
+        stats["waitSecondsTotal"] = round(stats["waitSecondsTotal"], 3)
+        stats["waitSecondsMax"] = round(stats["waitSecondsMax"], 3)
+        return stats
+
+
 _connection_pool_lock = threading.Lock()
-connection_pool: Optional[SimpleConnectionPool] = None
+connection_pool: Optional[ThreadedConnectionPool] = None
+_connection_context = threading.local()
 
 _database_init_lock = threading.Lock()
 _database_initialised = False
 
 
-def _initialise_connection_pool() -> SimpleConnectionPool:
+def set_connection_class(caller: str) -> None:
+    _connection_context.caller = caller
+
+
+def _initialise_connection_pool() -> ThreadedConnectionPool:
     global connection_pool
 
     pool = connection_pool
@@ -303,17 +670,16 @@ def _initialise_connection_pool() -> SimpleConnectionPool:
     with _connection_pool_lock:
         pool = connection_pool
         if pool is None:
-            pool = SimpleConnectionPool(
-                1,
-                MAX_CONNECTIONS,
+            pool = ThreadedConnectionPool(
                 _ensure_sslmode(DATABASE_URL),
+                quotas=DB_POOL_QUOTAS,
             )
             connection_pool = pool
 
     return pool
 
 
-def _return_connection(connection, *, had_error: bool = False) -> None:
+def _return_connection(connection, pool: ThreadedConnectionPool, *, had_error: bool = False) -> None:
     if connection is None:
         return
 
@@ -325,10 +691,7 @@ def _return_connection(connection, *, had_error: bool = False) -> None:
         try:
             status = connection.get_transaction_status()
         except Exception:
-            try:
-                connection.close()
-            finally:
-                close_connection = True
+            close_connection = True
         else:
             if had_error or status not in (
                 TRANSACTION_STATUS_IDLE,
@@ -337,63 +700,33 @@ def _return_connection(connection, *, had_error: bool = False) -> None:
                 try:
                     connection.rollback()
                 except Exception:
-                    try:
-                        connection.close()
-                    finally:
-                        close_connection = True
-
-    pool = connection_pool
-
-    if pool is None:
-        try:
-            connection.close()
-        except Exception:
-            pass
-        return
+                    close_connection = True
 
-    try:
-        pool.putconn(connection, close=close_connection)
-    except Exception:
-        if not close_connection:
-            try:
-                connection.close()
-            except Exception:
-                pass
-            else:
-                close_connection = True
-        try:
-            pool.putconn(connection, close=True)
-        except Exception:
-            pass
+    pool.putconn(connection, close=close_connection)
 
 
 @contextmanager
-def get_connection():
+def get_connection(caller: Optional[str] = None):
     pool = _initialise_connection_pool()
-    connection = pool.getconn()
+    connection = pool.getconn(caller or getattr(_connection_context, "caller", "http"))
     had_error = False
 
-    while connection.closed:
-        pool.putconn(connection, close=True)
-        connection = pool.getconn()
-
     connection.autocommit = False
 
     try:
         yield connection
     except Exception:
         had_error = True
-        if connection is not None and not connection.closed:
-            try:
-                connection.rollback()
-            except Exception:
-                try:
-                    connection.close()
-                finally:
-                    pass
         raise
     finally:
-        _return_connection(connection, had_error=had_error)
+        _return_connection(connection, pool, had_error=had_error)
+
+
+def connection_pool_stats() -> Dict[str, Any]:
+    pool = connection_pool
+    if pool is None:
+        return {"initialised": False}
+    return {"initialised": True, **pool.stats()}
 
 
 def close_connection_pool() -> None:
@@ -451,138 +784,854 @@ def _build_tfl_api_url(path: str) -> str:
     return urljoin(TFL_API_BASE_URL, normalised_path)
 
 
-@app.route("/api/tfl/<path:subpath>", methods=["GET"])
-def proxy_tfl_api(subpath: str) -> Response:
-    upstream_url = _build_tfl_api_url(subpath)
+_RETRYABLE_STATUS_CODES: Set[int] = {429, 500, 502, 503, 504}
+
+
+class TfLRequestCancelled(requests.RequestException):
+    pass
 
-    query_params: List[Tuple[str, str]] = list(request.args.items(multi=True))
-    existing_param_keys: Set[str] = {key for key, _ in query_params}
 
-    proxy_kwargs = build_tfl_request_kwargs()
-    for key, value in proxy_kwargs.get("params", {}).items():
-        if key not in existing_param_keys:
-            query_params.append((key, value))
+class TfLRateLimited(requests.RequestException):
+    def __init__(self, message: str, retry_after: float = 1.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
 
-    headers = dict(proxy_kwargs.get("headers", {}))
+TFL_PRIORITY_CLASSES: Tuple[str, ...] = ("arrivals", "proxy", "background")
 
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    text = value.strip()
     try:
-        upstream_response = requests.get(
-            upstream_url,
-            params=query_params or None,
-            headers=headers or None,
-            timeout=TFL_API_TIMEOUT_SECONDS,
-        )
-    except requests.RequestException as error:
-        app.logger.warning("TfL proxy request failed for %s: %s", upstream_url, error)
-        return jsonify({"error": "Unable to reach TfL API"}), 502
+        seconds = float(text)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), float(TFL_RATE_LIMIT_MAX_RETRY_AFTER_SECONDS))
 
-    response = make_response(upstream_response.content, upstream_response.status_code)
 
-    content_type = upstream_response.headers.get("Content-Type")
-    if content_type:
-        response.headers["Content-Type"] = content_type
+class TfLRateLimiter:
+    def __init__(
+        self,
+        *,
+        enabled: bool = TFL_RATE_LIMIT_ENABLED,
+        per_minute: int = TFL_RATE_LIMIT_PER_MINUTE,
+        burst: int = TFL_RATE_LIMIT_BURST,
+        background_reserve_percent: int = TFL_RATE_LIMIT_BACKGROUND_RESERVE_PERCENT,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._per_minute = max(int(per_minute), 1)
+        self._rate = self._per_minute / 60.0
+        self._capacity = float(max(int(burst), 1))
+        self._reserve = {
+            "arrivals": 0.0,
+            "proxy": 0.0,
+            "background": self._capacity * background_reserve_percent / 100.0,
+        }
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting: Counter = Counter()
+        self._granted_at: deque = deque()
+        self._stats: Dict[str, Dict[str, Any]] = {
+            name: {"granted": 0, "waited": 0, "waitSecondsTotal": 0.0, "waitSecondsMax": 0.0, "denied": 0}
+            for name in TFL_PRIORITY_CLASSES
+        }
+        self._retry_after_events = 0
+        self._last_retry_after: Optional[float] = None
 
-    for header_name in ("Cache-Control", "ETag", "Last-Modified"):
-        header_value = upstream_response.headers.get(header_name)
-        if header_value:
-            response.headers[header_name] = header_value
+    def _refill_locked(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+            self._updated_at = now
 
-    return response
+    def _outranked_locked(self, priority: str) -> bool:
+        level = TFL_PRIORITY_CLASSES.index(priority)
+        return any(self._waiting[name] for name in TFL_PRIORITY_CLASSES[:level])
 
+    def acquire(
+        self,
+        priority: str = "background",
+        *,
+        timeout: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> bool:
+        if priority not in self._stats:
+            priority = "background"
+        if not self._enabled:
+            with self._lock:
+                self._stats[priority]["granted"] += 1
+                self._granted_at.append(time.monotonic())
+            return True
 
-@app.route("/config.js")
-def client_config() -> Response:
-    payload = {
-        "auth": {
-            "mode": "local",
-            "allowRegistration": True,
-            "allowGuest": True,
-        },
-        "firebase": {},
-    }
+        started = time.monotonic()
+        deadline = None if timeout is None else started + max(timeout, 0.0)
+        needed = 1.0 + self._reserve[priority]
+        stats = self._stats[priority]
 
-    payload_json = json.dumps(payload, separators=(",", ":"))
-    script = (
-        "window.__ROUTEFLOW_CONFIG__ = Object.assign({{}}, window.__ROUTEFLOW_CONFIG__ || {{}}, {payload});"
-    ).format(payload=payload_json)
-    response = make_response(script)
-    response.headers["Content-Type"] = "application/javascript; charset=utf-8"
-    response.headers["Cache-Control"] = "no-store"
-    return response
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill_locked(now)
+                    if now < self._paused_until:
+                        wait = self._paused_until - now
+                    elif self._outranked_locked(priority):
+                        wait = 0.05
+                    elif self._tokens >= needed:
+                        self._tokens -= 1.0
+                        waited = now - started
+                        stats["granted"] += 1
+                        if waited >= 0.001:
+                            stats["waited"] += 1
+                            stats["waitSecondsTotal"] += waited
+                            stats["waitSecondsMax"] = max(stats["waitSecondsMax"], waited)
+                        self._granted_at.append(now)
+                        return True
+                    else:
+                        wait = (needed - self._tokens) / self._rate
+
+                    if stop_event is not None and stop_event.is_set():
+                        stats["denied"] += 1
+                        return False
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            stats["denied"] += 1
+                            return False
+                        wait = min(wait, remaining)
+                    self._condition.wait(min(wait, 0.25))
+            finally:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
 
-FLEET_OPTION_FIELDS: List[str] = [
-    "operator",
-    "status",
-    "wrap",
-    "vehicleType",
-    "doors",
-    "engineType",
-    "engine",
-    "chassis",
-    "bodyType",
-    "garage",
-    "extras",
-    "length",
-]
+    def retry_after_hint(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill_locked(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            return max((1.0 - self._tokens) / self._rate, 0.0)
+
+    def defer(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._condition:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated_at = now
+            self._retry_after_events += 1
+            self._last_retry_after = round(seconds, 3)
+            self._condition.notify_all()
+        print(f"[tfl-http] Upstream asked to retry after {seconds:.1f}s; pausing requests", flush=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill_locked(now)
+            while self._granted_at and now - self._granted_at[0] > 60.0:
+                self._granted_at.popleft()
+            used = len(self._granted_at)
+            classes = {}
+            for name, stats in self._stats.items():
+                classes[name] = {
+                    "granted": stats["granted"],
+                    "waited": stats["waited"],
+                    "denied": stats["denied"],
+                    "waiting": self._waiting[name],
+                    "waitSecondsTotal": round(stats["waitSecondsTotal"], 3),
+                    "waitSecondsMax": round(stats["waitSecondsMax"], 3),
+                }
+            return {
+                "enabled": self._enabled,
+                "perMinute": self._per_minute,
+                "burst": int(self._capacity),
+                "tokens": round(self._tokens, 2),
+                "usedLastMinute": used,
+                "budgetUsed": round(used / self._per_minute, 3),
+                "pausedForSeconds": round(max(self._paused_until - now, 0.0), 3),
+                "retryAfterEvents": self._retry_after_events,
+                "lastRetryAfterSeconds": self._last_retry_after,
+                "classes": classes,
+            }
 
-DEFAULT_FLEET_OPTIONS: Dict[str, List[str]] = {
-    "operator": [
-        "Abellio London",
-        "Arriva London",
-        "Go-Ahead London",
-        "Metroline",
-        "Stagecoach London",
-    ],
-    "status": ["Active", "Inactive", "Stored"],
-    "wrap": ["Standard", "Heritage", "Advertising wrap", "Special event"],
-    "vehicleType": ["Double Decker", "Single Decker"],
-    "doors": ["1", "2", "3"],
-    "engineType": ["Diesel", "Hybrid", "Electric", "Hydrogen"],
-    "engine": [
-        "Alexander Dennis Enviro400EV",
-        "Volvo B5LH",
-        "Scania N250UD",
-        "Wrightbus Hydrogen",
-    ],
-    "chassis": [
-        "Alexander Dennis",
-        "Scania N-series",
-        "Volvo B5LH",
-        "Wrightbus StreetDeck",
-    ],
-    "bodyType": [
-        "Alexander Dennis Enviro400 MMC",
-        "Wright Gemini 3",
-        "Wright StreetDeck",
-        "Caetano e.City Gold",
-    ],
-    "garage": [
-        "QB (Battersea)",
-        "HT (Holloway)",
-        "LI (Leyton)",
-        "NX (New Cross)",
-        "WJ (Waterloo)",
-    ],
-    "extras": [
-        "New Bus",
-        "Rare Working",
-        "Heritage Fleet",
-        "Route Branding",
-        "Night Bus Allocation",
-        "Training Vehicle",
-    ],
-    "length": ["8.9m", "10.2m", "10.6m", "11.2m", "12.4m"],
-}
 
-DEFAULT_FLEET_BUSES: Dict[str, Dict[str, Any]] = {
-    "BV72YKD": {
-        "regKey": "BV72YKD",
-        "registration": "BV72 YKD",
-        "fleetNumber": "4032",
-        "operator": "Abellio London",
-        "status": "Active",
-        "wrap": "Standard",
-        "vehicleType": "Double Decker",
+tfl_rate_limiter = TfLRateLimiter()
+
+
+class TfLHttpClient:
+    def __init__(
+        self,
+        *,
+        pool_size: int = TFL_HTTP_POOL_SIZE,
+        timeout: float = TFL_API_TIMEOUT_SECONDS,
+        max_attempts: int = TFL_HTTP_MAX_ATTEMPTS,
+        backoff_ms: int = TFL_HTTP_BACKOFF_MS,
+        limiter: Optional[TfLRateLimiter] = None,
+    ) -> None:
+        self._limiter = limiter or tfl_rate_limiter
+        self._pool_size = max(int(pool_size), 1)
+        self._timeout = timeout
+        self._max_attempts = max(int(max_attempts), 1)
+        self._backoff_seconds = max(int(backoff_ms), 0) / 1000.0
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._adapter: Optional[HTTPAdapter] = None
+        self._auth_params: Dict[str, Any] = {}
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def _get_session(self) -> requests.Session:
+        session = self._session
+        if session is not None:
+            return session
+        with self._lock:
+            if self._session is None:
+                auth = build_tfl_request_kwargs()
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=self._pool_size,
+                    max_retries=0,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(
+                    {
+                        "Accept": "application/json",
+                        "Accept-Encoding": "gzip, deflate",
+                    }
+                )
+                session.headers.update(auth.get("headers") or {})
+                self._auth_params = dict(auth.get("params") or {})
+                self._adapter = adapter
+                self._session = session
+            return self._session
+
+    def _merge_params(self, params: Any) -> Any:
+        if isinstance(params, (list, tuple)):
+            merged = list(params)
+            present = {key for key, _ in merged}
+            merged.extend(
+                (key, value) for key, value in self._auth_params.items() if key not in present
+            )
+            return merged or None
+        merged_dict = dict(self._auth_params)
+        merged_dict.update(params or {})
+        return merged_dict or None
+
+    def _backoff(
+        self,
+        attempt: int,
+        backoff_seconds: float,
+        stop_event: Optional[threading.Event],
+    ) -> bool:
+        delay = backoff_seconds * max(1, 2 ** (attempt - 1))
+        if backoff_seconds:
+            delay += random.uniform(0.0, backoff_seconds)
+        if stop_event:
+            return stop_event.wait(delay)
+        time.sleep(delay)
+        return False
+
+    def _record(self, endpoint: str, elapsed: float, *, status: Optional[int], retried: bool) -> None:
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "statuses": Counter(),
+                    "latencyTotal": 0.0,
+                    "latencyMax": 0.0,
+                    "samples": deque(maxlen=TFL_HTTP_LATENCY_SAMPLES),
+                }
+                self._endpoints[endpoint] = stats
+            stats["requests"] += 1
+            if retried:
+                stats["retries"] += 1
+            if status is None or status >= 400:
+                stats["errors"] += 1
+            stats["statuses"][str(status) if status is not None else "error"] += 1
+            stats["latencyTotal"] += elapsed
+            if elapsed > stats["latencyMax"]:
+                stats["latencyMax"] = elapsed
+            stats["samples"].append(elapsed)
+
+    def fetch(
+        self,
+        url: str,
+        *,
+        endpoint: str,
+        params: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        max_attempts: Optional[int] = None,
+        backoff_ms: Optional[int] = None,
+        timeout: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+        priority: str = "background",
+        budget_wait: Optional[float] = None,
+    ) -> Tuple[requests.Response, int]:
+        session = self._get_session()
+        attempts_allowed = self._max_attempts if max_attempts is None else max(int(max_attempts), 1)
+        backoff_seconds = self._backoff_seconds if backoff_ms is None else max(int(backoff_ms), 0) / 1000.0
+        merged_params = self._merge_params(params)
+        attempts = 0
+
+        while True:
+            attempts += 1
+            if not self._limiter.acquire(priority, timeout=budget_wait, stop_event=stop_event):
+                if stop_event is not None and stop_event.is_set():
+                    error: requests.RequestException = TfLRequestCancelled("cancelled")
+                else:
+                    error = TfLRateLimited(
+                        "TfL request budget exhausted",
+                        retry_after=self._limiter.retry_after_hint(),
+                    )
+                error.attempts = attempts - 1
+                raise error
+            started = time.perf_counter()
+            try:
+                response = session.get(
+                    url,
+                    params=merged_params,
+                    headers=headers or None,
+                    timeout=timeout or self._timeout,
+                )
+            except requests.RequestException as exc:
+                self._record(endpoint, time.perf_counter() - started, status=None, retried=attempts > 1)
+                if attempts >= attempts_allowed:
+                    exc.attempts = attempts
+                    raise
+                if self._backoff(attempts, backoff_seconds, stop_event):
+                    cancelled = TfLRequestCancelled("cancelled")
+                    cancelled.attempts = attempts
+                    raise cancelled from exc
+                continue
+
+            self._record(
+                endpoint,
+                time.perf_counter() - started,
+                status=response.status_code,
+                retried=attempts > 1,
+            )
+            if response.status_code in (429, 503):
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is None and response.status_code == 429:
+                    retry_after = backoff_seconds or 1.0
+                if retry_after:
+                    self._limiter.defer(retry_after)
+            if response.status_code in _RETRYABLE_STATUS_CODES and attempts < attempts_allowed:
+                response.close()
+                if self._backoff(attempts, backoff_seconds, stop_event):
+                    cancelled = TfLRequestCancelled("cancelled")
+                    cancelled.attempts = attempts
+                    raise cancelled
+                continue
+            return response, attempts
+
+    def get(self, url: str, *, endpoint: str, **kwargs: Any) -> requests.Response:
+        response, _ = self.fetch(url, endpoint=endpoint, **kwargs)
+        return response
+
+    def get_json(self, url: str, *, endpoint: str, **kwargs: Any) -> Any:
+        response = self.get(url, endpoint=endpoint, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def _connection_stats(self) -> Dict[str, Any]:
+        adapter = self._adapter
+        if adapter is None:
+            return {"opened": 0, "requests": 0, "reuseRatio": None, "hosts": {}}
+        hosts: Dict[str, Dict[str, int]] = {}
+        opened = 0
+        total = 0
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            total += pool.num_requests
+            hosts[str(pool.host)] = {
+                "opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": pool.pool.qsize() if pool.pool is not None else 0,
+            }
+        reuse = round(1 - opened / total, 3) if total else None
+        return {"opened": opened, "requests": total, "reuseRatio": reuse, "hosts": hosts}
+
+    def stats(self) -> Dict[str, Any]:
+        endpoints: Dict[str, Any] = {}
+        with self._lock:
+            for name, stats in self._endpoints.items():
+                samples = sorted(stats["samples"])
+                p95 = samples[min(int(len(samples) * 0.95), len(samples) - 1)] if samples else 0.0
+                endpoints[name] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "statuses": dict(stats["statuses"]),
+                    "latencyAvgMs": round(stats["latencyTotal"] / stats["requests"] * 1000, 1),
+                    "latencyP95Ms": round(p95 * 1000, 1),
+                    "latencyMaxMs": round(stats["latencyMax"] * 1000, 1),
+                }
+        return {
+            "rateLimit": self._limiter.stats(),
+            "poolSize": self._pool_size,
+            "connections": self._connection_stats(),
+            "endpoints": endpoints,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            session = self._session
+            self._session = None
+            self._adapter = None
+        if session is not None:
+            session.close()
+
+
+tfl_http = TfLHttpClient()
+
+
+TFL_PROXY_CACHE_PATH_TTLS: Tuple[Tuple[re.Pattern, int], ...] = (
+    (re.compile(r"/arrivals$"), 15),
+    (re.compile(r"/(disruption|status)(/|$)"), 60),
+    (re.compile(r"^line/mode/[^/]+$"), 3600),
+    (re.compile(r"/route/sequence/"), 3600),
+    (re.compile(r"^stoppoint/[^/]+$"), 3600),
+)
+_TFL_PROXY_CACHE_IGNORED_PARAMS = {"app_id", "app_key"}
+_TFL_PROXY_CACHED_HEADERS = ("Content-Type", "Cache-Control", "ETag", "Last-Modified", "Expires")
+
+
+def _normalise_proxy_cache_key(subpath: str, query_params: Sequence[Tuple[str, str]]) -> str:
+    path = "/".join(part for part in str(subpath or "").strip("/").lower().split("/") if part)
+    params = sorted(
+        (key, value)
+        for key, value in query_params
+        if key.lower() not in _TFL_PROXY_CACHE_IGNORED_PARAMS
+    )
+    if not params:
+        return path
+    return path + "?" + "&".join(f"{quote(key)}={quote(value)}" for key, value in params)
+
+
+def _proxy_cache_ttl(path_key: str, headers: Any) -> Optional[float]:
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    directives: Dict[str, Optional[str]] = {}
+    for part in cache_control.split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip('" ') or None
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name):
+            try:
+                return min(max(float(directives[name]), 0.0), TFL_PROXY_CACHE_MAX_TTL_SECONDS)
+            except ValueError:
+                pass
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires)
+            reference = parsedate_to_datetime(headers["Date"]) if headers.get("Date") else datetime.now(timezone.utc)
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if reference.tzinfo is None:
+                reference = reference.replace(tzinfo=timezone.utc)
+            seconds = (expires_at - reference).total_seconds()
+            return min(max(seconds, 0.0), TFL_PROXY_CACHE_MAX_TTL_SECONDS)
+        except (TypeError, ValueError):
+            return 0.0
+    path = path_key.split("?", 1)[0]
+    for pattern, ttl in TFL_PROXY_CACHE_PATH_TTLS:
+        if pattern.search(path):
+            return float(ttl)
+    return float(TFL_PROXY_CACHE_DEFAULT_TTL_SECONDS)
+
+
+class _ProxyFlight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[Tuple[Dict[str, Any], str]] = None
+        self.error: Optional[BaseException] = None
+
+
+class TfLProxyCache:
+    def __init__(
+        self,
+        *,
+        enabled: bool = TFL_PROXY_CACHE_ENABLED,
+        max_bytes: int = TFL_PROXY_CACHE_MAX_BYTES,
+        max_entry_bytes: int = TFL_PROXY_CACHE_MAX_ENTRY_BYTES,
+        stale_if_error: float = TFL_PROXY_CACHE_STALE_IF_ERROR_SECONDS,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._max_bytes = max(int(max_bytes), 1)
+        self._max_entry_bytes = max(int(max_entry_bytes), 1)
+        self._stale_if_error = float(stale_if_error)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._flights: Dict[str, _ProxyFlight] = {}
+        self._bytes = 0
+        self._stats: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def _lookup_locked(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _store_locked(self, key: str, entry: Dict[str, Any]) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous["size"]
+        self._entries[key] = entry
+        self._bytes += entry["size"]
+        self._stats["stores"] += 1
+        while self._bytes > self._max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["size"]
+            self._stats["evictions"] += 1
+
+    def _build_entry(self, key: str, response: requests.Response) -> Optional[Dict[str, Any]]:
+        if response.status_code != 200:
+            return None
+        ttl = _proxy_cache_ttl(key, response.headers)
+        body = response.content
+        if ttl is None or len(body) > self._max_entry_bytes:
+            return None
+        headers = {
+            name: response.headers[name]
+            for name in _TFL_PROXY_CACHED_HEADERS
+            if response.headers.get(name)
+        }
+        now = time.monotonic()
+        return {
+            "status": 200,
+            "body": body,
+            "headers": headers,
+            "storedAt": now,
+            "expiresAt": now + ttl,
+            "size": len(body) + sum(len(name) + len(value) for name, value in headers.items()) + len(key),
+        }
+
+    def _can_serve_stale(self, stale: Optional[Dict[str, Any]]) -> bool:
+        if stale is None or time.monotonic() - stale["expiresAt"] > self._stale_if_error:
+            return False
+        with self._lock:
+            self._stats["staleServed"] += 1
+        return True
+
+    def _refresh(
+        self,
+        key: str,
+        stale: Optional[Dict[str, Any]],
+        fetch: Callable[[Dict[str, str]], requests.Response],
+    ) -> Tuple[Dict[str, Any], str]:
+        conditional: Dict[str, str] = {}
+        if stale is not None:
+            if stale["headers"].get("ETag"):
+                conditional["If-None-Match"] = stale["headers"]["ETag"]
+            if stale["headers"].get("Last-Modified"):
+                conditional["If-Modified-Since"] = stale["headers"]["Last-Modified"]
+
+        try:
+            response = fetch(conditional)
+        except requests.RequestException:
+            if self._can_serve_stale(stale):
+                return stale, "STALE"
+            raise
+
+        if response.status_code >= 500 and self._can_serve_stale(stale):
+            return stale, "STALE"
+
+        if response.status_code == 304 and stale is not None:
+            ttl = _proxy_cache_ttl(key, response.headers)
+            if ttl is None:
+                ttl = _proxy_cache_ttl(key, stale["headers"]) or 0.0
+            refreshed = dict(stale)
+            refreshed["headers"] = dict(stale["headers"])
+            for name in ("Cache-Control", "ETag", "Last-Modified", "Expires"):
+                if response.headers.get(name):
+                    refreshed["headers"][name] = response.headers[name]
+            now = time.monotonic()
+            refreshed["storedAt"] = now
+            refreshed["expiresAt"] = now + ttl
+            with self._lock:
+                self._stats["revalidated"] += 1
+                self._store_locked(key, refreshed)
+            return refreshed, "REVALIDATED"
+
+        entry = self._build_entry(key, response)
+        if entry is None:
+            with self._lock:
+                self._stats["uncacheable"] += 1
+                if stale is not None and self._entries.get(key) is stale:
+                    self._entries.pop(key)
+                    self._bytes -= stale["size"]
+            return {
+                "status": response.status_code,
+                "body": response.content,
+                "headers": {
+                    name: response.headers[name]
+                    for name in _TFL_PROXY_CACHED_HEADERS + ("Retry-After",)
+                    if response.headers.get(name)
+                },
+                "storedAt": time.monotonic(),
+                "expiresAt": 0.0,
+                "size": 0,
+            }, "BYPASS"
+        with self._lock:
+            self._store_locked(key, entry)
+        return entry, "MISS"
+
+    def fetch(
+        self,
+        key: str,
+        fetch: Callable[[Dict[str, str]], requests.Response],
+        *,
+        wait_timeout: float,
+    ) -> Tuple[Dict[str, Any], str]:
+        with self._lock:
+            entry = self._lookup_locked(key)
+            if entry is not None and time.monotonic() < entry["expiresAt"]:
+                self._stats["hits"] += 1
+                return entry, "HIT"
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _ProxyFlight()
+                self._flights[key] = flight
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            if not flight.done.wait(wait_timeout):
+                raise requests.Timeout("Timed out waiting for a shared TfL request")
+            if flight.error is not None:
+                raise flight.error
+            cached, _ = flight.result
+            return cached, "COALESCED"
+
+        try:
+            flight.result = self._refresh(key, entry, fetch)
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            size = self._bytes
+            in_flight = len(self._flights)
+        lookups = stats.get("hits", 0) + stats.get("misses", 0) + stats.get("coalesced", 0)
+        stats.update(
+            {
+                "enabled": self._enabled,
+                "entries": entries,
+                "bytes": size,
+                "maxBytes": self._max_bytes,
+                "inFlight": in_flight,
+                "hitRatio": round((stats.get("hits", 0) + stats.get("coalesced", 0)) / lookups, 3)
+                if lookups
+                else None,
+            }
+        )
+        return stats
+
+
+tfl_proxy_cache = TfLProxyCache()
+
+
+@app.route("/api/tfl/<path:subpath>", methods=["GET"])
+def proxy_tfl_api(subpath: str) -> Response:
+    upstream_url = _build_tfl_api_url(subpath)
+
+    query_params: List[Tuple[str, str]] = list(request.args.items(multi=True))
+
+    def fetch_upstream(conditional_headers: Dict[str, str]) -> requests.Response:
+        return tfl_http.get(
+            upstream_url,
+            endpoint="proxy",
+            params=query_params,
+            headers=conditional_headers,
+            max_attempts=1,
+            priority="proxy",
+            budget_wait=TFL_RATE_LIMIT_PROXY_WAIT_SECONDS,
+        )
+
+    try:
+        if tfl_proxy_cache.enabled:
+            cached, cache_status = tfl_proxy_cache.fetch(
+                _normalise_proxy_cache_key(subpath, query_params),
+                fetch_upstream,
+                wait_timeout=TFL_API_TIMEOUT_SECONDS + TFL_RATE_LIMIT_PROXY_WAIT_SECONDS,
+            )
+        else:
+            upstream_response = fetch_upstream({})
+            cached = {
+                "status": upstream_response.status_code,
+                "body": upstream_response.content,
+                "headers": upstream_response.headers,
+                "storedAt": time.monotonic(),
+            }
+            cache_status = "BYPASS"
+    except TfLRateLimited as error:
+        response = jsonify({"error": "TfL request budget exhausted, please retry shortly."})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(max(int(error.retry_after + 0.999), 1))
+        return response
+    except requests.RequestException as error:
+        app.logger.warning("TfL proxy request failed for %s: %s", upstream_url, error)
+        return jsonify({"error": "Unable to reach TfL API"}), 502
+
+    etag = cached["headers"].get("ETag")
+    if cached["status"] == 200 and etag and request.if_none_match.contains_raw(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(cached["body"], cached["status"])
+        content_type = cached["headers"].get("Content-Type")
+        if content_type:
+            response.headers["Content-Type"] = content_type
+
+    for header_name in ("Cache-Control", "ETag", "Last-Modified", "Retry-After"):
+        header_value = cached["headers"].get(header_name)
+        if header_value:
+            response.headers[header_name] = header_value
+
+    response.headers["X-Cache"] = cache_status
+    if cache_status in ("HIT", "COALESCED", "STALE"):
+        response.headers["Age"] = str(int(time.monotonic() - cached["storedAt"]))
+    return response
+
+
+@app.route("/config.js")
+def client_config() -> Response:
+    payload = {
+        "auth": {
+            "mode": "local",
+            "allowRegistration": True,
+            "allowGuest": True,
+        },
+        "firebase": {},
+    }
+
+    payload_json = json.dumps(payload, separators=(",", ":"))
+    script = (
+        "window.__ROUTEFLOW_CONFIG__ = Object.assign({{}}, window.__ROUTEFLOW_CONFIG__ || {{}}, {payload});"
+    ).format(payload=payload_json)
+    response = make_response(script)
+    response.headers["Content-Type"] = "application/javascript; charset=utf-8"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+FLEET_OPTION_FIELDS: List[str] = [
+    "operator",
+    "status",
+    "wrap",
+    "vehicleType",
+    "doors",
+    "engineType",
+    "engine",
+    "chassis",
+    "bodyType",
+    "garage",
+    "extras",
+    "length",
+]
+
+DEFAULT_FLEET_OPTIONS: Dict[str, List[str]] = {
+    "operator": [
+        "Abellio London",
+        "Arriva London",
+        "Go-Ahead London",
+        "Metroline",
+        "Stagecoach London",
+    ],
+    "status": ["Active", "Inactive", "Stored"],
+    "wrap": ["Standard", "Heritage", "Advertising wrap", "Special event"],
+    "vehicleType": ["Double Decker", "Single Decker"],
+    "doors": ["1", "2", "3"],
+    "engineType": ["Diesel", "Hybrid", "Electric", "Hydrogen"],
+    "engine": [
+        "Alexander Dennis Enviro400EV",
+        "Volvo B5LH",
+        "Scania N250UD",
+        "Wrightbus Hydrogen",
+    ],
+    "chassis": [
+        "Alexander Dennis",
+        "Scania N-series",
+        "Volvo B5LH",
+        "Wrightbus StreetDeck",
+    ],
+    "bodyType": [
+        "Alexander Dennis Enviro400 MMC",
+        "Wright Gemini 3",
+        "Wright StreetDeck",
+        "Caetano e.City Gold",
+    ],
+    "garage": [
+        "QB (Battersea)",
+        "HT (Holloway)",
+        "LI (Leyton)",
+        "NX (New Cross)",
+        "WJ (Waterloo)",
+    ],
+    "extras": [
+        "New Bus",
+        "Rare Working",
+        "Heritage Fleet",
+        "Route Branding",
+        "Night Bus Allocation",
+        "Training Vehicle",
+    ],
+    "length": ["8.9m", "10.2m", "10.6m", "11.2m", "12.4m"],
+}
+
+DEFAULT_FLEET_BUSES: Dict[str, Dict[str, Any]] = {
+    "BV72YKD": {
+        "regKey": "BV72YKD",
+        "registration": "BV72 YKD",
+        "fleetNumber": "4032",
+        "operator": "Abellio London",
+        "status": "Active",
+        "wrap": "Standard",
+        "vehicleType": "Double Decker",
         "doors": "2",
         "engineType": "Electric",
         "engine": "Alexander Dennis Enviro400EV",
@@ -929,6 +1978,14 @@ def handle_api_error(error: ApiError) -> Response:
     return response
 
 
+@app.errorhandler(PoolTimeoutError)
+def handle_pool_timeout(error: PoolTimeoutError) -> Response:
+    response = jsonify({"error": "Database is busy, please retry shortly."})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
 @app.errorhandler(Exception)
 def handle_unexpected_error(error: Exception) -> Response:
     app.logger.exception("Unexpected error while handling request", exc_info=error)
@@ -979,23 +2036,272 @@ def _ensure_database_ready():
     ensure_database_initialised()
 
 
-def _perform_database_initialisation() -> None:
-    with get_connection() as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS profile_notes (
-                    uid TEXT NOT NULL,
-                    note_id TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                    PRIMARY KEY (uid, note_id)
-                );
-                """
-            )
-            cursor.execute(
+PARTITIONED_TABLES: Dict[str, Tuple[str, str]] = {
+    "bus_sightings": ("seen_at", "sighting_id"),
+    "bus_history": ("event_ts", "history_id"),
+    "vehicle_history": ("ts", "history_id"),
+}
+
+
+def _partition_step() -> timedelta:
+    return timedelta(days=1 if FLEET_PARTITION_INTERVAL == "day" else 7)
+
+
+def _partition_start(value: datetime) -> datetime:
+    moment = value.astimezone(timezone.utc)
+    start = datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+    if FLEET_PARTITION_INTERVAL == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _partition_bounds(cursor, table: str) -> List[Dict[str, Any]]:
+    cursor.execute(
+        r"""
+        SELECT c.relname AS name,
+               pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT' AS is_default,
+               (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'FROM \(''([^'']+)''\)'))[1]::timestamptz
+                   AS lower_bound,
+               (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \(''([^'']+)''\)'))[1]::timestamptz
+                   AS upper_bound
+        FROM pg_inherits AS i
+        JOIN pg_class AS c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY lower_bound NULLS FIRST
+        """,
+        (table,),
+    )
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall() or []]
+
+
+def _create_partition_from_default(cursor, table: str, name: str, default: str, start: datetime, end: datetime) -> int:
+    column, _ = PARTITIONED_TABLES[table]
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= %s AND {column} < %s)",
+        (start, end),
+    )
+    row = cursor.fetchone()
+    if not row or not row[0]:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+            (start, end),
+        )
+        return 0
+
+    # Postgres refuses to add a partition while the DEFAULT partition still
+    # holds rows for its range, so park those rows, create it and route them back.
+    cursor.execute(
+        """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        (table,),
+    )
+    columns = ", ".join(row[0] for row in cursor.fetchall() or [])
+    staging = f"{name}_staging"
+    cursor.execute(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {columns} FROM {default} WHERE {column} >= %s AND {column} < %s",
+        (start, end),
+    )
+    cursor.execute(f"DELETE FROM {default} WHERE {column} >= %s AND {column} < %s", (start, end))
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+        (start, end),
+    )
+    cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging}")
+    moved = cursor.rowcount or 0
+    cursor.execute(f"DROP TABLE {staging}")
+    return moved
+
+
+def ensure_table_partitions(
+    cursor,
+    table: str,
+    now: Optional[datetime] = None,
+    errors: Optional[List[str]] = None,
+) -> List[str]:
+    reference = now or datetime.now(timezone.utc)
+    all_bounds = _partition_bounds(cursor, table)
+    default = next((bound["name"] for bound in all_bounds if bound["is_default"]), None)
+    bounds = [bound for bound in all_bounds if not bound["is_default"]]
+    step = _partition_step()
+    start = _partition_start(reference)
+    horizon = reference + timedelta(days=FLEET_PARTITION_AHEAD_DAYS)
+    created: List[str] = []
+    while start <= horizon:
+        end = start + step
+        overlaps = any(
+            (bound["lower_bound"] is None or bound["lower_bound"] < end)
+            and (bound["upper_bound"] is None or bound["upper_bound"] > start)
+            for bound in bounds
+        )
+        if not overlaps:
+            name = f"{table}_p{start:%Y%m%d}"
+            cursor.execute("SAVEPOINT create_partition")
+            try:
+                if default:
+                    moved = _create_partition_from_default(cursor, table, name, default, start, end)
+                else:
+                    moved = 0
+                    cursor.execute(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                        (start, end),
+                    )
+            except Exception as exc:
+                cursor.execute("ROLLBACK TO SAVEPOINT create_partition")
+                print(f"[partitions] Could not create {name}: {exc}", flush=True)
+                if errors is not None:
+                    errors.append(f"{name}: {exc}")
+            else:
+                created.append(name)
+                if moved:
+                    print(f"[partitions] Moved {moved} row(s) from {default} into {name}", flush=True)
+            cursor.execute("RELEASE SAVEPOINT create_partition")
+        start = end
+    return created
+
+
+def _convert_to_partitioned_table(cursor, table: str, create_sql: str, now: datetime) -> None:
+    column, id_column = PARTITIONED_TABLES[table]
+    legacy = f"{table}_legacy"
+    boundary = _partition_start(now) + _partition_step()
+
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, id_column))
+    sequence_row = cursor.fetchone()
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    cursor.execute(
+        """
+        SELECT conname
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'f')
+        """,
+        (legacy,),
+    )
+    for (constraint,) in cursor.fetchall() or []:
+        cursor.execute(f'ALTER TABLE {legacy} DROP CONSTRAINT "{constraint}"')
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_index AS i
+        JOIN pg_class AS c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(%s)
+        """,
+        (legacy,),
+    )
+    for (index_name,) in cursor.fetchall() or []:
+        cursor.execute(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:55]}_legacy"')
+
+    cursor.execute(
+        """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        (legacy,),
+    )
+    columns = ", ".join(row[0] for row in cursor.fetchall() or [])
+    cursor.execute(
+        f"CREATE TEMP TABLE {table}_overflow ON COMMIT DROP AS "
+        f"SELECT {columns} FROM {legacy} WHERE {column} >= %s",
+        (boundary,),
+    )
+    cursor.execute(f"DELETE FROM {legacy} WHERE {column} >= %s", (boundary,))
+
+    cursor.execute(create_sql)
+    if sequence_row and sequence_row[0]:
+        cursor.execute(f"ALTER SEQUENCE {sequence_row[0]} OWNED BY {table}.{id_column}")
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s)",
+        (boundary,),
+    )
+    ensure_table_partitions(cursor, table, now)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+    cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_overflow")
+    print(
+        f"[partitions] Converted {table} to range partitions; existing rows kept in {legacy}",
+        flush=True,
+    )
+
+
+def _ensure_partitioned_table(cursor, table: str, create_sql: str) -> None:
+    now = datetime.now(timezone.utc)
+    _, id_column = PARTITIONED_TABLES[table]
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    if row and row[0] == "r":
+        _convert_to_partitioned_table(cursor, table, create_sql, now)
+        return
+    cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {table}_{id_column}_seq")
+    cursor.execute(create_sql)
+    if not row:
+        cursor.execute(f"ALTER SEQUENCE {table}_{id_column}_seq OWNED BY {table}.{id_column}")
+    ensure_table_partitions(cursor, table, now)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _partition_retention_days(table: str) -> int:
+    if table == "bus_sightings":
+        if not FLEET_SIGHTINGS_RETENTION_DAYS:
+            return 0
+        return max(FLEET_SIGHTINGS_RETENTION_DAYS, USUAL_ROUTES_WINDOW_DAYS)
+    if table == "bus_history":
+        return FLEET_BUS_HISTORY_RETENTION_DAYS
+    if table == "vehicle_history":
+        return FLEET_VEHICLE_HISTORY_RETENTION_DAYS
+    return 0
+
+
+def apply_partition_retention(connection, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+    reference = now or datetime.now(timezone.utc)
+    removed: Dict[str, List[str]] = {}
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            days = _partition_retention_days(table)
+            if not days:
+                continue
+            cutoff = reference - timedelta(days=days)
+            for bound in _partition_bounds(cursor, table):
+                upper = bound["upper_bound"]
+                if bound["is_default"] or upper is None or upper > cutoff:
+                    continue
+                name = bound["name"]
+                if FLEET_PARTITION_ARCHIVE_POLICY == "detach":
+                    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {FLEET_PARTITION_ARCHIVE_SCHEMA}")
+                    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                    cursor.execute(f"ALTER TABLE {name} SET SCHEMA {FLEET_PARTITION_ARCHIVE_SCHEMA}")
+                else:
+                    cursor.execute(f"DROP TABLE {name}")
+                removed.setdefault(table, []).append(name)
+            if table == "bus_sightings":
+                cursor.execute(
+                    "DELETE FROM bus_route_daily_counts WHERE day < %s",
+                    (_route_counter_day(cutoff),),
+                )
+    return removed
+
+
+def _perform_database_initialisation() -> None:
+    with get_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profile_notes (
+                    uid TEXT NOT NULL,
+                    note_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (uid, note_id)
+                );
+                """
+            )
+            cursor.execute(
                 """
                 ALTER TABLE profile_notes
                     ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ,
@@ -1071,6 +2377,97 @@ def _perform_database_initialisation() -> None:
                 ON app_collections (collection);
                 """
             )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fleet_curated (
+                    reg_key TEXT PRIMARY KEY,
+                    registration TEXT NOT NULL,
+                    fleet_number TEXT NOT NULL DEFAULT '',
+                    operator TEXT NOT NULL DEFAULT '',
+                    status TEXT NOT NULL DEFAULT '',
+                    wrap TEXT NOT NULL DEFAULT '',
+                    vehicle_type TEXT NOT NULL DEFAULT '',
+                    doors TEXT NOT NULL DEFAULT '',
+                    engine_type TEXT NOT NULL DEFAULT '',
+                    engine TEXT NOT NULL DEFAULT '',
+                    chassis TEXT NOT NULL DEFAULT '',
+                    body_type TEXT NOT NULL DEFAULT '',
+                    registration_date TEXT NOT NULL DEFAULT '',
+                    garage TEXT NOT NULL DEFAULT '',
+                    extras TEXT[] NOT NULL DEFAULT '{}',
+                    length TEXT NOT NULL DEFAULT '',
+                    new_until TIMESTAMPTZ,
+                    is_new_bus BOOLEAN NOT NULL DEFAULT FALSE,
+                    is_rare_working BOOLEAN NOT NULL DEFAULT FALSE,
+                    gallery JSONB NOT NULL DEFAULT '[]'::jsonb,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    last_updated TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                );
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_fleet_curated_new_until
+                ON fleet_curated (new_until)
+                WHERE new_until IS NOT NULL;
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fleet_pending (
+                    change_id TEXT PRIMARY KEY,
+                    reg_key TEXT NOT NULL,
+                    registration TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    submitted_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    submitted_by TEXT,
+                    data JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    images JSONB NOT NULL DEFAULT '[]'::jsonb,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                );
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_fleet_pending_reg_key
+                ON fleet_pending (reg_key);
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_fleet_pending_status_submitted
+                ON fleet_pending (status, submitted_at DESC);
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fleet_images (
+                    hash TEXT PRIMARY KEY,
+                    content_type TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    width INTEGER,
+                    height INTEGER,
+                    data BYTEA NOT NULL,
+                    thumbnail BYTEA,
+                    thumbnail_type TEXT,
+                    stored_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                );
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fleet_options (
+                    field TEXT NOT NULL,
+                    option_id TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (field, option_id)
+                );
+                """
+            )
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS operators (
@@ -1127,9 +2524,32 @@ def _perform_database_initialisation() -> None:
                 """
             )
             cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_buses_updated_at
+                ON buses (updated_at);
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_buses_new_badge_expiry
+                ON buses (new_badge_extended_until)
+                WHERE new_badge_extended_until IS NOT NULL;
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_buses_rare_badge_decay
+                ON buses (rare_badge_decay_at)
+                WHERE rare_badge_decay_at IS NOT NULL;
+                """
+            )
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('routeflow-partitions'))")
+            _ensure_partitioned_table(
+                cursor,
+                "bus_sightings",
                 """
                 CREATE TABLE IF NOT EXISTS bus_sightings (
-                    sighting_id BIGSERIAL PRIMARY KEY,
+                    sighting_id BIGINT NOT NULL DEFAULT nextval('bus_sightings_sighting_id_seq'),
                     reg TEXT NOT NULL REFERENCES buses(reg) ON DELETE CASCADE,
                     seen_at TIMESTAMPTZ NOT NULL,
                     lat DOUBLE PRECISION,
@@ -1140,9 +2560,10 @@ def _perform_database_initialisation() -> None:
                     operator_id INTEGER REFERENCES operators(operator_id),
                     raw JSONB,
                     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (sighting_id, seen_at),
                     UNIQUE (reg, seen_at)
-                );
-                """
+                ) PARTITION BY RANGE (seen_at);
+                """,
             )
             cursor.execute(
                 """
@@ -1157,16 +2578,38 @@ def _perform_database_initialisation() -> None:
                 """
             )
             cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bus_route_daily_counts (
+                    reg TEXT NOT NULL REFERENCES buses(reg) ON DELETE CASCADE,
+                    day DATE NOT NULL,
+                    route TEXT NOT NULL,
+                    sightings INTEGER NOT NULL DEFAULT 0,
+                    last_seen TIMESTAMPTZ,
+                    PRIMARY KEY (reg, day, route)
+                );
+                """
+            )
+            cursor.execute(
+                """
+                SELECT NOT EXISTS (SELECT 1 FROM bus_route_daily_counts)
+                   AND EXISTS (SELECT 1 FROM bus_sightings)
+                """
+            )
+            needs_route_counter_seed = bool(cursor.fetchone()[0])
+            _ensure_partitioned_table(
+                cursor,
+                "bus_history",
                 """
                 CREATE TABLE IF NOT EXISTS bus_history (
-                    history_id BIGSERIAL PRIMARY KEY,
+                    history_id BIGINT NOT NULL DEFAULT nextval('bus_history_history_id_seq'),
                     reg TEXT NOT NULL REFERENCES buses(reg) ON DELETE CASCADE,
                     event_type TEXT NOT NULL,
                     event_ts TIMESTAMPTZ NOT NULL DEFAULT NOW(),
                     details JSONB NOT NULL DEFAULT '{}'::jsonb,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                );
-                """
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (history_id, event_ts)
+                ) PARTITION BY RANGE (event_ts);
+                """,
             )
             cursor.execute(
                 """
@@ -1320,10 +2763,12 @@ def _perform_database_initialisation() -> None:
                 ON vehicles_active (last_seen);
                 """
             )
-            cursor.execute(
+            _ensure_partitioned_table(
+                cursor,
+                "vehicle_history",
                 """
                 CREATE TABLE IF NOT EXISTS vehicle_history (
-                    history_id BIGSERIAL PRIMARY KEY,
+                    history_id BIGINT NOT NULL DEFAULT nextval('vehicle_history_history_id_seq'),
                     ts TIMESTAMPTZ NOT NULL,
                     registration TEXT,
                     vehicle_id TEXT NOT NULL,
@@ -1339,9 +2784,10 @@ def _perform_database_initialisation() -> None:
                     estimated_time TIMESTAMPTZ,
                     expire_time TIMESTAMPTZ,
                     base_version TEXT,
-                    destination TEXT
-                );
-                """
+                    destination TEXT,
+                    PRIMARY KEY (history_id, ts)
+                ) PARTITION BY RANGE (ts);
+                """,
             )
             cursor.execute(
                 """
@@ -1355,7 +2801,28 @@ def _perform_database_initialisation() -> None:
                 ON vehicle_history (vehicle_id, ts DESC);
                 """
             )
+        if needs_route_counter_seed:
+            seeded = backfill_route_counters(
+                connection,
+                since=(datetime.now(timezone.utc) - timedelta(days=USUAL_ROUTES_WINDOW_DAYS)).date(),
+            )
+            print(f"[route-counters] Seeded {seeded} daily route buckets from bus_sightings", flush=True)
+        migrated = migrate_fleet_collections(connection)
+        if any(migrated.values()):
+            print(
+                "[fleet] Moved legacy app_collections rows to typed tables: "
+                + ", ".join(f"{count} {name}" for name, count in migrated.items()),
+                flush=True,
+            )
+        migrated_images = migrate_fleet_images(connection)
+        if any(migrated_images.values()):
+            print(
+                "[fleet-images] Moved inline images to fleet_images: "
+                + ", ".join(f"{count} {name}" for name, count in migrated_images.items()),
+                flush=True,
+            )
         connection.commit()
+        operator_cache.load(connection)
 
     seed_default_fleet()
 
@@ -1465,6 +2932,74 @@ def sanitise_image_entry(
     if not isinstance(entry, dict):
         return None
 
+    image_hash = _fleet_image_reference(entry)
+    if image_hash:
+        content_type = normalise_text(entry.get("contentType")) or "application/octet-stream"
+        try:
+            size = max(int(entry.get("size") or 0), 0)
+        except (TypeError, ValueError):
+            size = 0
+        binary = None
+    else:
+        content_type, binary = _decode_image_data_url(entry)
+        if binary is None:
+            return None
+        image_hash = hashlib.sha256(binary).hexdigest()
+        size = len(binary)
+
+    image_id = normalise_text(entry.get("id")) or uuid.uuid4().hex
+    name = normalise_text(entry.get("name")) or f"image-{image_id}"
+    status_value = normalise_text(entry.get("status")) or status or "pending"
+
+    submitted_at = (
+        normalise_datetime(entry.get("submittedAt") or entry.get("createdAt"))
+        or iso_now()
+    )
+
+    submitted_by_value = submitted_by or normalise_text(
+        entry.get("submittedBy") or entry.get("submitted_by")
+    )
+
+    payload: Dict[str, Any] = {
+        "id": image_id,
+        "name": name,
+        "contentType": content_type,
+        "size": size,
+        "hash": image_hash,
+        "url": f"{FLEET_IMAGE_URL_PREFIX}{image_hash}",
+        "thumbnailUrl": f"{FLEET_IMAGE_URL_PREFIX}{image_hash}/thumbnail",
+        "status": status_value.lower(),
+        "submittedAt": submitted_at,
+    }
+    if binary is not None:
+        payload["_binary"] = binary
+
+    if submitted_by_value:
+        payload["submittedBy"] = submitted_by_value
+
+    approved_at = normalise_datetime(entry.get("approvedAt") or entry.get("reviewedAt"))
+    if status_value.lower() == "approved":
+        payload["status"] = "approved"
+        payload["approvedAt"] = approved_at or iso_now()
+        approved_by = normalise_text(entry.get("approvedBy") or entry.get("reviewedBy"))
+        if approved_by:
+            payload["approvedBy"] = approved_by
+    elif approved_at:
+        payload["approvedAt"] = approved_at
+
+    return payload
+
+
+def _fleet_image_reference(entry: Dict[str, Any]) -> str:
+    candidate = normalise_text(entry.get("hash")).lower()
+    if not candidate:
+        path = urlparse(normalise_text(entry.get("url"))).path
+        if FLEET_IMAGE_URL_PREFIX in path:
+            candidate = path.split(FLEET_IMAGE_URL_PREFIX, 1)[1].split("/", 1)[0].lower()
+    return candidate if FLEET_IMAGE_HASH_PATTERN.fullmatch(candidate) else ""
+
+
+def _decode_image_data_url(entry: Dict[str, Any]) -> Tuple[str, Optional[bytes]]:
     data_url = normalise_text(
         entry.get("dataUrl")
         or entry.get("dataURL")
@@ -1472,7 +3007,7 @@ def sanitise_image_entry(
         or entry.get("source")
     )
     if not data_url:
-        return None
+        return "", None
 
     if "," not in data_url:
         raise ApiError("Image data must be a base64 data URL.", status_code=400)
@@ -1506,47 +3041,7 @@ def sanitise_image_entry(
             status_code=400,
         )
 
-    sanitized_data_url = (
-        f"data:{content_type};base64,{base64.b64encode(binary).decode('ascii')}"
-    )
-
-    image_id = normalise_text(entry.get("id")) or uuid.uuid4().hex
-    name = normalise_text(entry.get("name")) or f"image-{image_id}"
-    status_value = normalise_text(entry.get("status")) or status or "pending"
-
-    submitted_at = (
-        normalise_datetime(entry.get("submittedAt") or entry.get("createdAt"))
-        or iso_now()
-    )
-
-    submitted_by_value = submitted_by or normalise_text(
-        entry.get("submittedBy") or entry.get("submitted_by")
-    )
-
-    payload: Dict[str, Any] = {
-        "id": image_id,
-        "name": name,
-        "contentType": content_type,
-        "size": len(binary),
-        "dataUrl": sanitized_data_url,
-        "status": status_value.lower(),
-        "submittedAt": submitted_at,
-    }
-
-    if submitted_by_value:
-        payload["submittedBy"] = submitted_by_value
-
-    approved_at = normalise_datetime(entry.get("approvedAt") or entry.get("reviewedAt"))
-    if status_value.lower() == "approved":
-        payload["status"] = "approved"
-        payload["approvedAt"] = approved_at or iso_now()
-        approved_by = normalise_text(entry.get("approvedBy") or entry.get("reviewedBy"))
-        if approved_by:
-            payload["approvedBy"] = approved_by
-    elif approved_at:
-        payload["approvedAt"] = approved_at
-
-    return payload
+    return content_type, binary
 
 
 def sanitise_gallery(
@@ -1563,6 +3058,7 @@ def sanitise_gallery(
         entries = [entries]
 
     cleaned: List[Dict[str, Any]] = []
+    seen_hashes: Set[str] = set()
     for entry in entries:
         entry_status = ""
         if isinstance(entry, dict):
@@ -1573,8 +3069,13 @@ def sanitise_gallery(
             status=target_status,
             submitted_by=submitted_by,
         )
-        if not sanitized:
+        if not sanitized or sanitized["hash"] in seen_hashes:
             continue
+        seen_hashes.add(sanitized["hash"])
+        if "_binary" in sanitized:
+            # Decode and thumbnail here, before callers such as fleet_submit
+            # take a pooled connection.
+            sanitized["_image"] = _fleet_image_thumbnail(sanitized["_binary"])
         cleaned.append(sanitized)
         if limit and len(cleaned) >= limit:
             break
@@ -1590,116 +3091,434 @@ def merge_gallery_entries(
 ) -> List[Dict[str, Any]]:
     merged: List[Dict[str, Any]] = []
     seen: Set[str] = set()
+    seen_hashes: Set[str] = set()
 
-    for source in existing or []:
+    for source in [*(existing or []), *(additions or [])]:
         if not isinstance(source, dict):
             continue
         identifier = normalise_text(source.get("id")) or uuid.uuid4().hex
-        if identifier in seen:
+        image_hash = normalise_text(source.get("hash"))
+        if identifier in seen or (image_hash and image_hash in seen_hashes):
             continue
         seen.add(identifier)
+        if image_hash:
+            seen_hashes.add(image_hash)
         merged.append(dict(source))
 
-    for addition in additions or []:
-        if not isinstance(addition, dict):
-            continue
-        identifier = normalise_text(addition.get("id")) or uuid.uuid4().hex
-        if identifier in seen:
-            continue
-        seen.add(identifier)
-        merged.append(dict(addition))
-
     if limit and len(merged) > limit:
         merged = merged[-limit:]
 
     return merged
 
 
-def slugify(value: Any) -> str:
-    text = normalise_text(value)
-    if not text:
-        return ""
-    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
-    return slug or ""
+def _fleet_image_thumbnail(
+    binary: bytes,
+) -> Tuple[Optional[str], Optional[int], Optional[int], Optional[bytes], Optional[str]]:
+    if PILImage is None:
+        return None, None, None, None, None
+    try:
+        image = PILImage.open(io.BytesIO(binary))
+    except Exception as exc:
+        print(f"[fleet-images] Could not read image: {exc}", flush=True)
+        return None, None, None, None, None
+    # open() only reads the header, so the size is checked before any pixel
+    # data is decoded; a small compressed file can expand to gigabytes.
+    width, height = image.size
+    if width * height > FLEET_IMAGE_MAX_PIXELS:
+        image.close()
+        raise ApiError(
+            f"Images must be at most {FLEET_IMAGE_MAX_PIXELS / 1_000_000:g} megapixels.",
+            status_code=400,
+        )
+    try:
+        with image:
+            content_type = PILImage.MIME.get(image.format or "")
+            if max(width, height) <= FLEET_IMAGE_THUMBNAIL_SIZE:
+                return content_type, width, height, None, None
+            image.draft("RGB", (FLEET_IMAGE_THUMBNAIL_SIZE, FLEET_IMAGE_THUMBNAIL_SIZE))
+            thumbnail = ImageOps.exif_transpose(image)
+            thumbnail.thumbnail((FLEET_IMAGE_THUMBNAIL_SIZE, FLEET_IMAGE_THUMBNAIL_SIZE))
+            output = io.BytesIO()
+            if thumbnail.mode in {"RGBA", "LA", "P"}:
+                thumbnail.save(output, format="PNG", optimize=True)
+                thumbnail_type = "image/png"
+            else:
+                thumbnail.convert("RGB").save(output, format="JPEG", quality=80, optimize=True)
+                thumbnail_type = "image/jpeg"
+    except Exception as exc:
+        print(f"[fleet-images] Could not generate thumbnail: {exc}", flush=True)
+        return None, None, None, None, None
+    return content_type, width, height, output.getvalue(), thumbnail_type
 
 
-def operator_slug_from_name(name: str) -> str:
-    slug = slugify(name)
-    if slug:
-        return slug
-    return uuid.uuid4().hex
+def store_fleet_images(connection, entries: Iterable[Dict[str, Any]]) -> int:
+    uploads: Dict[str, Tuple[str, bytes, Optional[Tuple[Any, ...]]]] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        binary = entry.pop("_binary", None)
+        prepared = entry.pop("_image", None)
+        if binary is not None:
+            uploads.setdefault(entry["hash"], (entry.get("contentType") or "", binary, prepared))
+    if not uploads:
+        return 0
 
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE fleet_images SET stored_at = NOW()
+            WHERE hash = ANY(%s)
+            RETURNING hash
+            """,
+            (list(uploads),),
+        )
+        existing = {row[0] for row in cursor.fetchall() or []}
+        rows = []
+        for image_hash, (declared_type, binary, prepared) in uploads.items():
+            if image_hash in existing:
+                continue
+            content_type, width, height, thumbnail, thumbnail_type = prepared or _fleet_image_thumbnail(binary)
+            rows.append(
+                (
+                    image_hash,
+                    content_type or declared_type or "application/octet-stream",
+                    len(binary),
+                    width,
+                    height,
+                    psycopg2.Binary(binary),
+                    psycopg2.Binary(thumbnail) if thumbnail is not None else None,
+                    thumbnail_type,
+                )
+            )
+        if rows:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO fleet_images (
+                    hash, content_type, size, width, height, data, thumbnail, thumbnail_type
+                )
+                VALUES %s
+                ON CONFLICT (hash) DO UPDATE SET stored_at = NOW()
+                """,
+                rows,
+            )
+    return len(rows)
 
-def normalise_operator_name(value: Any) -> str:
-    text = normalise_text(value)
-    if not text:
-        return ""
-    return re.sub(r"\s+", " ", text)
 
+def missing_fleet_images(connection, entries: Iterable[Dict[str, Any]]) -> Set[str]:
+    referenced = {
+        entry["hash"]
+        for entry in entries
+        if isinstance(entry, dict) and entry.get("hash") and "_binary" not in entry
+    }
+    if not referenced:
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT hash FROM fleet_images WHERE hash = ANY(%s)", (list(referenced),))
+        stored = {row[0] for row in cursor.fetchall() or []}
+    return referenced - stored
 
-def ensure_operator(connection, name: Any, short_name: Optional[str] = None) -> Optional[int]:
-    operator_name = normalise_operator_name(name)
-    if not operator_name:
-        return None
-    slug = operator_slug_from_name(operator_name)
-    short = normalise_text(short_name) or None
 
-    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+def fetch_fleet_image(connection, image_hash: str, *, thumbnail: bool = False) -> Optional[Tuple[str, bytes]]:
+    with connection.cursor() as cursor:
         cursor.execute(
             """
-            SELECT operator_id, short_name
-            FROM operators
-            WHERE lower(name) = lower(%s)
-            LIMIT 1
+            SELECT
+                CASE WHEN %s AND thumbnail IS NOT NULL THEN thumbnail_type ELSE content_type END,
+                CASE WHEN %s AND thumbnail IS NOT NULL THEN thumbnail ELSE data END
+            FROM fleet_images
+            WHERE hash = %s
             """,
-            (operator_name,),
+            (thumbnail, thumbnail, image_hash),
         )
         row = cursor.fetchone()
-        if row:
-            operator_id = row.get("operator_id")
-            if operator_id and short and not normalise_text(row.get("short_name")):
-                cursor.execute(
-                    """
-                    UPDATE operators
-                    SET short_name = %s,
-                        updated_at = NOW()
-                    WHERE operator_id = %s
-                    """,
-                    (short, operator_id),
-                )
-            return operator_id
+    if not row:
+        return None
+    return row[0], bytes(row[1])
 
+
+def prune_fleet_images(connection, now: Optional[datetime] = None) -> int:
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=FLEET_IMAGE_ORPHAN_GRACE_HOURS)
+    with connection.cursor() as cursor:
         cursor.execute(
             """
-            INSERT INTO operators (slug, name, short_name)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (slug) DO UPDATE SET
-                name = EXCLUDED.name,
-                short_name = COALESCE(EXCLUDED.short_name, operators.short_name),
-                updated_at = NOW()
-            RETURNING operator_id
+            DELETE FROM fleet_images AS image
+            WHERE image.stored_at < %s
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM fleet_curated, jsonb_array_elements(fleet_curated.gallery) AS entry
+                  WHERE entry->>'hash' = image.hash
+              )
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM fleet_pending, jsonb_array_elements(fleet_pending.images) AS entry
+                  WHERE entry->>'hash' = image.hash
+              )
             """,
-            (slug, operator_name, short),
+            (cutoff,),
         )
-        created = cursor.fetchone()
-    if created:
-        return created.get("operator_id")
-    return None
+        return cursor.rowcount
 
 
-def fetch_operator_by_id(connection, operator_id: Optional[int]) -> Optional[Dict[str, Any]]:
-    if not operator_id:
-        return None
+def slugify(value: Any) -> str:
+    text = normalise_text(value)
+    if not text:
+        return ""
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug or ""
+
+
+def operator_slug_from_name(name: str) -> str:
+    slug = slugify(name)
+    if slug:
+        return slug
+    return uuid.uuid4().hex
+
+
+def normalise_operator_name(value: Any) -> str:
+    text = normalise_text(value)
+    if not text:
+        return ""
+    return re.sub(r"\s+", " ", text)
+
+
+_OPERATOR_COLUMNS = "operator_id, slug, name, short_name, created_at, updated_at"
+
+
+def _collect_operator_requests(
+    entries: Iterable[Tuple[Any, Optional[str]]],
+) -> Dict[str, Tuple[str, Optional[str]]]:
+    requested: Dict[str, Tuple[str, Optional[str]]] = {}
+    for name, short_name in entries:
+        operator_name = normalise_operator_name(name)
+        if not operator_name:
+            continue
+        key = operator_name.lower()
+        short = normalise_text(short_name) or None
+        current = requested.get(key)
+        if current is None or (short and not current[1]):
+            requested[key] = (operator_name, short)
+    return requested
+
+
+def _upsert_operators(
+    connection,
+    requested: Dict[str, Tuple[str, Optional[str]]],
+) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    resolved: Dict[str, int] = {}
+    rows: List[Dict[str, Any]] = []
     with connection.cursor(cursor_factory=RealDictCursor) as cursor:
         cursor.execute(
-            """
-            SELECT operator_id, slug, name, short_name, created_at, updated_at
+            f"""
+            SELECT {_OPERATOR_COLUMNS}, lower(name) AS name_key
             FROM operators
-            WHERE operator_id = %s
+            WHERE lower(name) = ANY(%s)
             """,
-            (operator_id,),
+            (list(requested.keys()),),
         )
-        return cursor.fetchone()
+        short_name_backfill: List[Tuple[int, str]] = []
+        for row in cursor.fetchall() or []:
+            key = row.pop("name_key", None)
+            operator_id = row.get("operator_id")
+            if key not in requested or not operator_id:
+                continue
+            resolved[key] = operator_id
+            short = requested[key][1]
+            if short and not normalise_text(row.get("short_name")):
+                short_name_backfill.append((operator_id, short))
+            else:
+                rows.append(row)
+
+        if short_name_backfill:
+            updated = execute_values(
+                cursor,
+                f"""
+                UPDATE operators AS o
+                SET short_name = v.short_name,
+                    updated_at = NOW()
+                FROM (VALUES %s) AS v(operator_id, short_name)
+                WHERE o.operator_id = v.operator_id
+                RETURNING {", ".join("o." + column for column in _OPERATOR_COLUMNS.split(", "))}
+                """,
+                short_name_backfill,
+                fetch=True,
+            )
+            rows.extend(updated or [])
+
+        missing: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        keys_by_slug: Dict[str, List[str]] = defaultdict(list)
+        for key, (operator_name, short) in requested.items():
+            if key in resolved:
+                continue
+            slug = operator_slug_from_name(operator_name)
+            keys_by_slug[slug].append(key)
+            missing.setdefault(slug, (slug, operator_name, short))
+
+        if missing:
+            created = execute_values(
+                cursor,
+                f"""
+                INSERT INTO operators (slug, name, short_name)
+                VALUES %s
+                ON CONFLICT (slug) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    short_name = COALESCE(EXCLUDED.short_name, operators.short_name),
+                    updated_at = NOW()
+                RETURNING {_OPERATOR_COLUMNS}
+                """,
+                list(missing.values()),
+                page_size=max(len(missing), 1),
+                fetch=True,
+            )
+            for row in created or []:
+                rows.append(row)
+                for key in keys_by_slug.get(row.get("slug"), []):
+                    resolved[key] = row.get("operator_id")
+
+    return resolved, rows
+
+
+class OperatorCache:
+    def __init__(self, *, ttl_seconds: int = OPERATOR_CACHE_TTL_SECONDS) -> None:
+        self._ttl_seconds = max(ttl_seconds, 0)
+        self._lock = threading.Lock()
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._ids_by_name: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+
+    def _store_locked(self, row: Dict[str, Any]) -> None:
+        operator_id = row.get("operator_id")
+        if not operator_id:
+            return
+        self._rows[operator_id] = dict(row)
+        name = normalise_operator_name(row.get("name"))
+        if name:
+            self._ids_by_name[name.lower()] = operator_id
+
+    def _ensure_loaded(self, connection) -> None:
+        with self._lock:
+            loaded_at = self._loaded_at
+        if loaded_at is not None and (
+            not self._ttl_seconds or time.monotonic() - loaded_at < self._ttl_seconds
+        ):
+            return
+        self.load(connection)
+
+    def load(self, connection) -> int:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"SELECT {_OPERATOR_COLUMNS} FROM operators")
+            rows = cursor.fetchall() or []
+        with self._lock:
+            self._rows = {}
+            self._ids_by_name = {}
+            for row in rows:
+                self._store_locked(row)
+            self._loaded_at = time.monotonic()
+            self._stats["loads"] += 1
+        return len(rows)
+
+    def invalidate(self, operator_id: Optional[int] = None) -> None:
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if operator_id is None:
+                self._rows = {}
+                self._ids_by_name = {}
+                self._loaded_at = None
+                return
+            self._rows.pop(operator_id, None)
+            self._ids_by_name = {
+                key: value for key, value in self._ids_by_name.items() if value != operator_id
+            }
+
+    def resolve(
+        self,
+        connection,
+        entries: Iterable[Tuple[Any, Optional[str]]],
+    ) -> Dict[str, int]:
+        requested = _collect_operator_requests(entries)
+        if not requested:
+            return {}
+        self._ensure_loaded(connection)
+
+        resolved: Dict[str, int] = {}
+        pending: Dict[str, Tuple[str, Optional[str]]] = {}
+        with self._lock:
+            for key, (operator_name, short) in requested.items():
+                operator_id = self._ids_by_name.get(key)
+                row = self._rows.get(operator_id) if operator_id else None
+                if row and (not short or normalise_text(row.get("short_name"))):
+                    resolved[key] = operator_id
+                    self._stats["hits"] += 1
+                else:
+                    pending[key] = (operator_name, short)
+                    self._stats["misses"] += 1
+
+        if pending:
+            created, rows = _upsert_operators(connection, pending)
+            with self._lock:
+                for row in rows:
+                    self._store_locked(row)
+                self._ids_by_name.update(created)
+            resolved.update(created)
+        return resolved
+
+    def get(self, connection, operator_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        if not operator_id:
+            return None
+        self._ensure_loaded(connection)
+        with self._lock:
+            row = self._rows.get(operator_id)
+            if row:
+                self._stats["hits"] += 1
+                return dict(row)
+            self._stats["misses"] += 1
+
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                f"""
+                SELECT {_OPERATOR_COLUMNS}
+                FROM operators
+                WHERE operator_id = %s
+                """,
+                (operator_id,),
+            )
+            row = cursor.fetchone()
+        if row:
+            with self._lock:
+                self._store_locked(row)
+        return row
+
+    def rows(self, connection) -> List[Dict[str, Any]]:
+        self._ensure_loaded(connection)
+        with self._lock:
+            rows = [dict(row) for row in self._rows.values()]
+        return sorted(rows, key=lambda row: normalise_text(row.get("name")).lower())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._rows)}
+
+
+operator_cache = OperatorCache(ttl_seconds=OPERATOR_CACHE_TTL_SECONDS)
+
+
+def ensure_operator(connection, name: Any, short_name: Optional[str] = None) -> Optional[int]:
+    operator_name = normalise_operator_name(name)
+    if not operator_name:
+        return None
+    return ensure_operators(connection, [(operator_name, short_name)]).get(operator_name.lower())
+
+
+def ensure_operators(
+    connection,
+    entries: Iterable[Tuple[Any, Optional[str]]],
+) -> Dict[str, int]:
+    return operator_cache.resolve(connection, entries)
+
+
+def fetch_operator_by_id(connection, operator_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    return operator_cache.get(connection, operator_id)
 
 
 def serialise_operator(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
@@ -1772,6 +3591,23 @@ def fetch_bus_row(connection, reg: Any) -> Optional[Dict[str, Any]]:
         return cursor.fetchone()
 
 
+def fetch_bus_rows(connection, regs: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    reg_keys = sorted({normalise_reg_key(reg) for reg in regs} - {""})
+    if not reg_keys:
+        return {}
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            SELECT *
+            FROM buses
+            WHERE reg = ANY(%s)
+            """,
+            (reg_keys,),
+        )
+        rows = cursor.fetchall() or []
+    return {row["reg"]: row for row in rows}
+
+
 def coerce_float(value: Any) -> Optional[float]:
     if value in (None, ""):
         return None
@@ -1801,14 +3637,58 @@ def haversine_distance_metres(
     return EARTH_RADIUS_METRES * c
 
 
-def create_bus_profile(
-    connection,
+_BUS_PROFILE_INSERT_SQL = """
+    INSERT INTO buses (
+        reg,
+        registration,
+        vehicle_id,
+        fleet_number,
+        operator_id,
+        home_operator_id,
+        status,
+        vehicle_type,
+        wrap,
+        first_seen,
+        last_seen,
+        current_route,
+        last_route_update,
+        usual_routes,
+        badges,
+        badge_overrides,
+        new_badge_reactivated_at,
+        new_badge_extended_until,
+        rare_score
+    )
+    VALUES {values}
+    ON CONFLICT (reg) DO UPDATE SET
+        registration = EXCLUDED.registration,
+        vehicle_id = COALESCE(EXCLUDED.vehicle_id, buses.vehicle_id),
+        fleet_number = COALESCE(EXCLUDED.fleet_number, buses.fleet_number),
+        operator_id = COALESCE(EXCLUDED.operator_id, buses.operator_id),
+        home_operator_id = COALESCE(buses.home_operator_id, EXCLUDED.home_operator_id),
+        status = COALESCE(EXCLUDED.status, buses.status),
+        vehicle_type = COALESCE(EXCLUDED.vehicle_type, buses.vehicle_type),
+        wrap = COALESCE(EXCLUDED.wrap, buses.wrap),
+        first_seen = LEAST(buses.first_seen, EXCLUDED.first_seen),
+        last_seen = GREATEST(buses.last_seen, EXCLUDED.last_seen),
+        current_route = COALESCE(EXCLUDED.current_route, buses.current_route),
+        last_route_update = COALESCE(EXCLUDED.last_route_update, buses.last_route_update),
+        updated_at = NOW()
+    RETURNING *
+"""
+
+_BUS_PROFILE_VALUES_TEMPLATE = (
+    "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, '{}'::jsonb, %s, %s, %s)"
+)
+
+
+def _bus_profile_values(
     reg_key: str,
     registration: str,
     seen_at: datetime,
     payload: Dict[str, Any],
     operator_id: Optional[int],
-) -> Dict[str, Any]:
+) -> Tuple[Any, ...]:
     vehicle_id = normalise_text(payload.get("vehicleId") or payload.get("vehicle_id")) or None
     fleet_number = normalise_text(payload.get("fleetNumber") or payload.get("fleet_number")) or None
     status = normalise_status(payload.get("status")) or "Active"
@@ -1817,77 +3697,62 @@ def create_bus_profile(
     route = normalise_text(payload.get("route")) or None
     new_reactivation_at = seen_at
     new_extended_until = seen_at + timedelta(days=NEW_BUS_AUTO_EXPIRE_DAYS)
+    return (
+        reg_key,
+        registration,
+        vehicle_id,
+        fleet_number,
+        operator_id,
+        operator_id,
+        status,
+        vehicle_type,
+        wrap,
+        seen_at,
+        seen_at,
+        route,
+        seen_at if route else None,
+        Json({}),
+        Json([]),
+        new_reactivation_at,
+        new_extended_until,
+        Json({}),
+    )
+
 
+def create_bus_profile(
+    connection,
+    reg_key: str,
+    registration: str,
+    seen_at: datetime,
+    payload: Dict[str, Any],
+    operator_id: Optional[int],
+) -> Dict[str, Any]:
     with connection.cursor(cursor_factory=RealDictCursor) as cursor:
         cursor.execute(
-            """
-            INSERT INTO buses (
-                reg,
-                registration,
-                vehicle_id,
-                fleet_number,
-                operator_id,
-                home_operator_id,
-                status,
-                vehicle_type,
-                wrap,
-                first_seen,
-                last_seen,
-                current_route,
-                last_route_update,
-                usual_routes,
-                badges,
-                badge_overrides,
-                new_badge_reactivated_at,
-                new_badge_extended_until,
-                rare_score
-            )
-            VALUES (
-                %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, '{}'::jsonb,
-                %s, %s, %s
-            )
-            ON CONFLICT (reg) DO UPDATE SET
-                registration = EXCLUDED.registration,
-                vehicle_id = COALESCE(EXCLUDED.vehicle_id, buses.vehicle_id),
-                fleet_number = COALESCE(EXCLUDED.fleet_number, buses.fleet_number),
-                operator_id = COALESCE(EXCLUDED.operator_id, buses.operator_id),
-                home_operator_id = COALESCE(buses.home_operator_id, EXCLUDED.home_operator_id),
-                status = COALESCE(EXCLUDED.status, buses.status),
-                vehicle_type = COALESCE(EXCLUDED.vehicle_type, buses.vehicle_type),
-                wrap = COALESCE(EXCLUDED.wrap, buses.wrap),
-                first_seen = LEAST(buses.first_seen, EXCLUDED.first_seen),
-                last_seen = GREATEST(buses.last_seen, EXCLUDED.last_seen),
-                current_route = COALES(EXCLUDED.current_route, buses.current_route),
-                last_route_update = COALES(EXCLUDED.last_route_update, buses.last_route_update),
-                updated_at = NOW()
-            RETURNING *
-            """,
-            (
-                reg_key,
-                registration,
-                vehicle_id,
-                fleet_number,
-                operator_id,
-                operator_id,
-                status,
-                vehicle_type,
-                wrap,
-                seen_at,
-                seen_at,
-                route,
-                seen_at if route else None,
-                Json({}),
-                Json([]),
-                new_reactivation_at,
-                new_extended_until,
-                Json({}),
-            ),
+            _BUS_PROFILE_INSERT_SQL.format(values=_BUS_PROFILE_VALUES_TEMPLATE),
+            _bus_profile_values(reg_key, registration, seen_at, payload, operator_id),
         )
         return cursor.fetchone() or {}
 
 
+def create_bus_profiles(
+    connection,
+    entries: Sequence[Tuple[str, str, datetime, Dict[str, Any], Optional[int]]],
+) -> Dict[str, Dict[str, Any]]:
+    if not entries:
+        return {}
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        rows = execute_values(
+            cursor,
+            _BUS_PROFILE_INSERT_SQL.format(values="%s"),
+            [_bus_profile_values(*entry) for entry in entries],
+            template=_BUS_PROFILE_VALUES_TEMPLATE,
+            page_size=max(len(entries), 1),
+            fetch=True,
+        )
+    return {row["reg"]: row for row in rows or [] if row.get("reg")}
+
+
 def update_bus_record(
     connection,
     reg_key: str,
@@ -1911,6 +3776,77 @@ def update_bus_record(
         return cursor.fetchone()
 
 
+_BUS_UPDATE_COLUMN_TYPES: Dict[str, str] = {
+    "registration": "text",
+    "vehicle_id": "text",
+    "fleet_number": "text",
+    "operator_id": "integer",
+    "home_operator_id": "integer",
+    "status": "text",
+    "vehicle_type": "text",
+    "wrap": "text",
+    "last_seen": "timestamptz",
+    "current_route": "text",
+    "last_route_update": "timestamptz",
+    "usual_routes": "jsonb",
+    "badges": "jsonb",
+    "rare_score": "jsonb",
+    "new_badge_reactivated_at": "timestamptz",
+    "new_badge_extended_until": "timestamptz",
+    "rare_badge_started_at": "timestamptz",
+    "rare_badge_last_seen_at": "timestamptz",
+    "rare_badge_decay_at": "timestamptz",
+}
+
+
+def update_bus_records(
+    connection,
+    updates_by_reg: Dict[str, Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    groups: Dict[Tuple[str, ...], List[str]] = defaultdict(list)
+    for reg_key, updates in updates_by_reg.items():
+        groups[tuple(sorted(updates))].append(reg_key)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for columns, reg_keys in groups.items():
+        if not columns:
+            continue
+        if any(column not in _BUS_UPDATE_COLUMN_TYPES for column in columns):
+            for reg_key in reg_keys:
+                row = update_bus_record(connection, reg_key, updates_by_reg[reg_key])
+                if row:
+                    results[reg_key] = row
+            continue
+        assignments = ", ".join(f"{column} = v.{column}" for column in columns)
+        template = "(%s::text, " + ", ".join(
+            f"%s::{_BUS_UPDATE_COLUMN_TYPES[column]}" for column in columns
+        ) + ")"
+        sql = (
+            f"UPDATE buses AS b SET {assignments}, updated_at = NOW() "
+            f"FROM (VALUES %s) AS v(reg, {', '.join(columns)}) "
+            "WHERE b.reg = v.reg RETURNING b.*"
+        )
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            rows = execute_values(
+                cursor,
+                sql,
+                [
+                    (reg_key, *[updates_by_reg[reg_key][column] for column in columns])
+                    for reg_key in reg_keys
+                ],
+                template=template,
+                page_size=max(len(reg_keys), 1),
+                fetch=True,
+            )
+        for row in rows or []:
+            results[row["reg"]] = row
+
+    missing = [reg_key for reg_key in updates_by_reg if reg_key not in results]
+    if missing:
+        results.update(fetch_bus_rows(connection, missing))
+    return results
+
+
 def record_bus_history(
     connection,
     reg_key: str,
@@ -1930,13 +3866,114 @@ def record_bus_history(
         )
 
 
-def upsert_bus_sighting(
+def record_bus_history_batch(
+    connection,
+    rows: Sequence[Tuple[str, str, Optional[Dict[str, Any]], Optional[datetime]]],
+) -> None:
+    if not rows:
+        return
+    default_ts = datetime.now(timezone.utc)
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor,
+            """
+            INSERT INTO bus_history (reg, event_type, event_ts, details)
+            VALUES %s
+            """,
+            [
+                (reg_key, event_type, event_ts or default_ts, Json(details or {}))
+                for reg_key, event_type, details, event_ts in rows
+            ],
+            page_size=max(len(rows), 1),
+        )
+
+
+def _copy_text_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, Json):
+        text = value.dumps(value.adapted)
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value)
+    elif isinstance(value, bool):
+        text = "t" if value else "f"
+    elif isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    else:
+        text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(
     connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write("\t".join(_copy_text_value(value) for value in row))
+        buffer.write("\n")
+        count += 1
+    if not count:
+        return 0
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+
+_BUS_SIGHTING_COLUMNS: Tuple[str, ...] = (
+    "reg",
+    "seen_at",
+    "lat",
+    "lon",
+    "route",
+    "stop_code",
+    "destination",
+    "operator_id",
+    "raw",
+)
+
+_BUS_SIGHTING_CONFLICT_SQL = """
+    ON CONFLICT (reg, seen_at) DO UPDATE SET
+        lat = EXCLUDED.lat,
+        lon = EXCLUDED.lon,
+        route = EXCLUDED.route,
+        stop_code = EXCLUDED.stop_code,
+        destination = EXCLUDED.destination,
+        operator_id = EXCLUDED.operator_id,
+        raw = EXCLUDED.raw
+    RETURNING sighting_id, reg, seen_at, lat, lon, route, stop_code, destination, operator_id, created_at,
+        created_at = NOW() AS inserted
+"""
+
+_BUS_SIGHTING_UPSERT_SQL = (
+    f"INSERT INTO bus_sightings ({', '.join(_BUS_SIGHTING_COLUMNS)}) VALUES %s"
+    + _BUS_SIGHTING_CONFLICT_SQL
+)
+
+_BUS_SIGHTING_MERGE_SQL = (
+    f"INSERT INTO bus_sightings ({', '.join(_BUS_SIGHTING_COLUMNS)}) "
+    f"SELECT {', '.join(_BUS_SIGHTING_COLUMNS)} FROM bus_sightings_staging"
+    + _BUS_SIGHTING_CONFLICT_SQL
+)
+
+_BUS_SIGHTING_VALUES_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+
+def _bus_sighting_values(
     reg_key: str,
     seen_at: datetime,
     payload: Dict[str, Any],
     operator_id: Optional[int],
-) -> Optional[Dict[str, Any]]:
+) -> Tuple:
     lat = coerce_float(
         payload.get("lat")
         or payload.get("latitude")
@@ -1965,68 +4002,360 @@ def upsert_bus_sighting(
         or payload.get("destinationName")
         or payload.get("headsign")
     )
+    return (
+        reg_key,
+        seen_at,
+        lat,
+        lon,
+        route or None,
+        stop_code or None,
+        destination or None,
+        operator_id,
+        Json(payload),
+    )
 
-    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
-        cursor.execute(
-            """
-            INSERT INTO bus_sightings (
-                reg,
-                seen_at,
-                lat,
-                lon,
-                route,
-                stop_code,
-                destination,
-                operator_id,
-                raw
+
+def upsert_bus_sighting(
+    connection,
+    reg_key: str,
+    seen_at: datetime,
+    payload: Dict[str, Any],
+    operator_id: Optional[int],
+) -> Optional[Dict[str, Any]]:
+    rows = upsert_bus_sightings(connection, [(reg_key, seen_at, payload, operator_id)])
+    return next(iter(rows.values()), None)
+
+
+def upsert_bus_sightings(
+    connection,
+    entries: Sequence[Tuple[str, datetime, Dict[str, Any], Optional[int]]],
+) -> Dict[Tuple[str, datetime], Dict[str, Any]]:
+    # ON CONFLICT cannot touch the same row twice in one statement, so the
+    # last payload for a (reg, seen_at) pair wins, as it would sequentially.
+    deduped: Dict[Tuple[str, datetime], Tuple] = {}
+    for reg_key, seen_at, payload, operator_id in entries:
+        deduped[(reg_key, seen_at)] = _bus_sighting_values(reg_key, seen_at, payload, operator_id)
+    if not deduped:
+        return {}
+    if len(deduped) >= FLEET_COPY_MIN_ROWS:
+        previous, rows = _merge_bus_sightings_via_copy(connection, list(deduped.values()))
+    else:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            previous = execute_values(
+                cursor,
+                """
+                SELECT s.reg, s.seen_at, s.route
+                FROM bus_sightings AS s
+                JOIN (VALUES %s) AS v(reg, seen_at)
+                  ON s.reg = v.reg AND s.seen_at = v.seen_at
+                FOR UPDATE OF s
+                """,
+                list(deduped.keys()),
+                template="(%s::text, %s::timestamptz)",
+                page_size=max(len(deduped), 1),
+                fetch=True,
+            )
+            rows = execute_values(
+                cursor,
+                _BUS_SIGHTING_UPSERT_SQL,
+                list(deduped.values()),
+                template=_BUS_SIGHTING_VALUES_TEMPLATE,
+                page_size=max(len(deduped), 1),
+                fetch=True,
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (reg, seen_at) DO UPDATE SET
-                lat = EXCLUDED.lat,
-                lon = EXCLUDED.lon,
-                route = EXCLUDED.route,
-                stop_code = EXCLUDED.stop_code,
-                destination = EXCLUDED.destination,
-                operator_id = EXCLUDED.operator_id,
-                raw = EXCLUDED.raw
-            RETURNING sighting_id, reg, seen_at, lat, lon, route, stop_code, destination, operator_id, created_at
+
+    # Existing rows are locked by the SELECT above, so their previous route
+    # cannot change underneath us. A row another writer inserted after that
+    # SELECT has an unknown previous route; its day is recounted instead.
+    previous_routes = {(row["reg"], row["seen_at"]): row.get("route") for row in previous or []}
+    counter_deltas: List[Tuple[str, datetime, Optional[str], int]] = []
+    recount: Set[Tuple[str, date]] = set()
+    results: Dict[Tuple[str, datetime], Dict[str, Any]] = {}
+    for row in rows or []:
+        inserted = row.pop("inserted", True)
+        key = (row["reg"], row["seen_at"])
+        if key not in previous_routes:
+            if inserted:
+                counter_deltas.append((row["reg"], row["seen_at"], row.get("route"), 1))
+            else:
+                recount.add((row["reg"], _route_counter_day(row["seen_at"])))
+        elif previous_routes[key] != row.get("route"):
+            counter_deltas.append((row["reg"], row["seen_at"], previous_routes[key], -1))
+            counter_deltas.append((row["reg"], row["seen_at"], row.get("route"), 1))
+        results[key] = row
+
+    apply_route_counter_deltas(
+        connection,
+        [delta for delta in counter_deltas if (delta[0], _route_counter_day(delta[1])) not in recount],
+    )
+    if recount:
+        _recount_route_counter_days(connection, sorted(recount))
+    return results
+
+
+def _merge_bus_sightings_via_copy(
+    connection,
+    values: Sequence[Tuple],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS bus_sightings_staging (
+                reg TEXT,
+                seen_at TIMESTAMPTZ,
+                lat DOUBLE PRECISION,
+                lon DOUBLE PRECISION,
+                route TEXT,
+                stop_code TEXT,
+                destination TEXT,
+                operator_id INTEGER,
+                raw JSONB
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+        cursor.execute("TRUNCATE bus_sightings_staging")
+        copy_rows(connection, "bus_sightings_staging", _BUS_SIGHTING_COLUMNS, values)
+        cursor.execute(
+            """
+            SELECT s.reg, s.seen_at, s.route
+            FROM bus_sightings AS s
+            JOIN bus_sightings_staging AS v
+              ON s.reg = v.reg AND s.seen_at = v.seen_at
+            FOR UPDATE OF s
+            """
+        )
+        previous = cursor.fetchall() or []
+        cursor.execute(_BUS_SIGHTING_MERGE_SQL)
+        rows = cursor.fetchall() or []
+    return previous, rows
+
+
+def _route_counter_day(seen_at: datetime) -> date:
+    if seen_at.tzinfo is None:
+        seen_at = seen_at.replace(tzinfo=timezone.utc)
+    return seen_at.astimezone(timezone.utc).date()
+
+
+def apply_route_counter_deltas(
+    connection,
+    deltas: Iterable[Tuple[str, datetime, Optional[str], int]],
+) -> None:
+    buckets: Dict[Tuple[str, date, str], List[Any]] = {}
+    for reg_key, seen_at, route, delta in deltas:
+        route_key = normalise_text(route)
+        if not reg_key or not route_key or not seen_at or not delta:
+            continue
+        bucket = buckets.setdefault((reg_key, _route_counter_day(seen_at), route_key), [0, None, False])
+        bucket[0] += delta
+        if delta > 0 and (bucket[1] is None or seen_at > bucket[1]):
+            bucket[1] = seen_at
+        if delta < 0:
+            bucket[2] = True
+
+    values = [
+        (reg_key, day, route, count, last_seen)
+        for (reg_key, day, route), (count, last_seen, decremented) in sorted(buckets.items())
+        if count or decremented
+    ]
+    if not values:
+        return
+    decremented_keys = [key for key, (_, _, decremented) in sorted(buckets.items()) if decremented]
+
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor,
+            """
+            INSERT INTO bus_route_daily_counts (reg, day, route, sightings, last_seen)
+            VALUES %s
+            ON CONFLICT (reg, day, route) DO UPDATE SET
+                sightings = bus_route_daily_counts.sightings + EXCLUDED.sightings,
+                last_seen = GREATEST(bus_route_daily_counts.last_seen, EXCLUDED.last_seen)
             """,
-            (
-                reg_key,
-                seen_at,
-                lat,
-                lon,
-                route or None,
-                stop_code or None,
-                destination or None,
-                operator_id,
-                Json(payload),
-            ),
+            values,
+            template="(%s, %s::date, %s, %s, %s::timestamptz)",
+            page_size=max(len(values), 1),
+        )
+        if not decremented_keys:
+            return
+        execute_values(
+            cursor,
+            """
+            DELETE FROM bus_route_daily_counts AS c
+            USING (VALUES %s) AS v(reg, day, route)
+            WHERE c.reg = v.reg AND c.day = v.day AND c.route = v.route AND c.sightings <= 0
+            """,
+            decremented_keys,
+            template="(%s, %s::date, %s)",
+            page_size=max(len(decremented_keys), 1),
+        )
+        # A sighting that left a route may have been its latest one that day.
+        execute_values(
+            cursor,
+            """
+            UPDATE bus_route_daily_counts AS c
+            SET last_seen = (
+                SELECT MAX(s.seen_at)
+                FROM bus_sightings AS s
+                WHERE s.reg = c.reg
+                  AND btrim(s.route) = c.route
+                  AND s.seen_at >= c.day::timestamp AT TIME ZONE 'UTC'
+                  AND s.seen_at < (c.day + 1)::timestamp AT TIME ZONE 'UTC'
+            )
+            FROM (VALUES %s) AS v(reg, day, route)
+            WHERE c.reg = v.reg AND c.day = v.day AND c.route = v.route
+            """,
+            decremented_keys,
+            template="(%s, %s::date, %s)",
+            page_size=max(len(decremented_keys), 1),
         )
-        return cursor.fetchone()
 
 
-def compute_usual_routes(
+def _recount_route_counter_days(connection, days: Sequence[Tuple[str, date]]) -> None:
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor,
+            """
+            DELETE FROM bus_route_daily_counts AS c
+            USING (VALUES %s) AS v(reg, day)
+            WHERE c.reg = v.reg AND c.day = v.day
+            """,
+            days,
+            template="(%s, %s::date)",
+            page_size=max(len(days), 1),
+        )
+        execute_values(
+            cursor,
+            """
+            INSERT INTO bus_route_daily_counts (reg, day, route, sightings, last_seen)
+            SELECT s.reg, v.day, btrim(s.route), COUNT(*), MAX(s.seen_at)
+            FROM (VALUES %s) AS v(reg, day)
+            JOIN bus_sightings AS s
+              ON s.reg = v.reg
+             AND s.seen_at >= v.day::timestamp AT TIME ZONE 'UTC'
+             AND s.seen_at < (v.day + 1)::timestamp AT TIME ZONE 'UTC'
+            WHERE s.route IS NOT NULL AND btrim(s.route) <> ''
+            GROUP BY 1, 2, 3
+            """,
+            days,
+            template="(%s, %s::date)",
+            page_size=max(len(days), 1),
+        )
+
+
+def backfill_route_counters(
     connection,
-    reg_key: str,
-    now: Optional[datetime] = None,
-) -> Tuple[Dict[str, Dict[str, Any]], int]:
-    reference = now or datetime.now(timezone.utc)
-    window_start = reference - timedelta(days=90)
+    since: Optional[date] = None,
+    reg_keys: Optional[Sequence[str]] = None,
+) -> int:
+    conditions = ["route IS NOT NULL", "route <> ''"]
+    counter_conditions: List[str] = []
+    params: List[Any] = []
+    counter_params: List[Any] = []
+    if since is not None:
+        conditions.append("seen_at >= %s")
+        params.append(datetime.combine(since, datetime.min.time(), tzinfo=timezone.utc))
+        counter_conditions.append("day >= %s")
+        counter_params.append(since)
+    if reg_keys:
+        conditions.append("reg = ANY(%s)")
+        params.append(list(reg_keys))
+        counter_conditions.append("reg = ANY(%s)")
+        counter_params.append(list(reg_keys))
 
-    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+    with connection.cursor() as cursor:
+        cursor.execute("LOCK TABLE bus_sightings IN SHARE MODE")
+        cursor.execute(
+            "DELETE FROM bus_route_daily_counts"
+            + (" WHERE " + " AND ".join(counter_conditions) if counter_conditions else ""),
+            counter_params,
+        )
         cursor.execute(
             """
-            SELECT route, COUNT(*) AS count, MAX(seen_at) AS last_seen
+            INSERT INTO bus_route_daily_counts (reg, day, route, sightings, last_seen)
+            SELECT reg,
+                   (seen_at AT TIME ZONE 'UTC')::date AS day,
+                   btrim(route) AS route,
+                   COUNT(*),
+                   MAX(seen_at)
             FROM bus_sightings
-            WHERE reg = %s AND seen_at >= %s AND route IS NOT NULL AND route <> ''
-            GROUP BY route
-            ORDER BY count DESC
+            WHERE """
+            + " AND ".join(conditions)
+            + """
+            GROUP BY 1, 2, 3
             """,
-            (reg_key, window_start),
+            params,
         )
-        rows = cursor.fetchall()
+        return cursor.rowcount or 0
+
+
+def check_route_counters(
+    connection,
+    since: Optional[date] = None,
+    reg_keys: Optional[Sequence[str]] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    conditions = ["route IS NOT NULL", "btrim(route) <> ''"]
+    counter_conditions = ["TRUE"]
+    params: List[Any] = []
+    counter_params: List[Any] = []
+    if since is not None:
+        conditions.append("seen_at >= %s")
+        params.append(datetime.combine(since, datetime.min.time(), tzinfo=timezone.utc))
+        counter_conditions.append("day >= %s")
+        counter_params.append(since)
+    if reg_keys:
+        conditions.append("reg = ANY(%s)")
+        params.append(list(reg_keys))
+        counter_conditions.append("reg = ANY(%s)")
+        counter_params.append(list(reg_keys))
+
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            WITH raw AS (
+                SELECT reg,
+                       (seen_at AT TIME ZONE 'UTC')::date AS day,
+                       btrim(route) AS route,
+                       COUNT(*) AS sightings,
+                       MAX(seen_at) AS last_seen
+                FROM bus_sightings
+                WHERE """
+            + " AND ".join(conditions)
+            + """
+                GROUP BY 1, 2, 3
+            ),
+            counters AS (
+                SELECT reg, day, route, sightings, last_seen
+                FROM bus_route_daily_counts
+                WHERE """
+            + " AND ".join(counter_conditions)
+            + """
+            )
+            SELECT COALESCE(raw.reg, counters.reg) AS reg,
+                   COALESCE(raw.day, counters.day) AS day,
+                   COALESCE(raw.route, counters.route) AS route,
+                   COALESCE(raw.sightings, 0) AS expected,
+                   COALESCE(counters.sightings, 0) AS actual,
+                   raw.last_seen AS expected_last_seen,
+                   counters.last_seen AS actual_last_seen
+            FROM raw
+            FULL OUTER JOIN counters
+              ON raw.reg = counters.reg
+             AND raw.day = counters.day
+             AND raw.route = counters.route
+            WHERE COALESCE(raw.sightings, 0) <> COALESCE(counters.sightings, 0)
+               OR raw.last_seen IS DISTINCT FROM counters.last_seen
+            ORDER BY 1, 2, 3
+            LIMIT %s
+            """,
+            params + counter_params + [max(1, limit)],
+        )
+        return cursor.fetchall() or []
 
+
+def _build_route_distribution(
+    rows: Iterable[Dict[str, Any]],
+) -> Tuple[Dict[str, Dict[str, Any]], int]:
     distribution: Dict[str, Dict[str, Any]] = {}
     total = 0
     for row in rows:
@@ -2052,6 +4381,44 @@ def compute_usual_routes(
     return distribution, total
 
 
+def compute_usual_routes(
+    connection,
+    reg_key: str,
+    now: Optional[datetime] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    return compute_usual_routes_batch(connection, [reg_key], now=now).get(reg_key, ({}, 0))
+
+
+def compute_usual_routes_batch(
+    connection,
+    reg_keys: Iterable[str],
+    now: Optional[datetime] = None,
+) -> Dict[str, Tuple[Dict[str, Dict[str, Any]], int]]:
+    keys = sorted(set(reg_keys))
+    if not keys:
+        return {}
+    reference = now or datetime.now(timezone.utc)
+    first_day = _route_counter_day(reference) - timedelta(days=USUAL_ROUTES_WINDOW_DAYS - 1)
+
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            SELECT reg, route, SUM(sightings) AS count, MAX(last_seen) AS last_seen
+            FROM bus_route_daily_counts
+            WHERE reg = ANY(%s) AND day >= %s
+            GROUP BY reg, route
+            ORDER BY reg, count DESC
+            """,
+            (keys, first_day),
+        )
+        rows = cursor.fetchall() or []
+
+    rows_by_reg: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        rows_by_reg[row.get("reg")].append(row)
+    return {reg: _build_route_distribution(rows_by_reg.get(reg, [])) for reg in keys}
+
+
 def is_planned_diversion(
     connection,
     route: Optional[str],
@@ -2074,6 +4441,35 @@ def is_planned_diversion(
         return cursor.fetchone() is not None
 
 
+def find_planned_diversions(
+    connection,
+    entries: Iterable[Tuple[Optional[str], Optional[datetime]]],
+) -> Set[Tuple[str, datetime]]:
+    candidates = {(route, seen_at) for route, seen_at in entries if route and seen_at}
+    if not candidates:
+        return set()
+    with connection.cursor() as cursor:
+        matches = execute_values(
+            cursor,
+            """
+            SELECT v.route, v.seen_at
+            FROM (VALUES %s) AS v(route, seen_at)
+            WHERE EXISTS (
+                SELECT 1
+                FROM planned_diversions AS d
+                WHERE d.route ILIKE v.route
+                  AND d.start_at <= v.seen_at
+                  AND d.end_at >= v.seen_at
+            )
+            """,
+            list(candidates),
+            template="(%s::text, %s::timestamptz)",
+            page_size=max(len(candidates), 1),
+            fetch=True,
+        )
+    return {(row[0], row[1]) for row in matches or []}
+
+
 def count_operator_mismatch_sightings(
     connection,
     reg_key: str,
@@ -2098,6 +4494,43 @@ def count_operator_mismatch_sightings(
     return int(row[0]) if row and row[0] is not None else 0
 
 
+def count_operator_mismatch_sightings_batch(
+    connection,
+    entries: Iterable[Tuple[str, int, datetime]],
+    window_minutes: int = RARE_OPERATOR_MISMATCH_WINDOW_MINUTES,
+) -> Dict[Tuple[str, int, datetime], int]:
+    candidates = {
+        (reg_key, operator_id, seen_at)
+        for reg_key, operator_id, seen_at in entries
+        if reg_key and operator_id and seen_at
+    }
+    if not candidates:
+        return {}
+    window = timedelta(minutes=window_minutes)
+    with connection.cursor() as cursor:
+        rows = execute_values(
+            cursor,
+            """
+            SELECT v.reg, v.operator_id, v.seen_at, COUNT(s.sighting_id)
+            FROM (VALUES %s) AS v(reg, operator_id, window_start, seen_at)
+            LEFT JOIN bus_sightings AS s
+              ON s.reg = v.reg
+             AND s.operator_id = v.operator_id
+             AND s.seen_at >= v.window_start
+             AND s.seen_at <= v.seen_at
+            GROUP BY v.reg, v.operator_id, v.seen_at
+            """,
+            [
+                (reg_key, operator_id, seen_at - window, seen_at)
+                for reg_key, operator_id, seen_at in candidates
+            ],
+            template="(%s::text, %s::integer, %s::timestamptz, %s::timestamptz)",
+            page_size=max(len(candidates), 1),
+            fetch=True,
+        )
+    return {(row[0], row[1], row[2]): int(row[3] or 0) for row in rows or []}
+
+
 def calculate_route_z_score(counts: Sequence[int], target: int) -> Optional[float]:
     valid = [value for value in counts if value is not None]
     if not valid:
@@ -2215,6 +4648,8 @@ def evaluate_rare_working_state(
     total_sightings: int,
     operator_id: Optional[int],
     now: datetime,
+    mismatch_count: Optional[int] = None,
+    planned_diversion: Optional[bool] = None,
 ) -> Dict[str, Any]:
     route_key = normalise_text(route)
     route_data = distribution.get(route_key) if route_key else None
@@ -2245,9 +4680,10 @@ def evaluate_rare_working_state(
         and operator_id != home_operator_id
         and bus_row.get("reg")
     ):
-        mismatch_count = count_operator_mismatch_sightings(
-            connection, bus_row["reg"], operator_id, seen_at
-        )
+        if mismatch_count is None:
+            mismatch_count = count_operator_mismatch_sightings(
+                connection, bus_row["reg"], operator_id, seen_at
+            )
         if mismatch_count >= RARE_OPERATOR_MISMATCH_THRESHOLD:
             triggered = True
             operator_loan = True
@@ -2258,7 +4694,9 @@ def evaluate_rare_working_state(
         triggered = False
         reason = None
 
-    if triggered and route_key and is_planned_diversion(connection, route_key, seen_at):
+    if planned_diversion is None and triggered and route_key:
+        planned_diversion = is_planned_diversion(connection, route_key, seen_at)
+    if triggered and route_key and planned_diversion:
         triggered = False
         reason = None
 
@@ -2320,15 +4758,10 @@ def apply_badge_overrides(
     return sorted(active)
 
 
-def record_bus_sighting(
-    connection,
-    payload: Dict[str, Any],
-    now: Optional[datetime] = None,
-) -> Optional[Dict[str, Any]]:
+def _prepare_sighting(payload: Dict[str, Any], now_dt: datetime) -> Optional[Dict[str, Any]]:
     if not payload:
         return None
 
-    now_dt = now or datetime.now(timezone.utc)
     reg_key, fallback_registration = extract_vehicle_registration(payload)
     if not reg_key:
         return None
@@ -2356,33 +4789,40 @@ def record_bus_sighting(
         or payload.get("operatorShortName")
         or payload.get("operatorCode")
     )
-    operator_id = ensure_operator(connection, operator_name, operator_short)
+    route_text = normalise_text(
+        payload.get("route")
+        or payload.get("lineName")
+        or payload.get("line")
+        or payload.get("routeId")
+    )
 
-    bus_row = fetch_bus_row(connection, reg_key)
-    created = False
-    if not bus_row:
-        bus_row = create_bus_profile(
-            connection,
-            reg_key,
-            registration,
-            seen_at,
-            payload,
-            operator_id,
-        )
-        created = True
-        record_bus_history(
-            connection,
-            reg_key,
-            "profile-created",
-            {"registration": registration},
-            event_ts=seen_at,
-        )
+    return {
+        "reg": reg_key,
+        "registration": registration,
+        "seen_at": seen_at,
+        "operator_name": operator_name,
+        "operator_short": operator_short,
+        "route": route_text,
+        "payload": payload,
+    }
+
+
+def _plan_bus_updates(
+    bus_row: Dict[str, Any],
+    sighting: Dict[str, Any],
+    operator_id: Optional[int],
+    created: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any], List[Tuple[str, Dict[str, Any], datetime]]]:
+    payload = sighting["payload"]
+    registration = sighting["registration"]
+    seen_at = sighting["seen_at"]
+    route_text = sighting["route"]
 
     updates: Dict[str, Any] = {}
     history_events: List[Tuple[str, Dict[str, Any], datetime]] = []
 
     local_bus = dict(bus_row)
-    local_bus.setdefault("reg", reg_key)
+    local_bus.setdefault("reg", sighting["reg"])
 
     if registration and registration != bus_row.get("registration"):
         updates["registration"] = registration
@@ -2451,21 +4891,30 @@ def record_bus_sighting(
     if created:
         local_bus.setdefault("first_seen", seen_at)
 
-    route_text = normalise_text(
-        payload.get("route")
-        or payload.get("lineName")
-        or payload.get("line")
-        or payload.get("routeId")
-    )
     if route_text:
         updates["current_route"] = route_text
         updates["last_route_update"] = seen_at
         local_bus["current_route"] = route_text
         local_bus["last_route_update"] = seen_at
 
-    sighting = upsert_bus_sighting(connection, reg_key, seen_at, payload, operator_id)
+    return updates, local_bus, history_events
 
-    distribution, total_sightings = compute_usual_routes(connection, reg_key, now=now_dt)
+
+def _evaluate_sighting_badges(
+    connection,
+    bus_row: Dict[str, Any],
+    local_bus: Dict[str, Any],
+    updates: Dict[str, Any],
+    sighting: Dict[str, Any],
+    operator_id: Optional[int],
+    distribution: Dict[str, Dict[str, Any]],
+    total_sightings: int,
+    now_dt: datetime,
+    mismatch_count: Optional[int] = None,
+    planned_diversion: Optional[bool] = None,
+) -> Tuple[List[str], Dict[str, Any], Dict[str, Any]]:
+    route_text = sighting["route"]
+    seen_at = sighting["seen_at"]
 
     is_new, new_expiry, new_state = evaluate_new_bus_state(local_bus, total_sightings, now_dt)
     rare_state = evaluate_rare_working_state(
@@ -2477,6 +4926,8 @@ def record_bus_sighting(
         total_sightings,
         operator_id,
         now_dt,
+        mismatch_count=mismatch_count,
+        planned_diversion=planned_diversion,
     )
 
     candidate_badges: Set[str] = set()
@@ -2516,38 +4967,282 @@ def record_bus_sighting(
     if rare_state.get("triggered") and not bus_row.get("rare_badge_started_at"):
         updates["rare_badge_started_at"] = seen_at
 
-    updated_bus = update_bus_record(connection, reg_key, updates) or fetch_bus_row(connection, reg_key)
+    if BADGE_NEW_BUS in final_badges and new_expiry:
+        badge_expiry_sweeper.schedule("bus", bus_row.get("reg"), new_expiry)
+    if BADGE_RARE_WORKING in final_badges and rare_state.get("decayAt"):
+        badge_expiry_sweeper.schedule("bus", bus_row.get("reg"), rare_state.get("decayAt"))
 
-    for event_type, details, event_ts in history_events:
-        record_bus_history(connection, reg_key, event_type, details, event_ts=event_ts)
+    return final_badges, {**new_state, "isNew": is_new}, rare_state
 
-    if rare_state.get("triggered"):
+
+def _rare_working_history_event(
+    sighting: Dict[str, Any],
+    rare_state: Dict[str, Any],
+) -> Tuple[str, Dict[str, Any], datetime]:
+    return (
+        "rare-working",
+        {
+            "route": sighting["route"],
+            "reason": rare_state.get("reason"),
+            "operatorLoan": rare_state.get("operatorLoan"),
+        },
+        sighting["seen_at"],
+    )
+
+
+def record_bus_sighting(
+    connection,
+    payload: Dict[str, Any],
+    now: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    now_dt = now or datetime.now(timezone.utc)
+    prepared = _prepare_sighting(payload, now_dt)
+    if not prepared:
+        return None
+
+    reg_key = prepared["reg"]
+    seen_at = prepared["seen_at"]
+    operator_id = ensure_operator(connection, prepared["operator_name"], prepared["operator_short"])
+
+    bus_row = fetch_bus_row(connection, reg_key)
+    created = False
+    if not bus_row:
+        bus_row = create_bus_profile(
+            connection,
+            reg_key,
+            prepared["registration"],
+            seen_at,
+            payload,
+            operator_id,
+        )
+        created = True
         record_bus_history(
             connection,
             reg_key,
-            "rare-working",
-            {
-                "route": route_text,
-                "reason": rare_state.get("reason"),
-                "operatorLoan": rare_state.get("operatorLoan"),
-            },
+            "profile-created",
+            {"registration": prepared["registration"]},
             event_ts=seen_at,
         )
 
+    updates, local_bus, history_events = _plan_bus_updates(bus_row, prepared, operator_id, created)
+
+    sighting = upsert_bus_sighting(connection, reg_key, seen_at, payload, operator_id)
+
+    distribution, total_sightings = compute_usual_routes(connection, reg_key, now=now_dt)
+
+    final_badges, new_state, rare_state = _evaluate_sighting_badges(
+        connection,
+        bus_row,
+        local_bus,
+        updates,
+        prepared,
+        operator_id,
+        distribution,
+        total_sightings,
+        now_dt,
+    )
+
+    updated_bus = update_bus_record(connection, reg_key, updates) or fetch_bus_row(connection, reg_key)
+
+    if rare_state.get("triggered"):
+        history_events.append(_rare_working_history_event(prepared, rare_state))
+    for event_type, details, event_ts in history_events:
+        record_bus_history(connection, reg_key, event_type, details, event_ts=event_ts)
+
     result = {
         "bus": updated_bus,
         "sighting": sighting,
         "distribution": distribution,
         "badges": final_badges,
-        "newState": {
-            **new_state,
-            "isNew": is_new,
-        },
+        "newState": new_state,
         "rareState": rare_state,
     }
     return result
 
 
+def _sighting_error(index: int, payload: Any, message: str) -> Dict[str, Any]:
+    registration = None
+    if isinstance(payload, dict):
+        registration = payload.get("registration") or payload.get("vehicleId")
+    return {"index": index, "error": message, "registration": registration}
+
+
+def _record_sightings_individually(
+    connection,
+    payloads: Sequence[Dict[str, Any]],
+    indices: Iterable[int],
+    now_dt: datetime,
+    outcomes: List[Optional[Dict[str, Any]]],
+    errors: List[Dict[str, Any]],
+) -> None:
+    with connection.cursor() as cursor:
+        for index in indices:
+            cursor.execute("SAVEPOINT sighting_entry")
+            try:
+                outcomes[index] = record_bus_sighting(connection, payloads[index], now=now_dt)
+            except Exception as exc:
+                cursor.execute("ROLLBACK TO SAVEPOINT sighting_entry")
+                operator_cache.invalidate()
+                errors.append(_sighting_error(index, payloads[index], str(exc)))
+            cursor.execute("RELEASE SAVEPOINT sighting_entry")
+
+
+def record_bus_sightings_batch(
+    connection,
+    payloads: Sequence[Dict[str, Any]],
+    now: Optional[datetime] = None,
+) -> Tuple[List[Optional[Dict[str, Any]]], List[Dict[str, Any]]]:
+    now_dt = now or datetime.now(timezone.utc)
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+    errors: List[Dict[str, Any]] = []
+
+    prepared: Dict[int, Dict[str, Any]] = {}
+    for index, payload in enumerate(payloads):
+        if not isinstance(payload, dict):
+            errors.append(_sighting_error(index, payload, "invalid"))
+            continue
+        try:
+            entry = _prepare_sighting(payload, now_dt)
+        except Exception as exc:
+            errors.append(_sighting_error(index, payload, str(exc)))
+            continue
+        if entry:
+            prepared[index] = entry
+
+    if not prepared:
+        return outcomes, errors
+
+    with connection.cursor() as cursor:
+        cursor.execute("SAVEPOINT sighting_batch")
+    try:
+        _apply_sightings_batch(connection, prepared, now_dt, outcomes)
+    except Exception as exc:
+        with connection.cursor() as cursor:
+            cursor.execute("ROLLBACK TO SAVEPOINT sighting_batch")
+        operator_cache.invalidate()
+        print(
+            f"[sightings] Batch of {len(prepared)} failed, retrying individually: {exc}",
+            flush=True,
+        )
+        for index in prepared:
+            outcomes[index] = None
+        _record_sightings_individually(
+            connection, payloads, sorted(prepared), now_dt, outcomes, errors
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("RELEASE SAVEPOINT sighting_batch")
+
+    errors.sort(key=lambda item: item.get("index", 0))
+    return outcomes, errors
+
+
+def _apply_sightings_batch(
+    connection,
+    prepared: Dict[int, Dict[str, Any]],
+    now_dt: datetime,
+    outcomes: List[Optional[Dict[str, Any]]],
+) -> None:
+    operator_ids = ensure_operators(
+        connection,
+        ((entry["operator_name"], entry["operator_short"]) for entry in prepared.values()),
+    )
+    entry_operator: Dict[int, Optional[int]] = {}
+    for index, entry in prepared.items():
+        operator_name = normalise_operator_name(entry["operator_name"])
+        entry_operator[index] = operator_ids.get(operator_name.lower()) if operator_name else None
+
+    indices_by_reg: Dict[str, List[int]] = defaultdict(list)
+    for index in sorted(prepared, key=lambda item: (prepared[item]["seen_at"], item)):
+        indices_by_reg[prepared[index]["reg"]].append(index)
+
+    bus_rows = fetch_bus_rows(connection, indices_by_reg.keys())
+    history_rows: List[Tuple[str, str, Dict[str, Any], datetime]] = []
+
+    missing = [reg_key for reg_key in indices_by_reg if reg_key not in bus_rows]
+    if missing:
+        create_entries = []
+        for reg_key in missing:
+            first = indices_by_reg[reg_key][0]
+            entry = prepared[first]
+            create_entries.append(
+                (reg_key, entry["registration"], entry["seen_at"], entry["payload"], entry_operator[first])
+            )
+            history_rows.append(
+                (reg_key, "profile-created", {"registration": entry["registration"]}, entry["seen_at"])
+            )
+        bus_rows.update(create_bus_profiles(connection, create_entries))
+
+    sightings = upsert_bus_sightings(
+        connection,
+        [
+            (entry["reg"], entry["seen_at"], entry["payload"], entry_operator[index])
+            for index, entry in sorted(prepared.items())
+        ],
+    )
+    distributions = compute_usual_routes_batch(connection, indices_by_reg.keys(), now=now_dt)
+
+    mismatch_candidates = []
+    for index, entry in prepared.items():
+        operator_id = entry_operator[index]
+        home_operator_id = bus_rows.get(entry["reg"], {}).get("home_operator_id")
+        if operator_id and home_operator_id != operator_id:
+            mismatch_candidates.append((entry["reg"], operator_id, entry["seen_at"]))
+    mismatch_counts = count_operator_mismatch_sightings_batch(connection, mismatch_candidates)
+    diversions = find_planned_diversions(
+        connection,
+        ((entry["route"], entry["seen_at"]) for entry in prepared.values()),
+    )
+
+    updates_by_reg: Dict[str, Dict[str, Any]] = {}
+    for reg_key, indices in indices_by_reg.items():
+        state = bus_rows[reg_key]
+        distribution, total_sightings = distributions.get(reg_key, ({}, 0))
+        merged: Dict[str, Any] = {}
+        for position, index in enumerate(indices):
+            entry = prepared[index]
+            operator_id = entry_operator[index]
+            created = position == 0 and reg_key in missing
+            updates, local_bus, events = _plan_bus_updates(state, entry, operator_id, created)
+            final_badges, new_state, rare_state = _evaluate_sighting_badges(
+                connection,
+                state,
+                local_bus,
+                updates,
+                entry,
+                operator_id,
+                distribution,
+                total_sightings,
+                now_dt,
+                mismatch_count=mismatch_counts.get((reg_key, operator_id, entry["seen_at"]), 0),
+                planned_diversion=(entry["route"], entry["seen_at"]) in diversions,
+            )
+            if rare_state.get("triggered"):
+                events.append(_rare_working_history_event(entry, rare_state))
+            history_rows.extend(
+                (reg_key, event_type, details, event_ts) for event_type, details, event_ts in events
+            )
+            merged.update(updates)
+            state = dict(local_bus)
+            for column, value in updates.items():
+                state[column] = value.adapted if isinstance(value, Json) else value
+            outcomes[index] = {
+                "bus": None,
+                "sighting": sightings.get((reg_key, entry["seen_at"])),
+                "distribution": distribution,
+                "badges": final_badges,
+                "newState": new_state,
+                "rareState": rare_state,
+            }
+        updates_by_reg[reg_key] = merged
+
+    updated_buses = update_bus_records(connection, updates_by_reg)
+    record_bus_history_batch(connection, history_rows)
+
+    for reg_key, indices in indices_by_reg.items():
+        for index in indices:
+            outcomes[index]["bus"] = updated_buses.get(reg_key)
+
+
 def fetch_recent_sightings(
     connection,
     reg_key: str,
@@ -2764,6 +5459,297 @@ def search_buses(
         return cursor.fetchall() or []
 
 
+_FLEET_SEARCH_FIELD_WEIGHTS: Dict[str, int] = {
+    "registration": 4,
+    "fleetNumber": 3,
+    "route": 2,
+    "operator": 1,
+}
+
+
+def _fleet_search_key(value: Any) -> str:
+    return re.sub(r"[^0-9a-z]", "", normalise_text(value).lower())
+
+
+def _trigrams(key: str, *, padded: bool = False) -> Set[str]:
+    if padded:
+        key = f"  {key} "
+    return {key[index:index + 3] for index in range(len(key) - 2)}
+
+
+class FleetSearchIndex:
+    def __init__(
+        self,
+        enabled: bool,
+        *,
+        refresh_interval: int = FLEET_SEARCH_REFRESH_SECONDS,
+        rebuild_interval: int = FLEET_SEARCH_REBUILD_SECONDS,
+        fuzzy_threshold: float = FLEET_SEARCH_FUZZY_THRESHOLD_PERCENT / 100,
+        watermark_overlap: int = FLEET_DOCUMENT_WATERMARK_OVERLAP_SECONDS,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._refresh_interval = max(int(refresh_interval), 0)
+        self._rebuild_interval = max(int(rebuild_interval), 1)
+        self._fuzzy_threshold = fuzzy_threshold
+        self._watermark_overlap = timedelta(seconds=max(int(watermark_overlap), 0))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._prefixes: List[Tuple[str, str, str, str]] = []
+        self._prefixes_dirty = False
+        self._watermark: Optional[datetime] = None
+        self._built = False
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self._stats = {
+            "builds": 0,
+            "refreshes": 0,
+            "documentsUpdated": 0,
+            "searches": 0,
+            "suggestions": 0,
+            "refreshFailures": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def refresh(self, connection=None, *, full: bool = False) -> int:
+        if connection is None:
+            with get_connection() as pooled:
+                return self.refresh(pooled, full=full)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT NOW()")
+            watermark = cursor.fetchone()[0]
+        full = full or not self._built
+        since = None
+        if not full and self._watermark is not None:
+            since = self._watermark - self._watermark_overlap
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                f"""
+                SELECT
+                    b.reg,
+                    b.registration,
+                    b.fleet_number,
+                    b.current_route,
+                    b.last_seen,
+                    o.name AS operator_name,
+                    o.short_name AS operator_short_name
+                FROM buses b
+                LEFT JOIN operators o ON o.operator_id = b.operator_id
+                {"WHERE b.updated_at > %s OR o.updated_at > %s" if since else ""}
+                """,
+                (since, since) if since else (),
+            )
+            rows = cursor.fetchall() or []
+
+        docs = [self._document(row) for row in rows]
+        with self._lock:
+            if full:
+                # A full pass also drops buses deleted since the last build,
+                # which the updated_at watermark cannot see.
+                updated = len(self._docs.keys() - {doc["reg"] for doc in docs})
+                self._docs = {}
+                self._postings = defaultdict(set)
+                self._built_at = time.monotonic()
+                self._stats["builds"] += 1
+            else:
+                updated = 0
+            for doc in docs:
+                current = self._docs.get(doc["reg"])
+                if current is not None and current["fields"] == doc["fields"]:
+                    current["lastSeen"] = doc["lastSeen"]
+                    current["summary"] = doc["summary"]
+                    continue
+                if current is not None:
+                    for trigram in current["trigrams"]:
+                        postings = self._postings.get(trigram)
+                        if postings is not None:
+                            postings.discard(doc["reg"])
+                for trigram in doc["trigrams"]:
+                    self._postings[trigram].add(doc["reg"])
+                self._docs[doc["reg"]] = doc
+                updated += 1
+            if updated:
+                self._prefixes_dirty = True
+            self._watermark = watermark
+            self._built = True
+            self._refreshed_at = time.monotonic()
+            self._stats["refreshes"] += 1
+            self._stats["documentsUpdated"] += updated
+        return updated
+
+    def search(self, query: Any, limit: int = 25) -> List[str]:
+        self._ensure_fresh()
+        key = _fleet_search_key(query)
+        with self._lock:
+            self._stats["searches"] += 1
+            if not key:
+                ranked = heapq.nlargest(
+                    limit,
+                    self._docs.values(),
+                    key=lambda doc: doc["lastSeen"],
+                )
+                return [doc["reg"] for doc in ranked]
+            return [reg for reg, _ in self._rank(key, limit)]
+
+    def suggest(self, query: Any, limit: int = 10) -> List[Dict[str, Any]]:
+        self._ensure_fresh()
+        key = _fleet_search_key(query)
+        if not key:
+            return []
+        with self._lock:
+            self._stats["suggestions"] += 1
+            suggestions = []
+            for reg, (score, field, display) in self._rank(key, limit):
+                suggestions.append(
+                    {
+                        **self._docs[reg]["summary"],
+                        "match": field,
+                        "text": display,
+                        "score": round(score, 3),
+                    }
+                )
+            return suggestions
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self._enabled,
+                "documents": len(self._docs),
+                "trigrams": len(self._postings),
+                "watermark": normalise_datetime(self._watermark) or None,
+                "refreshedSecondsAgo": round(time.monotonic() - self._refreshed_at, 1)
+                if self._built
+                else None,
+                **self._stats,
+            }
+
+    def _ensure_fresh(self) -> None:
+        if not self._built:
+            with self._refresh_lock:
+                if not self._built:
+                    self.refresh()
+            return
+        now = time.monotonic()
+        if now - self._refreshed_at < self._refresh_interval:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self.refresh(full=now - self._built_at >= self._rebuild_interval)
+        except Exception as exc:
+            with self._lock:
+                self._stats["refreshFailures"] += 1
+            print(f"[fleet-search] Refresh failed, serving previous index: {exc}", flush=True)
+        finally:
+            self._refresh_lock.release()
+
+    def _document(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        reg = row["reg"]
+        candidates = [
+            ("registration", row.get("registration") or reg),
+            ("registration", reg),
+            ("fleetNumber", row.get("fleet_number")),
+            ("route", row.get("current_route")),
+            ("operator", row.get("operator_name")),
+            ("operator", row.get("operator_short_name")),
+        ]
+        fields: List[Tuple[str, str, str, frozenset]] = []
+        trigrams: Set[str] = set()
+        for field, value in candidates:
+            key = _fleet_search_key(value)
+            if not key or any(existing[1] == key for existing in fields):
+                continue
+            fields.append((field, key, normalise_text(value), frozenset(_trigrams(key, padded=True))))
+            trigrams.update(_trigrams(key))
+        last_seen = row.get("last_seen")
+        return {
+            "reg": reg,
+            "fields": fields,
+            "trigrams": trigrams,
+            "lastSeen": last_seen.timestamp() if isinstance(last_seen, datetime) else 0.0,
+            "summary": {
+                "reg": reg,
+                "registration": row.get("registration") or reg,
+                "fleetNumber": row.get("fleet_number"),
+                "currentRoute": row.get("current_route"),
+                "operator": row.get("operator_name") or row.get("operator_short_name"),
+            },
+        }
+
+    def _rank(self, key: str, limit: int) -> List[Tuple[str, Tuple[float, str, str]]]:
+        best: Dict[str, Tuple[float, str, str]] = {}
+
+        def consider(reg: str, tier: float, field: str, display: str) -> None:
+            score = tier + _FLEET_SEARCH_FIELD_WEIGHTS.get(field, 0) / 10
+            current = best.get(reg)
+            if current is None or score > current[0]:
+                best[reg] = (score, field, display)
+
+        if self._prefixes_dirty:
+            self._prefixes = sorted(
+                (field_key, doc["reg"], field, display)
+                for doc in self._docs.values()
+                for field, field_key, display, _ in doc["fields"]
+            )
+            self._prefixes_dirty = False
+        index = bisect.bisect_left(self._prefixes, (key,))
+        while index < len(self._prefixes) and self._prefixes[index][0].startswith(key):
+            field_key, reg, field, display = self._prefixes[index]
+            consider(reg, 4.0 if field_key == key else 3.0, field, display)
+            index += 1
+
+        query_trigrams = _trigrams(key)
+        if not query_trigrams:
+            # Keys under three characters have no trigrams to look up, so
+            # their substring matches come from a scan of the field keys.
+            for doc in self._docs.values():
+                for field, field_key, display, _ in doc["fields"]:
+                    if key in field_key and not field_key.startswith(key):
+                        consider(doc["reg"], 2.0, field, display)
+        else:
+            postings = sorted(
+                (self._postings.get(trigram, set()) for trigram in query_trigrams),
+                key=len,
+            )
+            candidates = set(postings[0]).intersection(*postings[1:]) if postings[0] else set()
+            for reg in candidates:
+                for field, field_key, display, _ in self._docs[reg]["fields"]:
+                    if key in field_key and not field_key.startswith(key):
+                        consider(reg, 2.0, field, display)
+
+            if not best:
+                common = max(1000, len(self._docs) // 10)
+                selective = [
+                    trigram
+                    for trigram in query_trigrams
+                    if len(self._postings.get(trigram, ())) <= common
+                ] or list(query_trigrams)
+                shared = Counter()
+                for trigram in selective:
+                    shared.update(self._postings.get(trigram, ()))
+                padded_trigrams = _trigrams(key, padded=True)
+                for reg, _ in shared.most_common(1000):
+                    for field, _, display, field_trigrams in self._docs[reg]["fields"]:
+                        overlap = len(padded_trigrams & field_trigrams)
+                        similarity = overlap / len(padded_trigrams | field_trigrams)
+                        if similarity >= self._fuzzy_threshold:
+                            consider(reg, 1.0 + similarity, field, display)
+
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (item[1][0], self._docs[item[0]]["lastSeen"]),
+            reverse=True,
+        )
+        return ranked[:limit]
+
+
+fleet_search_index = FleetSearchIndex(enabled=FLEET_SEARCH_INDEX_ENABLED)
+
+
 def list_rare_buses(
     connection,
     *,
@@ -3143,19 +6129,73 @@ def _parse_any_datetime(value: Any) -> Optional[datetime]:
     return None
 
 
-def _prediction_field(prediction: Dict[str, Any], *candidates: str) -> Any:
-    if not isinstance(prediction, dict):
-        return None
+class FieldPlanCache:
+    def __init__(self, compile_plan: Callable[[Tuple[Any, ...]], Any], *, max_plans: int = 1024) -> None:
+        self._compile_plan = compile_plan
+        self._max_plans = max(int(max_plans), 1)
+        self._plans: Dict[Tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def plan_for(self, entry: Dict[str, Any]) -> Any:
+        layout = tuple(entry)
+        plan = self._plans.get(layout)
+        if plan is not None:
+            self._hits += 1
+            return plan
+        plan = self._compile_plan(layout)
+        with self._lock:
+            self._misses += 1
+            if len(self._plans) >= self._max_plans:
+                self._plans.pop(next(iter(self._plans)))
+            self._plans[layout] = plan
+        return plan
+
+    def stats(self) -> Dict[str, int]:
+        return {"layouts": len(self._plans), "hits": self._hits, "misses": self._misses}
+
+
+def _resolve_field_key(layout: Tuple[Any, ...], candidates: Sequence[str]) -> Optional[Any]:
     for candidate in candidates:
-        if candidate in prediction:
-            return prediction.get(candidate)
+        if candidate in layout:
+            return candidate
         lowered = candidate.lower()
-        for key, value in prediction.items():
+        for key in layout:
             if isinstance(key, str) and key.lower() == lowered:
-                return value
+                return key
     return None
 
 
+def _compile_field_plan(fields: Dict[str, Tuple[str, ...]]) -> Callable[[Tuple[Any, ...]], Dict[str, Any]]:
+    def compile_plan(layout: Tuple[Any, ...]) -> Dict[str, Any]:
+        return {name: _resolve_field_key(layout, candidates) for name, candidates in fields.items()}
+
+    return compile_plan
+
+
+_field_key_plans: Dict[Tuple[str, ...], FieldPlanCache] = {}
+
+
+def _field_key_plan(candidates: Tuple[str, ...]) -> FieldPlanCache:
+    plans = _field_key_plans.get(candidates)
+    if plans is None:
+        plans = _field_key_plans.setdefault(
+            candidates,
+            FieldPlanCache(lambda layout: (_resolve_field_key(layout, candidates),), max_plans=256),
+        )
+    return plans
+
+
+def _prediction_field(prediction: Dict[str, Any], *candidates: str) -> Any:
+    if not isinstance(prediction, dict):
+        return None
+    key = _field_key_plan(candidates).plan_for(prediction)[0]
+    if key is None:
+        return None
+    return prediction[key]
+
+
 def _prediction_as_float(value: Any) -> Optional[float]:
     if value in (None, ""):
         return None
@@ -3204,98 +6244,107 @@ def _coalesce_registration(value: Any, fallback: str = "") -> str:
     return normalise_reg_key(fallback)
 
 
+_STREAM_PREDICTION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "vehicle_id": ("VehicleID", "VehicleId", "vehicleId", "VehicleRef"),
+    "payload_vehicle_id": ("VehicleID", "VehicleId", "vehicleId"),
+    "registration": ("RegistrationNumber", "VehicleRegistrationNumber", "VehicleReg", "registration"),
+    "timestamp": (
+        "Timestamp",
+        "TimeStamp",
+        "RecordedAtTime",
+        "RecordedTime",
+        "ReportTime",
+        "GeneratedTime",
+        "MessageTimestamp",
+    ),
+    "stop_id": ("StopID", "StopPointId", "StopCode", "StopPoint"),
+    "stop_name": ("StopPointName", "StopName", "StationName"),
+    "stop_code1": ("StopCode1", "SmsCode", "NaptanId"),
+    "stop_code2": ("StopCode2",),
+    "stop_state": ("StopPointState",),
+    "stop_type": ("StopPointType",),
+    "stop_indicator": ("StopPointIndicator", "Indicator", "PlatformName"),
+    "stop_towards": ("Towards",),
+    "stop_bearing": ("Bearing",),
+    "line_id": ("LineID", "LineId", "RouteId", "Line"),
+    "line_name": ("LineName", "Route", "RouteName"),
+    "line_mode": ("Mode", "ModeName", "ModeId", "ServiceType"),
+    "direction": ("DirectionID", "Direction"),
+    "destination": ("DestinationText", "DestinationName", "Destination"),
+    "visit_number": ("VisitNumber", "Visit", "Sequence"),
+    "trip_id": ("TripID", "TripId", "JourneyId"),
+    "latitude": ("Latitude", "Lat"),
+    "longitude": ("Longitude", "Lon"),
+    "estimated_time": ("EstimatedTime", "ExpectedArrival", "ExpectedTime", "EstimatedArrivalTime"),
+    "expire_time": ("ExpireTime", "ExpiryTime", "Expiry"),
+    "base_version": ("BaseVersion", "baseVersion"),
+}
+_stream_prediction_plans = FieldPlanCache(_compile_field_plan(_STREAM_PREDICTION_FIELDS))
+
+
 def _prepare_stream_prediction(
     prediction: Dict[str, Any]
 ) -> Optional[Dict[str, Any]]:
     if not isinstance(prediction, dict):
         return None
 
+    plan = _stream_prediction_plans.plan_for(prediction)
+
+    def field(name: str) -> Any:
+        key = plan[name]
+        return None if key is None else prediction[key]
+
     header_type = normalise_text(prediction.get("type") or prediction.get("Type"))
     if header_type.lower() == "heartbeat":
         return None
 
-    vehicle_id = normalise_text(
-        _prediction_field(prediction, "VehicleID", "VehicleId", "vehicleId", "VehicleRef")
-    )
+    vehicle_id = normalise_text(field("vehicle_id"))
     if not vehicle_id:
         payload = prediction.get("payload")
         if isinstance(payload, dict):
-            vehicle_id = normalise_text(
-                _prediction_field(payload, "VehicleID", "VehicleId", "vehicleId")
-            )
+            payload_plan = _stream_prediction_plans.plan_for(payload)
+            payload_key = payload_plan["payload_vehicle_id"]
+            vehicle_id = normalise_text(None if payload_key is None else payload[payload_key])
             if vehicle_id:
                 prediction = payload
+                plan = payload_plan
     if not vehicle_id:
         return None
 
-    registration_text = _prediction_field(
-        prediction,
-        "RegistrationNumber",
-        "VehicleRegistrationNumber",
-        "VehicleReg",
-        "registration",
-    )
-    registration = _coalesce_registration(registration_text, vehicle_id)
+    registration = _coalesce_registration(field("registration"), vehicle_id)
     if not registration:
         registration = ""
 
-    timestamp_value = _prediction_field(
-        prediction,
-        "Timestamp",
-        "TimeStamp",
-        "RecordedAtTime",
-        "RecordedTime",
-        "ReportTime",
-        "GeneratedTime",
-        "MessageTimestamp",
-    )
-    timestamp = _prediction_as_datetime(timestamp_value)
+    timestamp = _prediction_as_datetime(field("timestamp"))
 
-    stop_id = normalise_text(
-        _prediction_field(prediction, "StopID", "StopPointId", "StopCode", "StopPoint")
-    )
-    stop_name = normalise_text(
-        _prediction_field(prediction, "StopPointName", "StopName", "StationName")
-    )
-    stop_code1 = normalise_text(_prediction_field(prediction, "StopCode1", "SmsCode", "NaptanId"))
-    stop_code2 = normalise_text(_prediction_field(prediction, "StopCode2"))
-    stop_state = normalise_text(_prediction_field(prediction, "StopPointState"))
-    stop_type = normalise_text(_prediction_field(prediction, "StopPointType"))
-    stop_indicator = normalise_text(
-        _prediction_field(prediction, "StopPointIndicator", "Indicator", "PlatformName")
-    )
-    stop_towards = normalise_text(_prediction_field(prediction, "Towards"))
-    stop_bearing = _prediction_as_int(_prediction_field(prediction, "Bearing"))
+    stop_id = normalise_text(field("stop_id"))
+    stop_name = normalise_text(field("stop_name"))
+    stop_code1 = normalise_text(field("stop_code1"))
+    stop_code2 = normalise_text(field("stop_code2"))
+    stop_state = normalise_text(field("stop_state"))
+    stop_type = normalise_text(field("stop_type"))
+    stop_indicator = normalise_text(field("stop_indicator"))
+    stop_towards = normalise_text(field("stop_towards"))
+    stop_bearing = _prediction_as_int(field("stop_bearing"))
 
-    line_id = normalise_text(_prediction_field(prediction, "LineID", "LineId", "RouteId", "Line"))
-    line_name = normalise_text(_prediction_field(prediction, "LineName", "Route", "RouteName"))
+    line_id = normalise_text(field("line_id"))
+    line_name = normalise_text(field("line_name"))
     if not line_name:
         line_name = line_id
-    line_mode = normalise_text(
-        _prediction_field(prediction, "Mode", "ModeName", "ModeId", "ServiceType")
-    ) or "bus"
+    line_mode = normalise_text(field("line_mode")) or "bus"
 
-    direction = _prediction_as_int(_prediction_field(prediction, "DirectionID", "Direction"))
-    destination = normalise_text(
-        _prediction_field(prediction, "DestinationText", "DestinationName", "Destination")
-    )
+    direction = _prediction_as_int(field("direction"))
+    destination = normalise_text(field("destination"))
 
-    visit_number = _prediction_as_int(_prediction_field(prediction, "VisitNumber", "Visit", "Sequence"))
-    trip_id = _prediction_as_int(_prediction_field(prediction, "TripID", "TripId", "JourneyId"))
+    visit_number = _prediction_as_int(field("visit_number"))
+    trip_id = _prediction_as_int(field("trip_id"))
 
-    latitude = _prediction_as_float(_prediction_field(prediction, "Latitude", "Lat"))
-    longitude = _prediction_as_float(_prediction_field(prediction, "Longitude", "Lon"))
+    latitude = _prediction_as_float(field("latitude"))
+    longitude = _prediction_as_float(field("longitude"))
 
-    estimated_time_value = _prediction_field(
-        prediction,
-        "EstimatedTime",
-        "ExpectedArrival",
-        "ExpectedTime",
-        "EstimatedArrivalTime",
-    )
-    estimated_time = _prediction_as_datetime(estimated_time_value)
+    estimated_time = _prediction_as_datetime(field("estimated_time"))
 
-    expire_value = _prediction_field(prediction, "ExpireTime", "ExpiryTime", "Expiry")
+    expire_value = field("expire_time")
     expire_time = _prediction_as_datetime(expire_value)
     expire_is_delete = False
     if expire_value not in (None, ""):
@@ -3304,7 +6353,7 @@ def _prepare_stream_prediction(
             expire_time = None
             expire_is_delete = True
 
-    base_version = normalise_text(_prediction_field(prediction, "BaseVersion", "baseVersion"))
+    base_version = normalise_text(field("base_version"))
 
     return {
         "vehicle_id": vehicle_id,
@@ -3519,107 +6568,351 @@ def _upsert_active_vehicle(connection, info: Dict[str, Any], now: datetime) -> N
         )
 
 
-def _insert_vehicle_history(connection, info: Dict[str, Any], now: datetime) -> None:
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            INSERT INTO vehicle_history (
-                ts,
-                registration,
-                vehicle_id,
-                line_id,
-                line_name,
-                direction,
-                stop_id,
-                stop_name,
-                lat,
-                lon,
-                visit_number,
-                trip_id,
-                estimated_time,
-                expire_time,
-                base_version,
-                destination
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            (
-                info.get("timestamp") or now,
-                info.get("registration"),
-                info.get("vehicle_id"),
-                info.get("line_id"),
-                info.get("line_name"),
-                info.get("direction"),
-                info.get("stop_id"),
-                info.get("stop_name"),
-                info.get("latitude"),
-                info.get("longitude"),
-                info.get("visit_number"),
-                info.get("trip_id"),
-                info.get("estimated_time"),
-                info.get("expire_time") or (now if info.get("expire_is_delete") else None),
-                info.get("base_version"),
-                info.get("destination"),
-            ),
-        )
+VEHICLE_HISTORY_COLUMNS: Tuple[str, ...] = (
+    "ts",
+    "registration",
+    "vehicle_id",
+    "line_id",
+    "line_name",
+    "direction",
+    "stop_id",
+    "stop_name",
+    "lat",
+    "lon",
+    "visit_number",
+    "trip_id",
+    "estimated_time",
+    "expire_time",
+    "base_version",
+    "destination",
+)
 
 
-def _record_stream_sighting(connection, info: Dict[str, Any], now: datetime) -> None:
-    payload = {
-        "registration": info.get("registration") or info.get("vehicle_id"),
-        "vehicleId": info.get("vehicle_id"),
-        "lineId": info.get("line_id"),
-        "lineName": info.get("line_name"),
-        "route": info.get("line_name") or info.get("line_id"),
-        "direction": info.get("direction"),
-        "destination": info.get("destination"),
-        "destinationName": info.get("destination"),
-        "towards": info.get("stop_towards") or info.get("destination"),
-        "naptanId": info.get("stop_id"),
-        "stopCode": info.get("stop_id"),
-        "stationName": info.get("stop_name"),
-        "timestamp": (info.get("timestamp") or now).isoformat(),
-        "expectedArrival": info.get("estimated_time").isoformat()
-        if isinstance(info.get("estimated_time"), datetime)
-        else None,
-        "latitude": info.get("latitude"),
-        "longitude": info.get("longitude"),
-        "tripId": info.get("trip_id"),
-        "visitNumber": info.get("visit_number"),
-        "baseVersion": info.get("base_version"),
-        "modeName": info.get("line_mode") or "bus",
-    }
-    try:
-        record_bus_sighting(connection, payload, now=now)
-    except Exception as exc:
-        try:
-            connection.rollback()
-        except Exception:
-            pass
-        print(f"[tfl-stream] Failed to record bus sighting: {exc}", flush=True)
+def _vehicle_history_row(info: Dict[str, Any], now: datetime) -> Tuple:
+    return (
+        info.get("timestamp") or now,
+        info.get("registration"),
+        info.get("vehicle_id"),
+        info.get("line_id"),
+        info.get("line_name"),
+        info.get("direction"),
+        info.get("stop_id"),
+        info.get("stop_name"),
+        info.get("latitude"),
+        info.get("longitude"),
+        info.get("visit_number"),
+        info.get("trip_id"),
+        info.get("estimated_time"),
+        info.get("expire_time") or (now if info.get("expire_is_delete") else None),
+        info.get("base_version"),
+        info.get("destination"),
+    )
 
 
-def _prune_inactive_vehicles(connection, cutoff: datetime) -> int:
+def _insert_vehicle_history(connection, info: Dict[str, Any], now: datetime) -> None:
     with connection.cursor() as cursor:
         cursor.execute(
-            """
-            DELETE FROM vehicles_active
-            WHERE last_seen < %s
-               OR (last_expire_time IS NOT NULL AND last_expire_time < %s)
+            f"""
+            INSERT INTO vehicle_history ({", ".join(VEHICLE_HISTORY_COLUMNS)})
+            VALUES ({", ".join(["%s"] * len(VEHICLE_HISTORY_COLUMNS))})
             """,
-            (cutoff, cutoff),
+            _vehicle_history_row(info, now),
         )
-        return cursor.rowcount or 0
 
 
-def apply_stream_prediction(connection, info: Dict[str, Any], now: datetime) -> None:
-    _upsert_stop_record(connection, info, now)
-    _upsert_line_record(connection, info, now)
-    _upsert_active_vehicle(connection, info, now)
-    _upsert_vehicle_profile(connection, info, now)
-    _upsert_vehicle_alias(connection, info, now)
-    _insert_vehicle_history(connection, info, now)
-
+class BufferedCopyWriter:
+    def __init__(
+        self,
+        table: str,
+        columns: Sequence[str],
+        *,
+        flush_rows: int = FLEET_COPY_FLUSH_ROWS,
+        flush_seconds: int = FLEET_COPY_FLUSH_SECONDS,
+        max_buffered_rows: int = FLEET_COPY_MAX_BUFFERED_ROWS,
+    ) -> None:
+        self._table = table
+        self._columns = tuple(columns)
+        self._flush_rows = max(int(flush_rows), 1)
+        self._flush_seconds = max(float(flush_seconds), 0.1)
+        self._max_buffered_rows = max(int(max_buffered_rows), self._flush_rows)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._rows: List[Sequence[Any]] = []
+        self._oldest_monotonic: Optional[float] = None
+        self._stats: Dict[str, Any] = {
+            "buffered": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "dropped": 0,
+            "failures": 0,
+            "lastFlushAt": None,
+            "lastFlushRows": 0,
+            "lastFlushMs": None,
+            "lastError": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> bool:
+        with self._lock:
+            if self.is_running:
+                return True
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name=f"copy-writer-{self._table}",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout)
+        self.flush()
+
+    def add(self, rows: Iterable[Sequence[Any]]) -> None:
+        new_rows = list(rows)
+        if not new_rows:
+            return
+        with self._lock:
+            if not self._rows:
+                self._oldest_monotonic = time.monotonic()
+            self._rows.extend(new_rows)
+            self._stats["buffered"] += len(new_rows)
+            self._trim_locked()
+            due = len(self._rows) >= self._flush_rows
+        self.start()
+        if due:
+            self.flush()
+
+    def _trim_locked(self) -> None:
+        overflow = len(self._rows) - self._max_buffered_rows
+        if overflow > 0:
+            del self._rows[:overflow]
+            self._stats["dropped"] += overflow
+
+    def _is_due(self) -> bool:
+        with self._lock:
+            if not self._rows:
+                return False
+            if len(self._rows) >= self._flush_rows:
+                return True
+            oldest = self._oldest_monotonic
+        return oldest is not None and time.monotonic() - oldest >= self._flush_seconds
+
+    def flush(self, connection=None) -> int:
+        with self._flush_lock:
+            with self._lock:
+                rows = self._rows
+                self._rows = []
+                self._oldest_monotonic = None
+            if not rows:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                if connection is not None:
+                    copy_rows(connection, self._table, self._columns, rows)
+                else:
+                    with get_connection() as own_connection:
+                        copy_rows(own_connection, self._table, self._columns, rows)
+                        own_connection.commit()
+            except Exception as exc:
+                with self._lock:
+                    self._rows = rows + self._rows
+                    self._oldest_monotonic = time.monotonic()
+                    self._trim_locked()
+                    self._stats["failures"] += 1
+                    self._stats["lastError"] = str(exc)
+                if connection is not None:
+                    raise
+                print(f"[copy-writer] Failed to flush {len(rows)} {self._table} rows: {exc}", flush=True)
+                return 0
+
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+            with self._lock:
+                self._stats["flushed"] += len(rows)
+                self._stats["flushes"] += 1
+                self._stats["lastFlushAt"] = datetime.now(timezone.utc).isoformat()
+                self._stats["lastFlushRows"] = len(rows)
+                self._stats["lastFlushMs"] = elapsed_ms
+                self._stats["lastError"] = None
+            return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "table": self._table,
+                "pending": len(self._rows),
+                "flushRows": self._flush_rows,
+                "flushSeconds": self._flush_seconds,
+                "running": self.is_running,
+            }
+
+    def _run(self) -> None:
+        set_connection_class("ingest")
+        interval = min(self._flush_seconds, 1.0)
+        while not self._stop_event.wait(interval):
+            if self._is_due():
+                self.flush()
+
+
+vehicle_history_writer = BufferedCopyWriter("vehicle_history", VEHICLE_HISTORY_COLUMNS)
+
+
+def _stream_sighting_payload(info: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {
+        "registration": info.get("registration") or info.get("vehicle_id"),
+        "vehicleId": info.get("vehicle_id"),
+        "lineId": info.get("line_id"),
+        "lineName": info.get("line_name"),
+        "route": info.get("line_name") or info.get("line_id"),
+        "direction": info.get("direction"),
+        "destination": info.get("destination"),
+        "destinationName": info.get("destination"),
+        "towards": info.get("stop_towards") or info.get("destination"),
+        "naptanId": info.get("stop_id"),
+        "stopCode": info.get("stop_id"),
+        "stationName": info.get("stop_name"),
+        "timestamp": (info.get("timestamp") or now).isoformat(),
+        "expectedArrival": info.get("estimated_time").isoformat()
+        if isinstance(info.get("estimated_time"), datetime)
+        else None,
+        "latitude": info.get("latitude"),
+        "longitude": info.get("longitude"),
+        "tripId": info.get("trip_id"),
+        "visitNumber": info.get("visit_number"),
+        "baseVersion": info.get("base_version"),
+        "modeName": info.get("line_mode") or "bus",
+    }
+
+
+def _record_stream_sightings(connection, infos: Sequence[Dict[str, Any]], now: datetime) -> int:
+    recorded = 0
+    for start in range(0, len(infos), FLEET_SIGHTING_BATCH_SIZE):
+        chunk = infos[start : start + FLEET_SIGHTING_BATCH_SIZE]
+        outcomes, errors = record_bus_sightings_batch(
+            connection,
+            [_stream_sighting_payload(info, now) for info in chunk],
+            now=now,
+        )
+        recorded += sum(1 for outcome in outcomes if outcome)
+        for error in errors:
+            print(
+                f"[tfl-stream] Failed to record bus sighting for {error.get('registration')}: {error.get('error')}",
+                flush=True,
+            )
+    return recorded
+
+
+def _prune_inactive_vehicles(connection, cutoff: datetime) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            DELETE FROM vehicles_active
+            WHERE last_seen < %s
+               OR (last_expire_time IS NOT NULL AND last_expire_time < %s)
+            """,
+            (cutoff, cutoff),
+        )
+        return cursor.rowcount or 0
+
+
+_STREAM_NEXT_STOP_FIELDS: Tuple[str, ...] = (
+    "stop_id",
+    "stop_name",
+    "stop_code1",
+    "stop_code2",
+    "stop_state",
+    "stop_type",
+    "stop_indicator",
+    "stop_towards",
+    "stop_bearing",
+    "latitude",
+    "longitude",
+    "visit_number",
+    "estimated_time",
+)
+
+
+def _merge_prediction_fields(target: Dict[str, Any], info: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in info.items():
+        if value is not None:
+            target[key] = value
+    return target
+
+
+def _prediction_recency(indexed: Tuple[int, Dict[str, Any]]) -> Tuple[float, int]:
+    index, info = indexed
+    timestamp = info.get("timestamp")
+    return (timestamp.timestamp() if isinstance(timestamp, datetime) else float("-inf"), index)
+
+
+def coalesce_stream_predictions(infos: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for info in infos:
+        grouped.setdefault(info["vehicle_id"], []).append(info)
+
+    merged: List[Dict[str, Any]] = []
+    for vehicle_id in sorted(grouped):
+        group = grouped[vehicle_id]
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        _, latest = max(enumerate(group), key=_prediction_recency)
+        result: Dict[str, Any] = {}
+        for info in group:
+            _merge_prediction_fields(result, info)
+        _merge_prediction_fields(result, latest)
+        result["expire_time"] = latest.get("expire_time")
+        result["expire_is_delete"] = latest.get("expire_is_delete")
+        upcoming = [info for info in group if isinstance(info.get("estimated_time"), datetime)]
+        if upcoming:
+            next_stop = min(upcoming, key=lambda info: info["estimated_time"])
+            for field in _STREAM_NEXT_STOP_FIELDS:
+                result[field] = next_stop.get(field)
+        merged.append(result)
+    return merged
+
+
+def apply_stream_predictions(
+    connection,
+    infos: Sequence[Dict[str, Any]],
+    now: datetime,
+) -> List[Dict[str, Any]]:
+    stops: Dict[str, Dict[str, Any]] = {}
+    lines: Dict[str, Dict[str, Any]] = {}
+    for info in infos:
+        stop_id = info.get("stop_id")
+        if stop_id:
+            _merge_prediction_fields(stops.setdefault(stop_id, {}), info)
+        line_key = info.get("line_id") or info.get("line_name")
+        if line_key:
+            _merge_prediction_fields(lines.setdefault(line_key, {}), info)
+    for stop_id in sorted(stops):
+        _upsert_stop_record(connection, stops[stop_id], now)
+    for line_key in sorted(lines):
+        _upsert_line_record(connection, lines[line_key], now)
+
+    vehicles = coalesce_stream_predictions(infos)
+    for info in vehicles:
+        _upsert_active_vehicle(connection, info, now)
+        _upsert_vehicle_profile(connection, info, now)
+        _upsert_vehicle_alias(connection, info, now)
+    return vehicles
+
+
+def apply_stream_prediction(connection, info: Dict[str, Any], now: datetime) -> None:
+    apply_stream_predictions(connection, [info], now)
+
 
 def _should_consider_datetime_key(key: str) -> bool:
     lower_key = key.lower()
@@ -3664,25 +6957,42 @@ def extract_latest_vehicle_timestamp(entry: Any) -> Optional[datetime]:
     return max(valid)
 
 
+_matching_key_plans: Dict[Tuple[str, ...], FieldPlanCache] = {}
+
+
+def _matching_key_plan(candidate_keys: Tuple[str, ...]) -> FieldPlanCache:
+    plans = _matching_key_plans.get(candidate_keys)
+    if plans is None:
+        lowered = [key.lower() for key in candidate_keys]
+
+        def compile_plan(layout: Tuple[Any, ...]) -> Tuple[Any, ...]:
+            matches = []
+            for raw_key in layout:
+                key = normalise_text(raw_key).lower()
+                if key and any(candidate in key for candidate in lowered):
+                    matches.append(raw_key)
+            return tuple(matches)
+
+        plans = _matching_key_plans.setdefault(candidate_keys, FieldPlanCache(compile_plan, max_plans=256))
+    return plans
+
+
 def _extract_field_value(entry: Any, candidate_keys: Tuple[str, ...]) -> str:
     if not candidate_keys:
         return ""
-    lowered = [key.lower() for key in candidate_keys]
-    queue: List[Any] = [entry]
+    plans = _matching_key_plan(candidate_keys)
+    queue: deque = deque([entry])
 
     while queue:
-        current = queue.pop(0)
+        current = queue.popleft()
         if isinstance(current, dict):
-            for raw_key, value in current.items():
+            for key in plans.plan_for(current):
+                text = normalise_text(current[key])
+                if text:
+                    return text
+            for value in current.values():
                 if isinstance(value, (dict, list)):
                     queue.append(value)
-                key = normalise_text(raw_key).lower()
-                if not key:
-                    continue
-                if any(candidate == key or candidate in key for candidate in lowered):
-                    text = normalise_text(value)
-                    if text:
-                        return text
         elif isinstance(current, list):
             queue.extend(current)
 
@@ -3693,10 +7003,6 @@ def fetch_recent_vehicle_snapshots(days: int) -> Tuple[List[Dict[str, Any]], boo
     if not TFL_VEHICLE_API_URL:
         return [], False
 
-    kwargs = build_tfl_request_kwargs()
-    base_params = dict(kwargs.get("params") or {})
-    headers = dict(kwargs.get("headers") or {})
-
     manual_page = 1
     manual_params: Dict[str, Any] = {"page": manual_page}
     if TFL_VEHICLE_PAGE_SIZE:
@@ -3716,14 +7022,14 @@ def fetch_recent_vehicle_snapshots(days: int) -> Tuple[List[Dict[str, Any]], boo
     while next_request and requests_made < TFL_VEHICLE_MAX_PAGES:
         requests_made += 1
         url, extra_params = next_request
-        params = dict(base_params)
+        params: Dict[str, Any] = {}
         if extra_params:
             for key, value in extra_params.items():
                 if value not in (None, ""):
                     params[key] = value
 
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = tfl_http.get(url, endpoint="vehicle-history", params=params, timeout=30)
             response.raise_for_status()
         except requests.RequestException as exc:
             print(f"[fleet-sync] Failed to fetch vehicle history: {exc}", flush=True)
@@ -3868,10 +7174,6 @@ def fetch_live_bus_registrations() -> Tuple[Dict[str, str], bool]:
     if not TFL_VEHICLE_API_URL:
         return {}, False
 
-    kwargs = build_tfl_request_kwargs()
-    base_params = dict(kwargs.get("params") or {})
-    headers = dict(kwargs.get("headers") or {})
-
     registrations: Dict[str, str] = {}
     success = False
 
@@ -3891,14 +7193,14 @@ def fetch_live_bus_registrations() -> Tuple[Dict[str, str], bool]:
     while next_request and requests_made < TFL_VEHICLE_MAX_PAGES:
         requests_made += 1
         url, extra_params = next_request
-        params = dict(base_params)
+        params: Dict[str, Any] = {}
         if extra_params:
             for key, value in extra_params.items():
                 if value not in (None, ""):
                     params[key] = value
 
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = tfl_http.get(url, endpoint="vehicle-registrations", params=params, timeout=30)
             response.raise_for_status()
         except requests.RequestException as exc:
             print(f"[fleet-sync] Failed to fetch live vehicle data: {exc}", flush=True)
@@ -3975,10 +7277,6 @@ def fetch_registrations_from_endpoint(endpoint: str) -> Tuple[Dict[str, str], bo
         return fetch_live_bus_registrations()
 
     url = target if "://" in target else _build_tfl_api_url(target)
-    kwargs = build_tfl_request_kwargs()
-    base_params = dict(kwargs.get("params") or {})
-    headers = dict(kwargs.get("headers") or {})
-
     registrations: Dict[str, str] = {}
     success = False
     next_request: Optional[Tuple[str, Dict[str, Any]]] = (url, None)
@@ -3987,19 +7285,14 @@ def fetch_registrations_from_endpoint(endpoint: str) -> Tuple[Dict[str, str], bo
     while next_request and requests_made < TFL_VEHICLE_MAX_PAGES:
         requests_made += 1
         request_url, extra_params = next_request
-        params = dict(base_params)
+        params: Dict[str, Any] = {}
         if extra_params:
             for key, value in extra_params.items():
                 if value not in (None, ""):
                     params[key] = value
 
         try:
-            response = requests.get(
-                request_url,
-                params=params or None,
-                headers=headers or None,
-                timeout=TFL_API_TIMEOUT_SECONDS,
-            )
+            response = tfl_http.get(request_url, endpoint="vehicle-registrations", params=params)
             response.raise_for_status()
         except requests.RequestException as exc:
             print(
@@ -4068,23 +7361,11 @@ def fetch_all_bus_registrations() -> Tuple[Dict[str, str], bool]:
     return aggregated, any_success
 
 
-_RETRYABLE_STATUS_CODES: Set[int] = {429, 500, 502, 503, 504}
-
-
 def _fetch_active_bus_lines_from_api() -> List[str]:
     url = _build_tfl_api_url("Line/Mode/bus")
-    kwargs = build_tfl_request_kwargs()
-    params = dict(kwargs.get("params") or {})
-    params.setdefault("serviceTypes", "Regular,School")
-    headers = dict(kwargs.get("headers") or {})
 
     try:
-        response = requests.get(
-            url,
-            params=params or None,
-            headers=headers or None,
-            timeout=TFL_API_TIMEOUT_SECONDS,
-        )
+        response = tfl_http.get(url, endpoint="line-list", params={"serviceTypes": "Regular,School"})
         response.raise_for_status()
     except requests.RequestException as exc:
         print(f"[live-tracker] Failed to fetch active bus lines: {exc}", flush=True)
@@ -4311,17 +7592,9 @@ class BusLineRouteCache:
 
     def _request_json(self, path: str) -> Optional[Any]:
         url = _build_tfl_api_url(path)
-        kwargs = build_tfl_request_kwargs()
-        params = dict(kwargs.get("params") or {})
-        headers = dict(kwargs.get("headers") or {})
 
         try:
-            response = requests.get(
-                url,
-                params=params or None,
-                headers=headers or None,
-                timeout=TFL_API_TIMEOUT_SECONDS,
-            )
+            response = tfl_http.get(url, endpoint="line-routes")
             response.raise_for_status()
         except requests.RequestException as exc:
             print(f"[line-cache] Failed to load {path}: {exc}", flush=True)
@@ -4401,17 +7674,9 @@ class BusDisruptionCache:
 
     def _refresh(self) -> None:
         url = _build_tfl_api_url("Line/Mode/bus/Disruption")
-        kwargs = build_tfl_request_kwargs()
-        params = dict(kwargs.get("params") or {})
-        headers = dict(kwargs.get("headers") or {})
 
         try:
-            response = requests.get(
-                url,
-                params=params or None,
-                headers=headers or None,
-                timeout=TFL_API_TIMEOUT_SECONDS,
-            )
+            response = tfl_http.get(url, endpoint="disruptions")
             response.raise_for_status()
         except requests.RequestException as exc:
             print(f"[disruption-cache] Failed to load disruptions: {exc}", flush=True)
@@ -4468,77 +7733,96 @@ def fetch_active_bus_lines() -> List[str]:
     return line_route_cache.get_lines()
 
 
+_ARRIVALS_LINE_ERROR_STATUS_CODES: Set[int] = {400, 404}
+
+
 def _fetch_arrivals_for_line(
     line_id: str,
-    base_params: Dict[str, Any],
-    headers: Dict[str, str],
     stop_event: Optional[threading.Event] = None,
-) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
-    attempts = 0
-    last_error: Optional[str] = None
-    url = _build_tfl_api_url(f"Line/{quote(str(line_id) or '')}/Arrivals")
-    backoff_seconds = LIVE_TRACKING_BACKOFF_MS / 1000.0
-
-    while attempts < LIVE_TRACKING_MAX_RETRIES:
-        attempts += 1
-        params = dict(base_params)
+    *,
+    max_attempts: int = LIVE_TRACKING_MAX_RETRIES,
+) -> Tuple[List[Dict[str, Any]], int, Optional[str], Optional[int]]:
+    line_path = ",".join(quote(str(part) or "") for part in str(line_id).split(","))
+    url = _build_tfl_api_url(f"Line/{line_path}/Arrivals")
 
-        try:
-            response = requests.get(
-                url,
-                params=params or None,
-                headers=headers or None,
-                timeout=TFL_API_TIMEOUT_SECONDS,
-            )
-        except requests.RequestException as exc:
-            last_error = str(exc)
-            if attempts >= LIVE_TRACKING_MAX_RETRIES:
-                return [], attempts, last_error
-            delay = backoff_seconds * max(1, 2 ** (attempts - 1))
-            jitter = random.uniform(0.0, backoff_seconds) if backoff_seconds else 0.0
-            sleep_interval = delay + jitter
-            if stop_event:
-                if stop_event.wait(sleep_interval):
-                    return [], attempts, "cancelled"
-            else:
-                time.sleep(sleep_interval)
-            continue
+    try:
+        response, attempts = tfl_http.fetch(
+            url,
+            endpoint="arrivals",
+            max_attempts=max_attempts,
+            backoff_ms=LIVE_TRACKING_BACKOFF_MS,
+            stop_event=stop_event,
+            priority="arrivals",
+        )
+    except requests.RequestException as exc:
+        return [], getattr(exc, "attempts", 1), str(exc), None
 
-        status = response.status_code
-        if status in _RETRYABLE_STATUS_CODES and attempts < LIVE_TRACKING_MAX_RETRIES:
-            last_error = f"HTTP {status}"
-            delay = backoff_seconds * max(1, 2 ** (attempts - 1))
-            jitter = random.uniform(0.0, backoff_seconds) if backoff_seconds else 0.0
-            sleep_interval = delay + jitter
-            if stop_event:
-                if stop_event.wait(sleep_interval):
-                    return [], attempts, "cancelled"
-            else:
-                time.sleep(sleep_interval)
-            continue
+    try:
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        return [], attempts, str(exc), response.status_code
 
-        try:
-            response.raise_for_status()
-        except requests.RequestException as exc:
-            last_error = str(exc)
-            return [], attempts, last_error
+    try:
+        payload = response.json()
+    except ValueError as exc:
+        return [], attempts, f"invalid JSON: {exc}", response.status_code
 
-        try:
-            payload = response.json()
-        except ValueError as exc:
-            return [], attempts, f"invalid JSON: {exc}"
+    if isinstance(payload, list):
+        return payload, attempts, None, response.status_code
+    if isinstance(payload, dict):
+        for key in ("arrivals", "value", "results", "data"):
+            value = payload.get(key)
+            if isinstance(value, list):
+                return value, attempts, None, response.status_code
+        return [payload], attempts, None, response.status_code
+    return [], attempts, None, response.status_code
+
+
+def _split_arrivals_by_line(
+    line_ids: Sequence[str],
+    arrivals: Iterable[Any],
+) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {line_id: [] for line_id in line_ids}
+    if len(line_ids) == 1:
+        grouped[line_ids[0]].extend(entry for entry in arrivals if isinstance(entry, dict))
+        return grouped
+    by_key = {str(line_id).lower(): line_id for line_id in line_ids}
+    for entry in arrivals:
+        if not isinstance(entry, dict):
+            continue
+        candidate = entry.get("lineId") or entry.get("lineName")
+        line_id = by_key.get(str(candidate or "").strip().lower())
+        if line_id is not None:
+            grouped[line_id].append(entry)
+    return grouped
 
-        if isinstance(payload, list):
-            return payload, attempts, None
-        if isinstance(payload, dict):
-            for key in ("arrivals", "value", "results", "data"):
-                value = payload.get(key)
-                if isinstance(value, list):
-                    return value, attempts, None
-            return [payload], attempts, None
-        return [], attempts, None
 
-    return [], attempts, last_error
+def _fetch_arrivals_for_lines(
+    line_ids: Sequence[str],
+    stop_event: Optional[threading.Event] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], int, Dict[str, str], int]:
+    arrivals, attempts, error, status = _fetch_arrivals_for_line(",".join(line_ids), stop_event)
+    if not error:
+        return _split_arrivals_by_line(line_ids, arrivals), attempts, {}, 0
+    # Only a client error can be blamed on a single line in the batch.
+    # Throttling, server errors, timeouts and an exhausted request budget
+    # would fail every half too, so the whole batch waits for the next round.
+    if len(line_ids) == 1 or status not in _ARRIVALS_LINE_ERROR_STATUS_CODES:
+        return {}, attempts, {line_id: error for line_id in line_ids}, 0
+    if stop_event and stop_event.is_set():
+        return {}, attempts, {line_id: "cancelled" for line_id in line_ids}, 0
+
+    middle = len(line_ids) // 2
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    splits = 1
+    for half in (line_ids[:middle], line_ids[middle:]):
+        half_results, half_attempts, half_errors, half_splits = _fetch_arrivals_for_lines(half, stop_event)
+        results.update(half_results)
+        errors.update(half_errors)
+        attempts += half_attempts
+        splits += half_splits
+    return results, attempts, errors, splits
 
 
 def normalise_live_arrival(
@@ -4628,6 +7912,8 @@ def normalise_live_arrival(
 def collect_live_bus_snapshot(
     *,
     stop_event: Optional[threading.Event] = None,
+    lines: Optional[Sequence[str]] = None,
+    line_results: Optional[Dict[str, Optional[Set[str]]]] = None,
 ) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
     started_at = datetime.now(timezone.utc)
     meta: Dict[str, Any] = {
@@ -4646,7 +7932,8 @@ def collect_live_bus_snapshot(
     disruption_routes = bus_disruption_cache.get_routes()
     meta["disruptionsTracked"] = len(disruption_routes)
 
-    lines = fetch_active_bus_lines()
+    if lines is None:
+        lines = fetch_active_bus_lines()
     if not lines:
         meta["finishedAt"] = datetime.now(timezone.utc).isoformat()
         meta["fleetSize"] = 0
@@ -4655,65 +7942,77 @@ def collect_live_bus_snapshot(
     meta["linesRequested"] = len(lines)
     meta["routesCached"] = line_route_cache.cached_route_count()
 
-    request_kwargs = build_tfl_request_kwargs()
-    base_params = dict(request_kwargs.get("params") or {})
-    headers = dict(request_kwargs.get("headers") or {})
-
     launch_delay = LIVE_TRACKING_LAUNCH_DELAY_MS / 1000.0
+    batches = [
+        list(lines[start : start + LIVE_TRACKING_BATCH_SIZE])
+        for start in range(0, len(lines), LIVE_TRACKING_BATCH_SIZE)
+    ]
+    meta["batchesRequested"] = len(batches)
+    meta["batchSplits"] = 0
 
     with ThreadPoolExecutor(max_workers=LIVE_TRACKING_CONCURRENCY) as executor:
-        futures: Dict[Any, str] = {}
-        for index, line_id in enumerate(lines):
+        futures: Dict[Any, List[str]] = {}
+        for index, batch in enumerate(batches):
             if stop_event and stop_event.is_set():
                 break
             future = executor.submit(
-                _fetch_arrivals_for_line,
-                line_id,
-                base_params,
-                headers,
+                _fetch_arrivals_for_lines,
+                batch,
                 stop_event,
             )
-            futures[future] = line_id
-            if launch_delay > 0 and index < len(lines) - 1:
+            futures[future] = batch
+            if launch_delay > 0 and index < len(batches) - 1:
                 if stop_event and stop_event.wait(launch_delay):
                     break
                 if not stop_event:
                     time.sleep(launch_delay)
 
         for future in as_completed(futures):
-            line_id = futures[future]
+            batch = futures[future]
             if stop_event and stop_event.is_set():
                 break
             try:
-                arrivals, attempts, error_message = future.result()
+                arrivals_by_line, attempts, line_errors, splits = future.result()
             except Exception as exc:
                 attempts = getattr(exc, "attempts", 1)
                 meta["requestsMade"] += attempts
-                meta["errors"].append({"lineId": line_id, "error": str(exc)})
+                for line_id in batch:
+                    meta["errors"].append({"lineId": line_id, "error": str(exc)})
+                    if line_results is not None:
+                        line_results[line_id] = None
                 continue
 
             meta["requestsMade"] += attempts
+            meta["batchSplits"] += splits
+
+            for line_id in batch:
+                error_message = line_errors.get(line_id)
+                if error_message:
+                    meta["errors"].append({"lineId": line_id, "error": error_message})
+                    if line_results is not None:
+                        line_results[line_id] = None
+                    continue
 
-            if error_message:
-                meta["errors"].append({"lineId": line_id, "error": error_message})
-                continue
-
-            meta["linesSucceeded"] += 1
+                meta["linesSucceeded"] += 1
+                line_vehicles: Set[str] = set()
+                if line_results is not None:
+                    line_results[line_id] = line_vehicles
 
-            for raw in arrivals or []:
-                record = normalise_live_arrival(line_id, raw, now=started_at)
-                if not record:
-                    continue
-                log_entries.append(dict(record))
-                vehicle_key = record.get("vehicleKey")
-                if not vehicle_key:
-                    continue
-                existing = fleet.get(vehicle_key)
-                seen_at = record.get("_seen_at")
-                if existing and existing.get("_seen_at") and seen_at:
-                    if existing["_seen_at"] >= seen_at:
+                for raw in arrivals_by_line.get(line_id) or []:
+                    record = normalise_live_arrival(line_id, raw, now=started_at)
+                    if not record:
+                        continue
+                    log_entries.append(dict(record))
+                    vehicle_key = record.get("vehicleKey")
+                    if not vehicle_key:
                         continue
-                fleet[vehicle_key] = dict(record)
+                    line_vehicles.add(vehicle_key)
+                    existing = fleet.get(vehicle_key)
+                    seen_at = record.get("_seen_at")
+                    if existing and existing.get("_seen_at") and seen_at:
+                        if existing["_seen_at"] >= seen_at:
+                            continue
+                    fleet[vehicle_key] = dict(record)
 
     log_sorted: List[Dict[str, Any]] = []
     for entry in sorted(log_entries, key=lambda item: item.get("_seen_at") or started_at):
@@ -4731,73 +8030,923 @@ def collect_live_bus_snapshot(
     return fleet, log_sorted, meta
 
 
-class LiveArrivalsPoller:
-    def __init__(self, enabled: bool, *, interval: int = LIVE_TRACKING_INTERVAL_SECONDS) -> None:
-        self._enabled = bool(enabled)
-        self._interval = max(int(interval), 5)
-        self._stale_after = timedelta(seconds=LIVE_TRACKING_STALE_SECONDS)
+def _live_tracking_zone():
+    try:
+        return ZoneInfo(LIVE_TRACKING_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def classify_bus_line(line_id: str) -> str:
+    key = str(line_id or "").strip().lower()
+    if len(key) > 1 and key[0] == "n" and key[1:].isdigit():
+        return "night"
+    if key.isdigit() and 600 <= int(key) <= 699:
+        return "school"
+    return "regular"
+
+
+def _line_in_service_window(kind: str, local_now: datetime) -> bool:
+    minutes = local_now.hour * 60 + local_now.minute
+    if kind == "night":
+        return minutes >= 22 * 60 or minutes < 7 * 60
+    if kind == "school":
+        if local_now.weekday() >= 5:
+            return False
+        return 6 * 60 + 30 <= minutes < 10 * 60 or 14 * 60 <= minutes < 18 * 60 + 30
+    return True
+
+
+class LinePollScheduler:
+    def __init__(
+        self,
+        *,
+        min_interval: float = LIVE_TRACKING_INTERVAL_SECONDS,
+        max_interval: float = LIVE_TRACKING_MAX_LINE_INTERVAL_SECONDS,
+        active_max_interval: float = LIVE_TRACKING_STALE_SECONDS * 0.75,
+        busy_vehicles: int = LIVE_TRACKING_BUSY_VEHICLES,
+    ) -> None:
+        self._min_interval = float(min_interval)
+        self._max_interval = max(float(max_interval), self._min_interval)
+        self._active_max_interval = min(max(float(active_max_interval), self._min_interval), self._max_interval)
+        self._busy_vehicles = max(int(busy_vehicles), 1)
+        self._zone = _live_tracking_zone()
         self._lock = threading.Lock()
-        self._stop_event = threading.Event()
-        self._thread: Optional[threading.Thread] = None
-        self._fleet: Dict[str, Dict[str, Any]] = {}
-        self._sightings: deque = deque(maxlen=LIVE_TRACKING_LOG_LIMIT)
-        self._last_meta: Dict[str, Any] = {}
-        self._last_cycle_started_at: Optional[str] = None
-        self._last_cycle_finished_at: Optional[str] = None
-        self._last_error: Optional[str] = None
+        self._heap: List[Tuple[float, str]] = []
+        self._lines: Dict[str, Dict[str, Any]] = {}
 
-    @property
-    def enabled(self) -> bool:
-        return self._enabled
+    def sync_lines(self, line_ids: Iterable[str], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        wanted = {str(line_id) for line_id in line_ids if line_id}
+        with self._lock:
+            for line_id in list(self._lines):
+                if line_id not in wanted:
+                    del self._lines[line_id]
+            for line_id in sorted(wanted - set(self._lines)):
+                self._lines[line_id] = {
+                    "kind": classify_bus_line(line_id),
+                    "due": now,
+                    "interval": self._min_interval,
+                    "vehicles": None,
+                    "churn": 0.0,
+                    "emptyStreak": 0,
+                    "failures": 0,
+                    "polls": 0,
+                    "keys": set(),
+                    "lastPolled": None,
+                    "lastSuccess": None,
+                    "lastSuccessAt": None,
+                }
+                heapq.heappush(self._heap, (now, line_id))
 
-    @property
-    def is_running(self) -> bool:
-        return bool(self._thread and self._thread.is_alive())
+    def due_lines(self, limit: int, now: Optional[float] = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        due: List[str] = []
+        with self._lock:
+            while self._heap and len(due) < limit:
+                due_at, line_id = self._heap[0]
+                state = self._lines.get(line_id)
+                if state is None or state["due"] != due_at:
+                    heapq.heappop(self._heap)
+                    continue
+                if due_at > now:
+                    break
+                heapq.heappop(self._heap)
+                state["due"] = None
+                due.append(line_id)
+        return due
 
-    def start(self) -> bool:
-        if not self._enabled:
-            return False
-        if self.is_running:
-            return True
-        self._stop_event.clear()
-        self._thread = threading.Thread(target=self._run, name="live-arrivals", daemon=True)
-        self._thread.start()
-        return True
+    def requeue(self, line_ids: Iterable[str], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for line_id in line_ids:
+                state = self._lines.get(line_id)
+                if state is None or state["due"] is not None:
+                    continue
+                state["due"] = now
+                heapq.heappush(self._heap, (now, line_id))
 
-    def stop(self, timeout: float = 5.0) -> None:
-        self._stop_event.set()
-        thread = self._thread
-        if thread and thread.is_alive():
-            thread.join(timeout=timeout)
+    def seconds_until_due(self, now: Optional[float] = None) -> Optional[float]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._heap:
+                due_at, line_id = self._heap[0]
+                state = self._lines.get(line_id)
+                if state is None or state["due"] != due_at:
+                    heapq.heappop(self._heap)
+                    continue
+                return max(due_at - now, 0.0)
+        return None
 
-    def snapshot(self) -> Dict[str, Any]:
+    def _interval_for(self, state: Dict[str, Any], local_now: datetime) -> float:
+        vehicles = state["vehicles"] or 0
+        if not vehicles and not _line_in_service_window(state["kind"], local_now):
+            return self._max_interval
+        if vehicles == 0:
+            return min(self._max_interval, self._min_interval * 2 ** min(state["emptyStreak"], 6))
+        load_factor = min(max(self._busy_vehicles / vehicles, 1.0), self._max_interval / self._min_interval)
+        interval = self._min_interval * load_factor / (1.0 + 2.0 * state["churn"])
+        return min(max(interval, self._min_interval), self._active_max_interval)
+
+    def record(
+        self,
+        results: Dict[str, Optional[Set[str]]],
+        now: Optional[float] = None,
+    ) -> None:
+        now = time.monotonic() if now is None else now
+        local_now = datetime.now(self._zone)
+        wall_now = datetime.now(timezone.utc).isoformat()
         with self._lock:
-            fleet = [dict(entry) for entry in self._fleet.values()]
-            sightings = [dict(entry) for entry in self._sightings]
-            meta = dict(self._last_meta or {})
-        meta.update(
-            {
-                "enabled": self._enabled,
-                "running": self.is_running,
-                "intervalSeconds": self._interval,
-                "staleAfterSeconds": int(self._stale_after.total_seconds()),
-                "lastCycleStartedAt": self._last_cycle_started_at,
-                "lastCycleFinishedAt": self._last_cycle_finished_at,
-                "lastError": self._last_error,
-            }
+            for line_id, keys in results.items():
+                state = self._lines.get(line_id)
+                if state is None:
+                    continue
+                state["lastPolled"] = now
+                state["polls"] += 1
+                if keys is None:
+                    state["failures"] += 1
+                    interval = self._min_interval
+                else:
+                    if state["vehicles"] is not None:
+                        previous = state["keys"]
+                        union = previous | keys
+                        change = 1.0 - len(previous & keys) / len(union) if union else 0.0
+                        state["churn"] = 0.5 * state["churn"] + 0.5 * change
+                    state["keys"] = set(keys)
+                    state["vehicles"] = len(keys)
+                    state["emptyStreak"] = 0 if keys else state["emptyStreak"] + 1
+                    state["failures"] = 0
+                    state["lastSuccess"] = now
+                    state["lastSuccessAt"] = wall_now
+                    interval = self._interval_for(state, local_now)
+                state["interval"] = interval
+                state["due"] = now + interval
+                heapq.heappush(self._heap, (state["due"], line_id))
+
+    def freshness(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            states = list(self._lines.values())
+        ages = sorted(now - state["lastSuccess"] for state in states if state["lastSuccess"] is not None)
+        active_ages = sorted(
+            now - state["lastSuccess"]
+            for state in states
+            if state["lastSuccess"] is not None and state["vehicles"]
+        )
+        overdue = sum(
+            1
+            for state in states
+            if state["lastSuccess"] is not None and now - state["lastSuccess"] > 2 * state["interval"]
         )
-        return {"fleet": fleet, "sightings": sightings, "meta": meta}
 
-    def _run(self) -> None:
-        while not self._stop_event.is_set():
-            cycle_start = datetime.now(timezone.utc)
-            self._last_cycle_started_at = cycle_start.isoformat()
-            snapshot: Dict[str, Dict[str, Any]] = {}
-            log_entries: List[Dict[str, Any]] = []
-            meta: Dict[str, Any] = {}
+        def _percentile(values: List[float], fraction: float) -> Optional[float]:
+            if not values:
+                return None
+            return round(values[min(int(len(values) * fraction), len(values) - 1)], 1)
+
+        return {
+            "lines": len(states),
+            "linesPolled": len(ages),
+            "activeLines": len(active_ages),
+            "overdueLines": overdue,
+            "failingLines": sum(1 for state in states if state["failures"]),
+            "medianAgeSeconds": _percentile(ages, 0.5),
+            "p95AgeSeconds": _percentile(ages, 0.95),
+            "activeMedianAgeSeconds": _percentile(active_ages, 0.5),
+            "activeP95AgeSeconds": _percentile(active_ages, 0.95),
+            "pollsPerMinute": round(
+                sum(60.0 / state["interval"] for state in states if state["interval"]),
+                1,
+            ),
+        }
+
+    def line_states(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            items = sorted(self._lines.items())
+            rows = []
+            for line_id, state in items:
+                last_success = state["lastSuccess"]
+                rows.append(
+                    {
+                        "lineId": line_id,
+                        "kind": state["kind"],
+                        "vehicles": state["vehicles"],
+                        "churn": round(state["churn"], 3),
+                        "intervalSeconds": round(state["interval"], 1),
+                        "ageSeconds": round(now - last_success, 1) if last_success is not None else None,
+                        "nextPollInSeconds": round(max(state["due"] - now, 0.0), 1)
+                        if state["due"] is not None
+                        else 0.0,
+                        "lastSuccessAt": state["lastSuccessAt"],
+                        "failures": state["failures"],
+                        "polls": state["polls"],
+                    }
+                )
+        return rows
+
+
+def _live_update_record(
+    key: str,
+    *,
+    source: str,
+    registration: Any = None,
+    line: Any = None,
+    route: Any = None,
+    operator: Any = None,
+    latitude: Any = None,
+    longitude: Any = None,
+    bearing: Any = None,
+    destination: Any = None,
+    stop: Any = None,
+    stop_latitude: Any = None,
+    stop_longitude: Any = None,
+    timestamp: Any = None,
+) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"key": key, "src": source}
+    for name, value in (
+        ("reg", registration),
+        ("line", line),
+        ("route", route),
+        ("op", operator),
+        ("lat", latitude),
+        ("lon", longitude),
+        ("bearing", bearing),
+        ("dest", destination),
+        ("stop", stop),
+        ("stopLat", stop_latitude),
+        ("stopLon", stop_longitude),
+        ("ts", timestamp),
+    ):
+        if value not in (None, ""):
+            record[name] = value
+    return record
+
+
+def _live_update_from_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return _live_update_record(
+        entry["vehicleKey"],
+        source="poll",
+        registration=entry.get("registration"),
+        line=entry.get("lineId"),
+        route=entry.get("route"),
+        operator=entry.get("operator"),
+        latitude=entry.get("latitude"),
+        longitude=entry.get("longitude"),
+        bearing=entry.get("bearing"),
+        destination=entry.get("destination"),
+        stop=entry.get("stationName"),
+        timestamp=entry.get("seenAt") or entry.get("timestamp"),
+    )
+
+
+class LiveUpdateChannel:
+    def __init__(
+        self,
+        *,
+        lines: Iterable[str] = (),
+        operators: Iterable[str] = (),
+        registrations: Iterable[str] = (),
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+    ) -> None:
+        self.lines = frozenset(lines)
+        self.operators = frozenset(operators)
+        self.registrations = frozenset(registrations)
+        self.bbox = bbox
+        self.filtered = bool(self.lines or self.operators or self.registrations or self.bbox)
+        self.signature = (self.lines, self.operators, self.registrations, self.bbox)
+        self.condition = threading.Condition()
+        self.subscribers = 0
+        self.seq = 0
+        self.floor = 0
+        self.known: Set[str] = set()
+        self._log: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+
+    def verdict(self, update: Dict[str, Any]) -> Optional[bool]:
+        # None when the update lacks a field the channel filters on, e.g. a
+        # stream prediction without a vehicle position under a bbox filter.
+        complete = True
+        if self.registrations and update["key"] not in self.registrations:
+            return False
+        if self.lines:
+            values = {
+                normalise_text(update.get("line")).upper(),
+                normalise_text(update.get("route")).upper(),
+            } - {""}
+            if not values:
+                complete = False
+            elif not values & self.lines:
+                return False
+        if self.operators:
+            operator = normalise_text(update.get("op")).lower()
+            if not operator:
+                complete = False
+            elif operator not in self.operators:
+                return False
+        if self.bbox:
+            lat = update.get("lat")
+            lon = update.get("lon")
+            if lat is None or lon is None:
+                complete = False
+            else:
+                min_lon, min_lat, max_lon, max_lat = self.bbox
+                if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                    return False
+        return True if complete else None
+
+    def matches(self, update: Dict[str, Any]) -> bool:
+        return self.verdict(update) is True
+
+    def offer(self, key: str, update: Dict[str, Any], encoded: str) -> bool:
+        if update.get("removed"):
+            if self.filtered and key not in self.known:
+                return False
+            self.known.discard(key)
+            self._append(key, encoded)
+            return True
+        verdict = self.verdict(update)
+        if verdict or (verdict is None and key in self.known):
+            if self.filtered:
+                self.known.add(key)
+            self._append(key, encoded)
+            return True
+        if verdict is False and key in self.known:
+            self.known.discard(key)
+            self._append(key, app.json.dumps({"key": key, "removed": True}))
+            return True
+        return False
+
+    def candidates(self, index: Dict[str, Any]) -> Iterable[str]:
+        updates = index["updates"]
+        if not self.filtered:
+            return updates.keys()
+        if self.registrations:
+            keys = set(self.registrations & updates.keys())
+        elif self.lines:
+            keys = {key for line in self.lines for key in index["lines"].get(line, ())}
+        elif self.operators:
+            keys = {key for operator in self.operators for key in index["operators"].get(operator, ())}
+        else:
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            grid = LIVE_PUSH_GRID_CELLS_PER_DEGREE
+            lat_range = range(int(min_lat * grid // 1), int(max_lat * grid // 1) + 1)
+            lon_range = range(int(min_lon * grid // 1), int(max_lon * grid // 1) + 1)
+            cells = index["cells"]
+            if len(lat_range) * len(lon_range) <= len(cells):
+                keys = {
+                    key
+                    for lat_cell in lat_range
+                    for lon_cell in lon_range
+                    for key in cells.get((lat_cell, lon_cell), ())
+                }
+            else:
+                keys = {
+                    key
+                    for (lat_cell, lon_cell), members in cells.items()
+                    if lat_cell in lat_range and lon_cell in lon_range
+                    for key in members
+                }
+        keys.update(self.known & updates.keys())
+        return keys
+
+    def read(self, cursor: int, timeout: float) -> Tuple[int, Optional[List[str]]]:
+        with self.condition:
+            if self.seq <= cursor:
+                self.condition.wait(timeout)
+            if cursor < self.floor:
+                return self.seq, None
+            entries: List[str] = []
+            for seq, encoded in reversed(self._log.values()):
+                if seq <= cursor:
+                    break
+                entries.append(encoded)
+            entries.reverse()
+            return self.seq, entries
+
+    def _append(self, key: str, encoded: str) -> None:
+        self.seq += 1
+        self._log[key] = (self.seq, encoded)
+        self._log.move_to_end(key)
+        while len(self._log) > LIVE_PUSH_CHANNEL_BUFFER:
+            _, (seq, _) = self._log.popitem(last=False)
+            self.floor = seq
+
+
+class LiveSubscription:
+    def __init__(self, channel: LiveUpdateChannel) -> None:
+        self.channel = channel
+        self.cursor = channel.seq
+        self.delivered = 0
+        self.skipped = 0
+        self.closed = False
+
+    def next_batch(self, timeout: float) -> Optional[List[str]]:
+        seq, entries = self.channel.read(self.cursor, timeout)
+        if entries is not None:
+            self.skipped += max(seq - self.cursor - len(entries), 0)
+            self.delivered += len(entries)
+        self.cursor = seq
+        return entries
+
+
+class LiveUpdateBroadcaster:
+    def __init__(self, enabled: bool, *, max_subscribers: int = LIVE_PUSH_MAX_SUBSCRIBERS) -> None:
+        self._enabled = bool(enabled)
+        self._max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._inbox = threading.Condition()
+        self._pending: deque = deque()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._channels: Dict[Tuple[Any, ...], LiveUpdateChannel] = {}
+        self._subscribers = 0
+        self._stats = {
+            "published": 0,
+            "dispatched": 0,
+            "delivered": 0,
+            "skipped": 0,
+            "rejected": 0,
+            "resyncs": 0,
+            "lastDispatchMs": None,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    @property
+    def has_subscribers(self) -> bool:
+        return self._subscribers > 0
+
+    def start(self) -> bool:
+        if not self._enabled:
+            return False
+        if self.is_running:
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="live-push", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        with self._inbox:
+            self._inbox.notify_all()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout)
+
+    def publish(self, updates: Iterable[Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        if not self._subscribers:
+            return
+        batch = [*updates, *({"key": key, "removed": True} for key in removed)]
+        if not batch:
+            return
+        with self._inbox:
+            self._pending.append(batch)
+            self._inbox.notify()
+        with self._lock:
+            self._stats["published"] += len(batch)
+
+    def subscribe(
+        self,
+        *,
+        lines: Iterable[str] = (),
+        operators: Iterable[str] = (),
+        registrations: Iterable[str] = (),
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+    ) -> Optional[LiveSubscription]:
+        candidate = LiveUpdateChannel(lines=lines, operators=operators, registrations=registrations, bbox=bbox)
+        with self._lock:
+            if self._subscribers >= self._max_subscribers:
+                self._stats["rejected"] += 1
+                return None
+            channel = self._channels.setdefault(candidate.signature, candidate)
+            channel.subscribers += 1
+            self._subscribers += 1
+        self.start()
+        return LiveSubscription(channel)
+
+    def unsubscribe(self, subscription: LiveSubscription) -> None:
+        channel = subscription.channel
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            channel.subscribers -= 1
+            self._subscribers -= 1
+            if channel.subscribers <= 0 and self._channels.get(channel.signature) is channel:
+                del self._channels[channel.signature]
+            self._stats["delivered"] += subscription.delivered
+            self._stats["skipped"] += subscription.skipped
+
+    def record_resync(self) -> None:
+        with self._lock:
+            self._stats["resyncs"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["channels"] = len(self._channels)
+        stats.update(
+            {
+                "enabled": self._enabled,
+                "running": self.is_running,
+                "subscribers": self._subscribers,
+                "maxSubscribers": self._max_subscribers,
+                "queuedBatches": len(self._pending),
+            }
+        )
+        return stats
+
+    def _dispatch(self, batches: List[List[Dict[str, Any]]]) -> None:
+        started = time.perf_counter()
+        merged: Dict[str, Dict[str, Any]] = {}
+        for batch in batches:
+            for update in batch:
+                merged.pop(update["key"], None)
+                merged[update["key"]] = update
+        with self._lock:
+            channels = list(self._channels.values())
+        if not channels:
+            return
+        index = self._index(merged)
+        updates = index["updates"]
+        for channel in channels:
+            with channel.condition:
+                offered = 0
+                for key in channel.candidates(index):
+                    update, encoded = updates[key]
+                    if channel.offer(key, update, encoded):
+                        offered += 1
+                if offered:
+                    channel.condition.notify_all()
+        with self._lock:
+            self._stats["dispatched"] += len(merged)
+            self._stats["lastDispatchMs"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _index(self, merged: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        updates: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        lines: Dict[str, List[str]] = defaultdict(list)
+        operators: Dict[str, List[str]] = defaultdict(list)
+        cells: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        grid = LIVE_PUSH_GRID_CELLS_PER_DEGREE
+        for key, update in merged.items():
+            updates[key] = (update, app.json.dumps(update))
+            if update.get("removed"):
+                continue
+            for line in {normalise_text(update.get("line")).upper(), normalise_text(update.get("route")).upper()}:
+                if line:
+                    lines[line].append(key)
+            operator = normalise_text(update.get("op")).lower()
+            if operator:
+                operators[operator].append(key)
+            lat = update.get("lat")
+            lon = update.get("lon")
+            if lat is not None and lon is not None:
+                cells[(int(lat * grid // 1), int(lon * grid // 1))].append(key)
+        return {"updates": updates, "lines": lines, "operators": operators, "cells": cells}
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            with self._inbox:
+                if not self._pending:
+                    self._inbox.wait(1.0)
+                batches = list(self._pending)
+                self._pending.clear()
+            if not batches:
+                continue
+            try:
+                self._dispatch(batches)
+            except Exception as exc:
+                print(f"[live-push] Failed to dispatch {len(batches)} update batch(es): {exc}", flush=True)
+
+
+live_broadcaster = LiveUpdateBroadcaster(enabled=LIVE_PUSH_ENABLED)
+
+
+class LiveFleetSnapshot:
+    def __init__(
+        self,
+        fleet: Sequence[Dict[str, Any]],
+        sightings: Sequence[Dict[str, Any]],
+        meta: Dict[str, Any],
+        *,
+        deltas: Sequence[Dict[str, Any]] = (),
+        sighting_seq: int = 0,
+        gzip_level: int = LIVE_TRACKING_GZIP_LEVEL,
+    ) -> None:
+        self.fleet = tuple(fleet)
+        self.sightings = tuple(sightings)
+        self.meta = meta
+        self.by_key = {entry["vehicleKey"]: entry for entry in self.fleet}
+        self.deltas = tuple(deltas)
+        self.sighting_seq = sighting_seq
+        self.batch_id = normalise_text(meta.get("batchId"))
+        self.etag = self.batch_id or None
+        self.body = app.json.dumps(
+            {"fleet": self.fleet, "sightings": self.sightings, "meta": self.meta}
+        ).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=gzip_level) if gzip_level else None
+        self._gzip_level = gzip_level
+        self._variants: Dict[Tuple[Any, ...], Tuple[bytes, Optional[bytes]]] = {}
+
+    def payload(self) -> Dict[str, Any]:
+        return {
+            "fleet": [dict(entry) for entry in self.fleet],
+            "sightings": [dict(entry) for entry in self.sightings],
+            "meta": dict(self.meta),
+        }
+
+    def variant(
+        self,
+        *,
+        since: Optional[str] = None,
+        fields: Tuple[str, ...] = (),
+        sightings: bool = True,
+    ) -> Tuple[bytes, Optional[bytes]]:
+        # Unknown batch ids all get the same full response; keying them
+        # separately would let arbitrary ids fill the cache.
+        if since and since != self.batch_id and not any(delta["since"] == since for delta in self.deltas):
+            since = None
+        key = (since, fields, sightings)
+        cached = self._variants.get(key)
+        if cached is not None:
+            return cached
+        body = app.json.dumps(self._variant_payload(since, fields, sightings)).encode("utf-8")
+        gzip_body = (
+            gzip.compress(body, compresslevel=self._gzip_level)
+            if self._gzip_level and len(body) > 1024
+            else None
+        )
+        if len(self._variants) < LIVE_FLEET_VARIANT_CACHE_SIZE:
+            self._variants[key] = (body, gzip_body)
+        return body, gzip_body
+
+    def changes_since(
+        self, since: str
+    ) -> Optional[Tuple[Dict[str, Optional[Set[str]]], Set[str], int]]:
+        if since == self.batch_id:
+            return {}, set(), self.sighting_seq
+        for index, delta in enumerate(self.deltas):
+            if delta["since"] == since:
+                break
+        else:
+            return None
+        upserts: Dict[str, Optional[Set[str]]] = {}
+        removed: Set[str] = set()
+        for delta in self.deltas[index:]:
+            for vehicle_key in delta["removed"]:
+                upserts.pop(vehicle_key, None)
+                removed.add(vehicle_key)
+            for vehicle_key, changed in delta["upserts"].items():
+                removed.discard(vehicle_key)
+                if changed is None or (vehicle_key in upserts and upserts[vehicle_key] is None):
+                    upserts[vehicle_key] = None
+                else:
+                    upserts[vehicle_key] = upserts.get(vehicle_key, set()) | changed
+        return upserts, removed, self.deltas[index]["sinceSightingSeq"]
+
+    def _variant_payload(
+        self,
+        since: Optional[str],
+        fields: Tuple[str, ...],
+        sightings: bool,
+    ) -> Dict[str, Any]:
+        projection = [(name, LIVE_FLEET_FIELD_ALIASES.get(name, name)) for name in fields]
+
+        def project(entry: Dict[str, Any]) -> Dict[str, Any]:
+            if not projection:
+                return entry
+            return {name: entry[source] for name, source in projection if source in entry}
+
+        changes = self.changes_since(since) if since else None
+        if changes is None:
+            return {
+                "mode": "full",
+                "batchId": self.batch_id,
+                "fleet": [project(entry) for entry in self.fleet],
+                "removed": [],
+                "sightings": list(self.sightings) if sightings else [],
+                "meta": self.meta,
+            }
+
+        upserts, removed, since_seq = changes
+        sources = {source for _, source in projection}
+        fleet = [
+            project(self.by_key[vehicle_key])
+            for vehicle_key, changed in upserts.items()
+            if vehicle_key in self.by_key
+            and (changed is None or not sources or changed & sources)
+        ]
+        new_sightings = self.sighting_seq - since_seq
+        return {
+            "mode": "delta",
+            "since": since,
+            "batchId": self.batch_id,
+            "fleet": fleet,
+            "removed": sorted(removed),
+            "sightings": list(self.sightings[-new_sightings:]) if sightings and new_sightings > 0 else [],
+            "meta": self.meta,
+        }
+
+
+class LiveArrivalsPoller:
+    def __init__(self, enabled: bool, *, interval: int = LIVE_TRACKING_INTERVAL_SECONDS) -> None:
+        self._enabled = bool(enabled)
+        self._interval = max(int(interval), 5)
+        self._stale_after = timedelta(seconds=LIVE_TRACKING_STALE_SECONDS)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fleet: Dict[str, Dict[str, Any]] = {}
+        self._sightings: deque = deque(maxlen=LIVE_TRACKING_LOG_LIMIT)
+        self._last_meta: Dict[str, Any] = {}
+        self._last_cycle_started_at: Optional[str] = None
+        self._last_cycle_finished_at: Optional[str] = None
+        self._last_error: Optional[str] = None
+        self._scheduler = LinePollScheduler(min_interval=self._interval)
+        self._stats = {
+            "published": 0,
+            "lastPublishMs": None,
+            "bytes": 0,
+            "gzipBytes": None,
+            "requests": 0,
+            "notModified": 0,
+            "gzipServed": 0,
+            "deltaRequests": 0,
+            "bytesServed": 0,
+        }
+        self._deltas: deque = deque(maxlen=LIVE_TRACKING_DELTA_HISTORY)
+        self._sighting_seq = 0
+        self._published = LiveFleetSnapshot([], [], self._snapshot_meta({}))
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> bool:
+        if not self._enabled:
+            return False
+        if self.is_running:
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="live-arrivals", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._published.payload()
+
+    def published(self) -> LiveFleetSnapshot:
+        return self._published
+
+    def record_request(
+        self,
+        *,
+        not_modified: bool = False,
+        gzipped: bool = False,
+        delta: bool = False,
+        size: int = 0,
+    ) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bytesServed"] += size
+            if not_modified:
+                self._stats["notModified"] += 1
+            if gzipped:
+                self._stats["gzipServed"] += 1
+            if delta:
+                self._stats["deltaRequests"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        published = self._published
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(
+            {
+                "batchId": published.batch_id or None,
+                "fleetSize": len(published.fleet),
+                "sightings": len(published.sightings),
+                "deltaHistory": len(published.deltas),
+                "gzipLevel": LIVE_TRACKING_GZIP_LEVEL,
+            }
+        )
+        return stats
+
+    def _snapshot_meta(self, last_meta: Dict[str, Any]) -> Dict[str, Any]:
+        meta = dict(last_meta)
+        meta.update(
+            {
+                "enabled": self._enabled,
+                "running": self.is_running,
+                "intervalSeconds": self._interval,
+                "staleAfterSeconds": int(self._stale_after.total_seconds()),
+                "lastCycleStartedAt": self._last_cycle_started_at,
+                "lastCycleFinishedAt": self._last_cycle_finished_at,
+                "lastError": self._last_error,
+                "freshness": self._scheduler.freshness(),
+            }
+        )
+        return meta
+
+    def _publish(self) -> None:
+        started = time.perf_counter()
+        previous = self._published
+        meta = self._snapshot_meta(self._last_meta)
+        batch_id = normalise_text(meta.get("batchId"))
+        upserts: Dict[str, Optional[frozenset]] = {}
+        for vehicle_key, entry in self._fleet.items():
+            prior = previous.by_key.get(vehicle_key)
+            if prior is None:
+                upserts[vehicle_key] = None
+            elif prior is not entry:
+                changed = frozenset(
+                    field for field in entry.keys() | prior.keys() if entry.get(field) != prior.get(field)
+                )
+                if changed:
+                    upserts[vehicle_key] = changed
+        removed = frozenset(previous.by_key.keys() - self._fleet.keys())
+        if previous.batch_id and batch_id:
+            self._deltas.append(
+                {
+                    "since": previous.batch_id,
+                    "batchId": batch_id,
+                    "sinceSightingSeq": previous.sighting_seq,
+                    "upserts": upserts,
+                    "removed": removed,
+                }
+            )
+        live_broadcaster.publish(
+            (
+                _live_update_from_entry(self._fleet[vehicle_key])
+                for vehicle_key, changed in upserts.items()
+                if changed is None or changed & LIVE_PUSH_SOURCE_FIELDS
+            ),
+            removed,
+        )
+        published = LiveFleetSnapshot(
+            self._fleet.values(),
+            self._sightings,
+            meta,
+            deltas=self._deltas,
+            sighting_seq=self._sighting_seq,
+        )
+        self._published = published
+        with self._lock:
+            self._stats["published"] += 1
+            self._stats["lastPublishMs"] = round((time.perf_counter() - started) * 1000, 2)
+            self._stats["bytes"] = len(published.body)
+            self._stats["gzipBytes"] = len(published.gzip_body) if published.gzip_body is not None else None
+
+    def line_schedule(self) -> Dict[str, Any]:
+        return {
+            "lines": self._scheduler.line_states(),
+            "freshness": self._scheduler.freshness(),
+        }
+
+    def _run(self) -> None:
+        set_connection_class("ingest")
+        while not self._stop_event.is_set():
+            try:
+                active_lines = fetch_active_bus_lines()
+                if active_lines:
+                    self._scheduler.sync_lines(active_lines)
+            except Exception as exc:
+                print(f"[live-tracker] Failed to refresh line list: {exc}", flush=True)
+            due_lines = self._scheduler.due_lines(LIVE_TRACKING_LINES_PER_ROUND)
+            if not due_lines:
+                wait_for = self._scheduler.seconds_until_due()
+                self._stop_event.wait(min(wait_for if wait_for is not None else 5.0, 5.0) or 0.1)
+                continue
+
+            cycle_start = datetime.now(timezone.utc)
+            self._last_cycle_started_at = cycle_start.isoformat()
+            snapshot: Dict[str, Dict[str, Any]] = {}
+            log_entries: List[Dict[str, Any]] = []
+            meta: Dict[str, Any] = {}
+            line_results: Dict[str, Optional[Set[str]]] = {}
 
             try:
-                snapshot, log_entries, meta = collect_live_bus_snapshot(stop_event=self._stop_event)
+                snapshot, log_entries, meta = collect_live_bus_snapshot(
+                    stop_event=self._stop_event,
+                    lines=due_lines,
+                    line_results=line_results,
+                )
             except Exception as exc:
                 meta = {
                     "batchId": uuid.uuid4().hex,
@@ -4836,31 +8985,54 @@ class LiveArrivalsPoller:
                 self._last_error = str(exc)
                 print(f"[live-tracker] Failed to persist live snapshot: {exc}", flush=True)
             finally:
+                if self._stop_event.is_set():
+                    self._scheduler.record({key: value for key, value in line_results.items() if value is not None})
+                    self._scheduler.requeue(due_lines)
+                else:
+                    for line_id in due_lines:
+                        line_results.setdefault(line_id, None)
+                    self._scheduler.record(line_results)
                 self._update_state(snapshot, log_entries, meta)
-                cycle_end = datetime.now(timezone.utc)
-                self._last_cycle_finished_at = cycle_end.isoformat()
-                sleep_for = max(self._interval - (cycle_end - cycle_start).total_seconds(), 1.0)
-                self._stop_event.wait(sleep_for)
+                self._last_cycle_finished_at = datetime.now(timezone.utc).isoformat()
+                try:
+                    self._publish()
+                except Exception as exc:
+                    self._last_error = str(exc)
+                    print(f"[live-tracker] Failed to publish live snapshot: {exc}", flush=True)
 
     def _persist_snapshot(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
         now = datetime.now(timezone.utc)
+        vehicle_keys: List[str] = []
+        payloads: List[Dict[str, Any]] = []
+        for vehicle_key, record in snapshot.items():
+            seen_at_value = record.get("_seen_at")
+            if isinstance(seen_at_value, datetime):
+                seen_at = seen_at_value
+            else:
+                seen_at = parse_iso_datetime(seen_at_value) or now
+            vehicle_keys.append(vehicle_key)
+            payloads.append(self._build_payload(vehicle_key, record, seen_at))
+
         with get_connection() as connection:
-            for vehicle_key, record in snapshot.items():
-                seen_at_value = record.get("_seen_at")
-                if isinstance(seen_at_value, datetime):
-                    seen_at = seen_at_value
-                else:
-                    seen_at = parse_iso_datetime(seen_at_value) or now
-                payload = self._build_payload(vehicle_key, record, seen_at)
+            for start in range(0, len(payloads), FLEET_SIGHTING_BATCH_SIZE):
+                chunk = payloads[start : start + FLEET_SIGHTING_BATCH_SIZE]
                 try:
-                    record_bus_sighting(connection, payload, now=now)
+                    _, errors = record_bus_sightings_batch(connection, chunk, now=now)
                     connection.commit()
-                except ApiError as exc:
-                    connection.rollback()
-                    print(f"[live-tracker] Skipped sighting for {vehicle_key}: {exc}", flush=True)
                 except Exception as exc:
                     connection.rollback()
-                    print(f"[live-tracker] Error recording sighting for {vehicle_key}: {exc}", flush=True)
+                    operator_cache.invalidate()
+                    print(
+                        f"[live-tracker] Error recording {len(chunk)} sightings: {exc}",
+                        flush=True,
+                    )
+                    continue
+                for error in errors:
+                    vehicle_key = vehicle_keys[start + error.get("index", 0)]
+                    print(
+                        f"[live-tracker] Skipped sighting for {vehicle_key}: {error.get('error')}",
+                        flush=True,
+                    )
 
     def _build_payload(
         self,
@@ -4963,6 +9135,7 @@ class LiveArrivalsPoller:
                     if entry.get("longitude") is None:
                         entry.pop("longitude", None)
                     self._sightings.append(entry)
+                    self._sighting_seq += 1
 
             self._last_meta = {
                 "lastUpdated": now.isoformat(),
@@ -4970,6 +9143,8 @@ class LiveArrivalsPoller:
                 "linesRequested": meta.get("linesRequested"),
                 "linesSucceeded": meta.get("linesSucceeded"),
                 "requestsMade": meta.get("requestsMade"),
+                "batchesRequested": meta.get("batchesRequested"),
+                "batchSplits": meta.get("batchSplits"),
                 "batchId": meta.get("batchId"),
                 "errors": meta.get("errors"),
                 "startedAt": meta.get("startedAt"),
@@ -4977,38 +9152,410 @@ class LiveArrivalsPoller:
             }
 
 
-class TfLStreamIngestor:
-    def __init__(
-        self,
-        *,
-        enabled: bool,
-        stream_path: str,
-        return_list: str,
-        username: Optional[str] = None,
-        password: Optional[str] = None,
-    ) -> None:
-        self._enabled = bool(enabled and stream_path)
-        self._stream_path = stream_path
-        self._return_list = return_list
-        self._username = username
-        self._password = password
-        self._thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
-        self._lock = threading.Lock()
-        self._decoder = json.JSONDecoder()
-        self._buffer = ""
-        self._cleanup_interval = timedelta(seconds=FLEET_STREAM_CLEANUP_INTERVAL_SECONDS)
-        self._last_cleanup = datetime.now(timezone.utc)
-        self._last_prediction_monotonic = time.monotonic()
-        self._stats: Dict[str, Any] = {
-            "connected": False,
-            "messages": 0,
-            "predictions": 0,
-            "failures": 0,
-            "pruned": 0,
-            "lastConnectAt": None,
-            "lastDisconnectAt": None,
-        }
+URA_STOP_FIELDS: Tuple[str, ...] = (
+    "StopPointName",
+    "StopID",
+    "StopCode1",
+    "StopCode2",
+    "StopPointType",
+    "Towards",
+    "Bearing",
+    "StopPointIndicator",
+    "StopPointState",
+    "Latitude",
+    "Longitude",
+)
+URA_PREDICTION_FIELDS: Tuple[str, ...] = URA_STOP_FIELDS + (
+    "VisitNumber",
+    "LineID",
+    "LineName",
+    "DirectionID",
+    "DestinationText",
+    "DestinationName",
+    "VehicleID",
+    "TripID",
+    "RegistrationNumber",
+    "EstimatedTime",
+    "ExpireTime",
+)
+URA_RESPONSE_STOP = 0
+URA_RESPONSE_PREDICTION = 1
+URA_RESPONSE_BASE_VERSION = 3
+URA_RESPONSE_VERSION = 4
+_JSON_WHITESPACE = re.compile(r"\s*")
+
+
+def _ura_int(value: Any) -> Optional[int]:
+    if type(value) is int:
+        return value
+    return _prediction_as_int(value)
+
+
+def _ura_float(value: Any) -> Optional[float]:
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return float(value)
+    return _prediction_as_float(value)
+
+
+def _ura_datetime(value: Any) -> Optional[datetime]:
+    if type(value) is int and value > 0:
+        try:
+            return datetime.fromtimestamp(value / 1000.0, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    return _prediction_as_datetime(value)
+
+
+class URAStreamDecoder:
+    def __init__(self, return_list: str, *, max_pending_bytes: int = 1_000_000) -> None:
+        requested = {name.strip().lower() for name in (return_list or "").split(",") if name.strip()}
+        fields = [name for name in URA_PREDICTION_FIELDS if not requested or name.lower() in requested]
+        positions = {name: index + 1 for index, name in enumerate(fields)}
+        self._fields = tuple(fields)
+        self._width = len(fields) + 1
+        (
+            self._stop_name,
+            self._stop_id,
+            self._stop_code1,
+            self._stop_code2,
+            self._stop_type,
+            self._towards,
+            self._bearing,
+            self._indicator,
+            self._stop_state,
+            self._latitude,
+            self._longitude,
+            self._visit_number,
+            self._line_id,
+            self._line_name,
+            self._direction,
+            self._destination_text,
+            self._destination_name,
+            self._vehicle_id,
+            self._trip_id,
+            self._registration,
+            self._estimated_time,
+            self._expire_time,
+        ) = (positions.get(name) for name in URA_PREDICTION_FIELDS)
+        self._json = json.JSONDecoder()
+        self._max_pending_bytes = max(int(max_pending_bytes), 1)
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+        self._base_version: Optional[str] = None
+        self._stats: Dict[str, int] = {
+            "lines": 0,
+            "values": 0,
+            "predictions": 0,
+            "malformed": 0,
+            "overflows": 0,
+        }
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def reset(self) -> None:
+        self._pending = []
+        self._pending_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "pendingBytes": self._pending_bytes, "baseVersion": self._base_version}
+
+    def feed_line(self, line: str) -> Tuple[List[Dict[str, Any]], List[Any], int]:
+        infos: List[Dict[str, Any]] = []
+        messages: List[Any] = []
+        if not line:
+            return infos, messages, 0
+        self._stats["lines"] += 1
+        values = self._decode(line)
+        for value in values:
+            self._route(value, infos, messages)
+        self._stats["values"] += len(values)
+        self._stats["predictions"] += len(infos)
+        return infos, messages, len(values)
+
+    def _decode(self, line: str) -> List[Any]:
+        if self._pending:
+            self._pending.append(line)
+            text = "\n".join(self._pending)
+            values, rest = self._decode_many(text)
+            if rest is None:
+                self.reset()
+                return values
+            line_values, line_rest = self._decode_many(line)
+            if line_rest is None:
+                self._stats["malformed"] += 1
+                self.reset()
+                return line_values
+            self._pending = [rest]
+            self._pending_bytes = len(rest)
+        else:
+            try:
+                return [json.loads(line)]
+            except ValueError:
+                pass
+            values, rest = self._decode_many(line)
+            if rest is None:
+                return values
+            self._pending = [rest]
+            self._pending_bytes = len(rest)
+        if self._pending_bytes > self._max_pending_bytes:
+            self._stats["overflows"] += 1
+            print(
+                f"[tfl-stream] Discarding {self._pending_bytes} bytes of undecodable stream data",
+                flush=True,
+            )
+            self.reset()
+        return values
+
+    def _decode_many(self, text: str) -> Tuple[List[Any], Optional[str]]:
+        values: List[Any] = []
+        index = _JSON_WHITESPACE.match(text, 0).end()
+        end = len(text)
+        while index < end:
+            try:
+                value, index = self._json.raw_decode(text, index)
+            except ValueError:
+                return values, text[index:]
+            values.append(value)
+            index = _JSON_WHITESPACE.match(text, index).end()
+        return values, None
+
+    def _route(self, value: Any, infos: List[Dict[str, Any]], messages: List[Any]) -> None:
+        if isinstance(value, list) and value:
+            kind = value[0]
+            if type(kind) is int:
+                if kind == URA_RESPONSE_PREDICTION:
+                    info = self._prediction(value)
+                    if info is not None:
+                        infos.append(info)
+                elif kind == URA_RESPONSE_BASE_VERSION and len(value) > 1:
+                    self._base_version = normalise_text(value[1]) or self._base_version
+                return
+            if isinstance(kind, list):
+                for entry in value:
+                    self._route(entry, infos, messages)
+                return
+        messages.append(value)
+
+    def _prediction(self, row: List[Any]) -> Optional[Dict[str, Any]]:
+        if len(row) < self._width:
+            return None
+        vehicle_id = normalise_text(row[self._vehicle_id]) if self._vehicle_id else ""
+        if not vehicle_id:
+            return None
+        registration = normalise_reg_key(row[self._registration]) if self._registration else ""
+        if not registration:
+            registration = normalise_reg_key(vehicle_id)
+        line_id = normalise_text(row[self._line_id]) if self._line_id else ""
+        line_name = (normalise_text(row[self._line_name]) if self._line_name else "") or line_id
+        destination = ""
+        if self._destination_text:
+            destination = normalise_text(row[self._destination_text])
+        if not destination and self._destination_name:
+            destination = normalise_text(row[self._destination_name])
+
+        expire_time = None
+        expire_is_delete = False
+        if self._expire_time:
+            expire_value = row[self._expire_time]
+            if expire_value not in (None, ""):
+                if expire_value == 0 or normalise_text(expire_value).lower() in {"0", "false"}:
+                    expire_is_delete = True
+                else:
+                    expire_time = _ura_datetime(expire_value)
+
+        return {
+            "vehicle_id": vehicle_id,
+            "registration": registration or None,
+            "line_id": line_id or None,
+            "line_name": line_name or None,
+            "line_mode": "bus",
+            "direction": _ura_int(row[self._direction]) if self._direction else None,
+            "destination": destination or None,
+            "stop_id": (normalise_text(row[self._stop_id]) if self._stop_id else "") or None,
+            "stop_name": (normalise_text(row[self._stop_name]) if self._stop_name else "") or None,
+            "stop_code1": (normalise_text(row[self._stop_code1]) if self._stop_code1 else "") or None,
+            "stop_code2": (normalise_text(row[self._stop_code2]) if self._stop_code2 else "") or None,
+            "stop_state": (normalise_text(row[self._stop_state]) if self._stop_state else "") or None,
+            "stop_type": (normalise_text(row[self._stop_type]) if self._stop_type else "") or None,
+            "stop_indicator": (normalise_text(row[self._indicator]) if self._indicator else "") or None,
+            "stop_towards": (normalise_text(row[self._towards]) if self._towards else "") or None,
+            "stop_bearing": _ura_int(row[self._bearing]) if self._bearing else None,
+            "latitude": _ura_float(row[self._latitude]) if self._latitude else None,
+            "longitude": _ura_float(row[self._longitude]) if self._longitude else None,
+            "visit_number": _ura_int(row[self._visit_number]) if self._visit_number else None,
+            "trip_id": _ura_int(row[self._trip_id]) if self._trip_id else None,
+            "estimated_time": _ura_datetime(row[self._estimated_time]) if self._estimated_time else None,
+            "expire_time": expire_time,
+            "expire_is_delete": expire_is_delete,
+            "base_version": self._base_version,
+            "timestamp": None,
+            "raw": row,
+        }
+
+
+class StreamIngestQueue:
+    def __init__(
+        self,
+        *,
+        capacity: int = FLEET_STREAM_QUEUE_SIZE,
+        overflow: str = FLEET_STREAM_QUEUE_OVERFLOW,
+    ) -> None:
+        self._capacity = max(int(capacity), 1)
+        self._overflow = overflow
+        self._entries: deque = deque()
+        self._pending_by_vehicle: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._stats: Dict[str, Any] = {
+            "enqueued": 0,
+            "dequeued": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "blockedSeconds": 0.0,
+            "highWatermark": 0,
+            "lastLagSeconds": None,
+            "maxLagSeconds": 0.0,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def put_many(self, infos: Iterable[Dict[str, Any]], stop_event: Optional[threading.Event] = None) -> None:
+        superseded: List[Dict[str, Any]] = []
+        with self._lock:
+            for info in infos:
+                key = info.get("vehicle_id")
+                while len(self._entries) >= self._capacity:
+                    if self._overflow == "coalesce":
+                        pending = self._pending_by_vehicle.get(key) if key else None
+                        if pending is not None:
+                            superseded.append(pending[1])
+                            pending[1] = info
+                            self._stats["coalesced"] += 1
+                            break
+                    if self._overflow == "block":
+                        if stop_event is not None and stop_event.is_set():
+                            return
+                        started = time.monotonic()
+                        self._not_full.wait(timeout=1.0)
+                        self._stats["blockedSeconds"] += time.monotonic() - started
+                        continue
+                    self._discard_oldest()
+                else:
+                    entry = [key, info, time.monotonic()]
+                    self._entries.append(entry)
+                    if key:
+                        self._pending_by_vehicle[key] = entry
+                    self._stats["enqueued"] += 1
+                    if len(self._entries) > self._stats["highWatermark"]:
+                        self._stats["highWatermark"] = len(self._entries)
+                    self._not_empty.notify()
+        if superseded:
+            vehicle_history_writer.add(
+                _vehicle_history_row(info, datetime.now(timezone.utc)) for info in superseded
+            )
+
+    def _discard_oldest(self) -> None:
+        key, _, _ = entry = self._entries.popleft()
+        if key and self._pending_by_vehicle.get(key) is entry:
+            del self._pending_by_vehicle[key]
+        self._stats["dropped"] += 1
+
+    def get_batch(self, max_items: int, timeout: float = 1.0, linger: float = 0.0) -> List[Dict[str, Any]]:
+        with self._lock:
+            if not self._entries:
+                self._not_empty.wait(timeout=timeout)
+            if not self._entries:
+                return []
+            if linger > 0:
+                deadline = self._entries[0][2] + linger
+                while 0 < len(self._entries) < max_items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._not_empty.wait(timeout=remaining)
+                if not self._entries:
+                    return []
+            now = time.monotonic()
+            batch: List[Dict[str, Any]] = []
+            oldest_lag = now - self._entries[0][2]
+            while self._entries and len(batch) < max_items:
+                key, info, _ = entry = self._entries.popleft()
+                if key and self._pending_by_vehicle.get(key) is entry:
+                    del self._pending_by_vehicle[key]
+                batch.append(info)
+            self._stats["dequeued"] += len(batch)
+            self._stats["lastLagSeconds"] = round(oldest_lag, 3)
+            if oldest_lag > self._stats["maxLagSeconds"]:
+                self._stats["maxLagSeconds"] = round(oldest_lag, 3)
+            self._not_full.notify_all()
+            return batch
+
+    def wake_all(self) -> None:
+        with self._lock:
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            depth = len(self._entries)
+            oldest = time.monotonic() - self._entries[0][2] if self._entries else 0.0
+        stats["blockedSeconds"] = round(stats["blockedSeconds"], 3)
+        stats.update(
+            {
+                "depth": depth,
+                "capacity": self._capacity,
+                "overflow": self._overflow,
+                "oldestPendingSeconds": round(oldest, 3),
+            }
+        )
+        return stats
+
+
+class TfLStreamIngestor:
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        stream_path: str,
+        return_list: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+    ) -> None:
+        self._enabled = bool(enabled and stream_path)
+        self._stream_path = stream_path
+        self._return_list = return_list
+        self._username = username
+        self._password = password
+        self._thread: Optional[threading.Thread] = None
+        self._writers: List[Optional[threading.Thread]] = [None] * FLEET_STREAM_WRITER_WORKERS
+        shard_capacity = max(FLEET_STREAM_QUEUE_SIZE // FLEET_STREAM_WRITER_WORKERS, 1)
+        self._queues = [StreamIngestQueue(capacity=shard_capacity) for _ in range(FLEET_STREAM_WRITER_WORKERS)]
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._decoder = URAStreamDecoder(return_list)
+        self._cleanup_interval = timedelta(seconds=FLEET_STREAM_CLEANUP_INTERVAL_SECONDS)
+        self._last_cleanup = datetime.now(timezone.utc)
+        self._last_prediction_monotonic = time.monotonic()
+        self._stats: Dict[str, Any] = {
+            "connected": False,
+            "messages": 0,
+            "predictions": 0,
+            "failures": 0,
+            "pruned": 0,
+            "vehicleUpdates": 0,
+            "batchesWritten": 0,
+            "writeFailures": 0,
+            "lastConnectAt": None,
+            "lastDisconnectAt": None,
+        }
 
     @property
     def enabled(self) -> bool:
@@ -5021,9 +9568,21 @@ class TfLStreamIngestor:
     def start(self) -> bool:
         if not self._enabled:
             return False
-        if self.is_running():
+        if self.is_running:
             return True
         self._stop_event.clear()
+        for index, queue in enumerate(self._queues):
+            current = self._writers[index]
+            if current is not None and current.is_alive():
+                continue
+            writer = threading.Thread(
+                target=self._run_writer,
+                args=(queue,),
+                name=f"tfl-stream-writer-{index}",
+                daemon=True,
+            )
+            writer.start()
+            self._writers[index] = writer
         self._thread = threading.Thread(target=self._run, name="tfl-stream", daemon=True)
         self._thread.start()
         return True
@@ -5033,10 +9592,42 @@ class TfLStreamIngestor:
         thread = self._thread
         if thread and thread.is_alive():
             thread.join(timeout=timeout)
+        for queue in self._queues:
+            queue.wake_all()
+        for writer in self._writers:
+            if writer is not None and writer.is_alive():
+                writer.join(timeout=timeout)
+        vehicle_history_writer.flush()
 
     def snapshot(self) -> Dict[str, Any]:
         with self._lock:
-            return dict(self._stats)
+            stats = dict(self._stats)
+        stats["writers"] = sum(1 for writer in self._writers if writer is not None and writer.is_alive())
+        stats["queue"] = self._queue_stats()
+        stats["decoder"] = self._decoder.stats()
+        stats["fieldPlans"] = _stream_prediction_plans.stats()
+        return stats
+
+    def _queue_stats(self) -> Dict[str, Any]:
+        shards = [queue.stats() for queue in self._queues]
+        merged: Dict[str, Any] = {
+            "shards": len(shards),
+            "overflow": shards[0]["overflow"],
+        }
+        for key in ("enqueued", "dequeued", "dropped", "coalesced", "depth", "capacity", "highWatermark"):
+            merged[key] = sum(shard[key] for shard in shards)
+        merged["blockedSeconds"] = round(sum(shard["blockedSeconds"] for shard in shards), 3)
+        lags = [shard["lastLagSeconds"] for shard in shards if shard["lastLagSeconds"] is not None]
+        merged["lastLagSeconds"] = max(lags) if lags else None
+        merged["maxLagSeconds"] = max(shard["maxLagSeconds"] for shard in shards)
+        merged["oldestPendingSeconds"] = max(shard["oldestPendingSeconds"] for shard in shards)
+        return merged
+
+    def _shard_for(self, info: Dict[str, Any]) -> int:
+        # Every prediction for a vehicle goes to the same writer, so its
+        # batches commit in arrival order and never move the vehicle backwards.
+        key = info.get("vehicle_id") or info.get("registration") or ""
+        return zlib.crc32(str(key).encode("utf-8")) % len(self._queues)
 
     def _resolve_url(self) -> str:
         target = (self._stream_path or "").strip()
@@ -5054,29 +9645,6 @@ class TfLStreamIngestor:
             params["ReturnList"] = self._return_list
         return params, headers
 
-    def _decode_chunk(self, chunk: str) -> List[Any]:
-        if not chunk:
-            return []
-        self._buffer += chunk
-        results: List[Any] = []
-        while True:
-            stripped = self._buffer.lstrip()
-            if not stripped:
-                self._buffer = ""
-                break
-            offset = len(self._buffer) - len(stripped)
-            if offset:
-                self._buffer = stripped
-            try:
-                value, index = self._decoder.raw_decode(self._buffer)
-            except ValueError:
-                break
-            results.append(value)
-            self._buffer = self._buffer[index:]
-        if len(self._buffer) > 1_000_000:
-            self._buffer = ""
-        return results
-
     def _extract_predictions(self, message: Any) -> List[Dict[str, Any]]:
         predictions: List[Dict[str, Any]] = []
         if isinstance(message, list):
@@ -5156,42 +9724,116 @@ class TfLStreamIngestor:
     def _log(self, message: str) -> None:
         print(f"[tfl-stream] {message}", flush=True)
 
-    def _ingest_predictions(self, predictions: List[Dict[str, Any]]) -> None:
+    def _enqueue_predictions(self, predictions: List[Dict[str, Any]]) -> None:
         prepared: List[Dict[str, Any]] = []
         for prediction in predictions:
             info = _prepare_stream_prediction(prediction)
             if info:
                 prepared.append(info)
+        self._enqueue_prepared(prepared)
+
+    def _enqueue_prepared(self, prepared: List[Dict[str, Any]]) -> None:
         if not prepared:
             return
+        self._last_prediction_monotonic = time.monotonic()
+        if len(self._queues) == 1:
+            self._queues[0].put_many(prepared, stop_event=self._stop_event)
+            return
+        routed: Dict[int, List[Dict[str, Any]]] = {}
+        for info in prepared:
+            routed.setdefault(self._shard_for(info), []).append(info)
+        for index in sorted(routed):
+            self._queues[index].put_many(routed[index], stop_event=self._stop_event)
+
+    def _cleanup_due(self, now: datetime) -> bool:
+        if not self._cleanup_interval:
+            return False
+        with self._lock:
+            if now - self._last_cleanup < self._cleanup_interval:
+                return False
+            self._last_cleanup = now
+            return True
+
+    def _apply_predictions(self, prepared: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+        with get_connection() as connection:
+            try:
+                vehicles = apply_stream_predictions(connection, prepared, now)
+                if self._cleanup_due(now):
+                    cutoff = now - timedelta(minutes=FLEET_STREAM_INACTIVE_MINUTES)
+                    pruned = _prune_inactive_vehicles(connection, cutoff)
+                    if pruned:
+                        self._stats_increment("pruned", pruned)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        return vehicles
 
+    def _write_predictions(self, prepared: List[Dict[str, Any]]) -> None:
         now = datetime.now(timezone.utc)
         try:
-            with get_connection() as connection:
-                for info in prepared:
-                    apply_stream_prediction(connection, info, now)
-                if self._cleanup_interval:
-                    if now - self._last_cleanup >= self._cleanup_interval:
-                        cutoff = now - timedelta(minutes=FLEET_STREAM_INACTIVE_MINUTES)
-                        pruned = _prune_inactive_vehicles(connection, cutoff)
-                        if pruned:
-                            self._stats_increment("pruned", pruned)
-                        self._last_cleanup = now
-                connection.commit()
-        except Exception:
-            raise
-        else:
-            self._stats_increment("predictions", len(prepared))
-            self._last_prediction_monotonic = time.monotonic()
+            vehicles = self._apply_predictions(prepared, now)
+        except TransactionRollbackError:
+            vehicles = self._apply_predictions(prepared, now)
+        self._stats_increment("predictions", len(prepared))
+        self._stats_increment("vehicleUpdates", len(vehicles))
+        self._stats_increment("batchesWritten")
+        self._broadcast(prepared)
+        vehicle_history_writer.add(_vehicle_history_row(info, now) for info in prepared)
 
         try:
             with get_connection() as connection:
-                for info in prepared:
-                    _record_stream_sighting(connection, info, now)
+                _record_stream_sightings(connection, vehicles, now)
                 connection.commit()
         except Exception as exc:
+            operator_cache.invalidate()
             self._log(f"Failed to persist derived sighting batch: {exc}")
 
+    def _broadcast(self, prepared: List[Dict[str, Any]]) -> None:
+        if not live_broadcaster.has_subscribers:
+            return
+        known = live_tracker.published().by_key
+        updates: List[Dict[str, Any]] = []
+        for info in prepared:
+            key = normalise_reg_key(info.get("registration") or info.get("vehicle_id"))
+            if not key or info.get("expire_is_delete"):
+                continue
+            timestamp = info.get("timestamp")
+            updates.append(
+                _live_update_record(
+                    key,
+                    source="stream",
+                    registration=info.get("registration"),
+                    line=info.get("line_id"),
+                    route=info.get("line_name"),
+                    operator=(known.get(key) or {}).get("operator"),
+                    destination=info.get("destination"),
+                    stop=info.get("stop_name"),
+                    stop_latitude=info.get("latitude"),
+                    stop_longitude=info.get("longitude"),
+                    timestamp=timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+                )
+            )
+        live_broadcaster.publish(updates)
+
+    def _run_writer(self, queue: StreamIngestQueue) -> None:
+        set_connection_class("ingest")
+        while True:
+            batch = queue.get_batch(
+                FLEET_STREAM_WRITE_BATCH_SIZE,
+                timeout=1.0,
+                linger=FLEET_STREAM_COALESCE_WINDOW_MS / 1000,
+            )
+            if not batch:
+                if self._stop_event.is_set():
+                    break
+                continue
+            try:
+                self._write_predictions(batch)
+            except Exception as exc:
+                self._stats_increment("writeFailures")
+                self._log(f"Failed to write {len(batch)} predictions: {exc}")
+
     def _stream_once(self) -> None:
         url = self._resolve_url()
         params, headers = self._build_request_kwargs()
@@ -5199,7 +9841,7 @@ class TfLStreamIngestor:
         request_headers = {key: value for key, value in headers.items() if value not in (None, "")}
         auth = HTTPDigestAuth(self._username, self._password) if self._username and self._password else None
 
-        self._buffer = ""
+        self._decoder.reset()
         with requests.Session() as session:
             response = session.get(
                 url,
@@ -5218,15 +9860,13 @@ class TfLStreamIngestor:
                         break
                     if chunk is None:
                         continue
-                    decoded = self._decode_chunk(chunk)
-                    if not decoded:
-                        continue
-                    for message in decoded:
-                        self._stats_increment("messages")
+                    infos, messages, decoded = self._decoder.feed_line(chunk)
+                    self._stats_increment("messages", decoded)
+                    self._enqueue_prepared(infos)
+                    for message in messages:
                         predictions = self._extract_predictions(message)
-                        if not predictions:
-                            continue
-                        self._ingest_predictions(predictions)
+                        if predictions:
+                            self._enqueue_predictions(predictions)
             finally:
                 response.close()
                 self._mark_disconnected()
@@ -5262,6 +9902,108 @@ class TfLStreamIngestor:
         self._mark_disconnected()
 
 
+class PartitionMaintainer:
+    def __init__(
+        self,
+        enabled: bool,
+        *,
+        interval: int = FLEET_PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._interval = max(int(interval), 60)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_run_at: Optional[str] = None
+        self._last_created: List[str] = []
+        self._last_removed: Dict[str, List[str]] = {}
+        self._last_pruned_images = 0
+        self._last_error: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> bool:
+        if not self._enabled:
+            return False
+        if self.is_running:
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-maintenance", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout)
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        reference = now or datetime.now(timezone.utc)
+        ensure_database_initialised()
+        created: List[str] = []
+        errors: List[str] = []
+        with get_connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('routeflow-partitions'))")
+                    for table in PARTITIONED_TABLES:
+                        created.extend(ensure_table_partitions(cursor, table, reference, errors))
+                removed = apply_partition_retention(connection, reference)
+                pruned_images = prune_fleet_images(connection, reference)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        with self._lock:
+            self._last_run_at = reference.isoformat()
+            self._last_created = created
+            self._last_removed = removed
+            self._last_pruned_images = pruned_images
+            self._last_error = "; ".join(errors) or None
+        for name in created:
+            print(f"[partitions] Created partition {name}", flush=True)
+        for table, names in removed.items():
+            action = "Detached" if FLEET_PARTITION_ARCHIVE_POLICY == "detach" else "Dropped"
+            print(f"[partitions] {action} {len(names)} expired {table} partition(s)", flush=True)
+        if pruned_images:
+            print(f"[fleet-images] Pruned {pruned_images} unreferenced image(s)", flush=True)
+        return {"created": created, "removed": removed, "prunedImages": pruned_images, "errors": errors}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self._enabled,
+                "running": self.is_running,
+                "interval": FLEET_PARTITION_INTERVAL,
+                "archivePolicy": FLEET_PARTITION_ARCHIVE_POLICY,
+                "retentionDays": {table: _partition_retention_days(table) for table in PARTITIONED_TABLES},
+                "lastRunAt": self._last_run_at,
+                "lastCreated": list(self._last_created),
+                "lastRemoved": {table: list(names) for table, names in self._last_removed.items()},
+                "lastPrunedImages": self._last_pruned_images,
+                "lastError": self._last_error,
+            }
+
+    def _run(self) -> None:
+        set_connection_class("maintenance")
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                with self._lock:
+                    self._last_error = str(exc)
+                print(f"[partitions] Maintenance failed: {exc}", flush=True)
+            if self._stop_event.wait(self._interval):
+                break
+
+
 live_tracker = LiveArrivalsPoller(enabled=LIVE_TRACKING_ENABLED)
 if LIVE_TRACKING_ENABLED:
     try:
@@ -5284,6 +10026,14 @@ if stream_listener.enabled:
         print(f"[tfl-stream] Failed to start stream listener: {exc}", flush=True)
 
 
+partition_maintainer = PartitionMaintainer(enabled=FLEET_PARTITION_MAINTENANCE_ENABLED)
+if partition_maintainer.enabled:
+    try:
+        partition_maintainer.start()
+    except Exception as exc:
+        print(f"[partitions] Failed to start maintenance thread: {exc}", flush=True)
+
+
 def upsert_collection_item(
     connection,
     collection: str,
@@ -5327,18 +10077,34 @@ def fetch_collection_items(connection, collection: str) -> List[Dict[str, Any]]:
         return cursor.fetchall() or []
 
 
-def _fetch_canonical_fleet_rows(connection) -> List[Dict[str, Any]]:
+def _fetch_canonical_fleet_rows(
+    connection,
+    *,
+    since: Optional[datetime] = None,
+    reg_keys: Optional[Iterable[str]] = None,
+) -> List[Dict[str, Any]]:
+    conditions: List[str] = []
+    params: List[Any] = []
+    if since is not None:
+        conditions.append("(b.updated_at > %s OR o.updated_at > %s)")
+        params.extend([since, since])
+    if reg_keys is not None:
+        conditions.append("b.reg = ANY(%s)")
+        params.append(list(reg_keys))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     with connection.cursor(cursor_factory=RealDictCursor) as cursor:
         cursor.execute(
-            """
+            f"""
             SELECT
                 b.*,
                 o.name AS operator_name,
                 o.short_name AS operator_short_name
             FROM buses b
             LEFT JOIN operators o ON o.operator_id = b.operator_id
+            {where}
             ORDER BY b.reg ASC
-            """
+            """,
+            params,
         )
         return cursor.fetchall() or []
 
@@ -5453,39 +10219,59 @@ def _merge_bus_details(base: Dict[str, Any], overrides: Optional[Dict[str, Any]]
     return merged
 
 
-def _build_fleet_bus_map(
-    connection,
+def _fleet_fallback_entry(reg_key: str, override: Dict[str, Any]) -> Dict[str, Any]:
+    fallback = dict(override)
+    fallback["regKey"] = reg_key
+    fallback.setdefault("registration", fallback.get("regKey"))
+    fallback.setdefault("extras", fallback.get("extras") or [])
+    fallback.setdefault("badges", fallback.get("badges") or [])
+    if "lastUpdated" in fallback:
+        fallback["lastUpdated"] = normalise_datetime(fallback.get("lastUpdated"))
+    if "createdAt" in fallback:
+        fallback["createdAt"] = normalise_datetime(fallback.get("createdAt"))
+    if not normalise_text(fallback.get("lastUpdated")):
+        fallback["lastUpdated"] = fallback.get("createdAt") or fallback.get("registrationDate")
+    return fallback
+
+
+def _fleet_bus_entry(
+    reg_key: str,
+    canonical: Optional[Dict[str, Any]],
+    override: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    if canonical:
+        return _merge_bus_details(canonical, override)
+    if override is None:
+        return None
+    return _fleet_fallback_entry(reg_key, override)
+
+
+def _fetch_canonical_fleet_map(connection, **filters: Any) -> Dict[str, Dict[str, Any]]:
+    canonical: Dict[str, Dict[str, Any]] = {}
+    for row in _fetch_canonical_fleet_rows(connection, **filters):
+        record = _serialise_canonical_fleet_bus(row)
+        if record:
+            canonical[record["regKey"]] = record
+    return canonical
+
+
+def _merge_fleet_buses(
+    canonical: Dict[str, Dict[str, Any]],
     curated: Dict[str, Dict[str, Any]],
 ) -> Dict[str, Dict[str, Any]]:
     fleet: Dict[str, Dict[str, Any]] = {}
-    remaining = set(curated.keys())
+    for reg_key in list(canonical) + [key for key in curated if key not in canonical]:
+        entry = _fleet_bus_entry(reg_key, canonical.get(reg_key), curated.get(reg_key))
+        if entry is not None:
+            fleet[reg_key] = entry
+    return fleet
 
-    for row in _fetch_canonical_fleet_rows(connection):
-        canonical = _serialise_canonical_fleet_bus(row)
-        if not canonical:
-            continue
-        reg_key = canonical["regKey"]
-        override = curated.get(reg_key)
-        if override:
-            remaining.discard(reg_key)
-        fleet[reg_key] = _merge_bus_details(canonical, override)
-
-    for reg_key in remaining:
-        override = curated.get(reg_key) or {}
-        fallback = dict(override)
-        fallback["regKey"] = reg_key
-        fallback.setdefault("registration", fallback.get("regKey"))
-        fallback.setdefault("extras", fallback.get("extras") or [])
-        fallback.setdefault("badges", fallback.get("badges") or [])
-        if "lastUpdated" in fallback:
-            fallback["lastUpdated"] = normalise_datetime(fallback.get("lastUpdated"))
-        if "createdAt" in fallback:
-            fallback["createdAt"] = normalise_datetime(fallback.get("createdAt"))
-        if not normalise_text(fallback.get("lastUpdated")):
-            fallback["lastUpdated"] = fallback.get("createdAt") or fallback.get("registrationDate")
-        fleet[reg_key] = fallback
 
-    return fleet
+def _build_fleet_bus_map(
+    connection,
+    curated: Dict[str, Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    return _merge_fleet_buses(_fetch_canonical_fleet_map(connection), curated)
 
 
 def normalise_url(value: Any) -> str:
@@ -5902,32 +10688,59 @@ def admin_content_collection(collection_name: str):
 
     return jsonify({"items": items})
 def ensure_fleet_option(connection, field: str, value: Any) -> None:
-    if field not in FLEET_OPTION_FIELDS:
-        return
-    text = normalise_text(value)
-    if not text:
-        return
-    collection = f"{FLEET_OPTION_PREFIX}{field}"
-    item_id = normalise_option_id(text)
-    if not item_id:
-        return
-    upsert_collection_item(connection, collection, item_id, {"value": text})
+    ensure_fleet_options(connection, [(field, value)])
 
 
-def fetch_fleet_options(connection) -> Dict[str, List[str]]:
-    options: Dict[str, List[str]] = {field: [] for field in FLEET_OPTION_FIELDS}
+def _fleet_option_values(bus: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    values: List[Tuple[str, Any]] = []
     for field in FLEET_OPTION_FIELDS:
-        collection = f"{FLEET_OPTION_PREFIX}{field}"
-        rows = fetch_collection_items(connection, collection)
-        values = []
-        for row in rows:
-            data = row.get("data") or {}
-            value = normalise_text(data.get("value"))
-            if value:
-                values.append(value)
-        unique = sorted(set(values), key=lambda item: item.lower())
-        options[field] = unique
-    return options
+        if field == "extras":
+            values.extend((field, tag) for tag in bus.get("extras", []))
+        else:
+            values.append((field, bus.get(field)))
+    return values
+
+
+def ensure_fleet_options(connection, entries: Iterable[Tuple[str, Any]]) -> int:
+    rows: Dict[Tuple[str, str], str] = {}
+    for field, value in entries:
+        if field not in FLEET_OPTION_FIELDS:
+            continue
+        text = normalise_text(value)
+        option_id = normalise_option_id(text)
+        if option_id:
+            rows[(field, option_id)] = text
+    if not rows:
+        return 0
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor,
+            """
+            INSERT INTO fleet_options (field, option_id, value)
+            VALUES %s
+            ON CONFLICT (field, option_id)
+            DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()
+            WHERE fleet_options.value IS DISTINCT FROM EXCLUDED.value
+            """,
+            [(field, option_id, text) for (field, option_id), text in rows.items()],
+            page_size=1000,
+        )
+    return len(rows)
+
+
+def fetch_fleet_options(connection) -> Dict[str, List[str]]:
+    values: Dict[str, Set[str]] = {field: set() for field in FLEET_OPTION_FIELDS}
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT field, value FROM fleet_options")
+        rows = cursor.fetchall()
+    for field, value in rows:
+        text = normalise_text(value)
+        if field in values and text:
+            values[field].add(text)
+    return {
+        field: sorted(values[field], key=lambda item: item.lower())
+        for field in FLEET_OPTION_FIELDS
+    }
 
 
 def sanitise_bus_payload(
@@ -6021,23 +10834,90 @@ def update_new_bus_state(bus: Dict[str, Any], *, now: Optional[datetime] = None)
     return changed
 
 
-def get_fleet_bus(connection, reg_key: str) -> Optional[Dict[str, Any]]:
-    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
-        cursor.execute(
-            """
-            SELECT item_id, data
-            FROM app_collections
-            WHERE collection = %s AND item_id = %s
-            """,
-            (FLEET_COLLECTION_BUSES, reg_key),
+_FLEET_CURATED_TEXT_FIELDS: Dict[str, str] = {
+    "fleetNumber": "fleet_number",
+    "operator": "operator",
+    "status": "status",
+    "wrap": "wrap",
+    "vehicleType": "vehicle_type",
+    "doors": "doors",
+    "engineType": "engine_type",
+    "engine": "engine",
+    "chassis": "chassis",
+    "bodyType": "body_type",
+    "registrationDate": "registration_date",
+    "garage": "garage",
+    "length": "length",
+}
+
+_FLEET_CURATED_COLUMNS: List[str] = [
+    "reg_key",
+    "registration",
+    *_FLEET_CURATED_TEXT_FIELDS.values(),
+    "extras",
+    "new_until",
+    "is_new_bus",
+    "is_rare_working",
+    "gallery",
+    "created_at",
+    "last_updated",
+]
+
+
+def _fleet_curated_record(bus: Dict[str, Any]) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        "reg_key": bus["regKey"],
+        "registration": normalise_text(bus.get("registration")) or bus["regKey"],
+    }
+    for key, column in _FLEET_CURATED_TEXT_FIELDS.items():
+        record[column] = normalise_text(bus.get(key))
+    record["extras"] = sanitise_extras(bus.get("extras"))
+    record["new_until"] = parse_iso_datetime(bus.get("newUntil"))
+    record["is_new_bus"] = to_bool(bus.get("isNewBus"))
+    record["is_rare_working"] = to_bool(bus.get("isRareWorking"))
+    record["gallery"] = bus.get("gallery") or []
+    now = datetime.now(timezone.utc)
+    record["created_at"] = parse_iso_datetime(bus.get("createdAt")) or now
+    record["last_updated"] = parse_iso_datetime(bus.get("lastUpdated")) or now
+    return record
+
+
+def _serialise_fleet_curated(row: Dict[str, Any]) -> Dict[str, Any]:
+    bus: Dict[str, Any] = {
+        "regKey": row["reg_key"],
+        "registration": row.get("registration") or row["reg_key"],
+    }
+    for key, column in _FLEET_CURATED_TEXT_FIELDS.items():
+        bus[key] = row.get(column) or ""
+    bus["extras"] = list(row.get("extras") or [])
+    bus["newUntil"] = normalise_datetime(row.get("new_until"))
+    bus["isNewBus"] = bool(row.get("is_new_bus"))
+    bus["isRareWorking"] = bool(row.get("is_rare_working"))
+    bus["createdAt"] = normalise_datetime(row.get("created_at"))
+    bus["lastUpdated"] = normalise_datetime(row.get("last_updated"))
+    bus["gallery"] = row.get("gallery") or []
+    return bus
+
+
+def _fetch_fleet_curated(
+    connection,
+    reg_keys: Optional[Iterable[str]] = None,
+    *,
+    for_update: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    where = "" if reg_keys is None else "WHERE reg_key = ANY(%s)"
+    lock = " FOR UPDATE" if for_update else ""
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            f"SELECT * FROM fleet_curated {where} ORDER BY reg_key{lock}",
+            () if reg_keys is None else (list(reg_keys),),
         )
-        row = cursor.fetchone()
-        if not row:
-            return None
-        data = row.get("data") or {}
-        data.setdefault("regKey", row.get("item_id") or reg_key)
-        data.setdefault("registration", data.get("registration") or data.get("regKey") or reg_key)
-        return data
+        rows = cursor.fetchall() or []
+    return {row["reg_key"]: _serialise_fleet_curated(row) for row in rows}
+
+
+def get_fleet_bus(connection, reg_key: str) -> Optional[Dict[str, Any]]:
+    return _fetch_fleet_curated(connection, [reg_key]).get(reg_key)
 
 
 def upsert_fleet_bus(
@@ -6047,21 +10927,67 @@ def upsert_fleet_bus(
     fallback_created_at: Optional[str] = None,
 ) -> Dict[str, Any]:
     sanitized = sanitise_bus_payload(payload, fallback_created_at=fallback_created_at)
+    upsert_fleet_buses(connection, [sanitized])
+    return _serialise_fleet_curated(_fleet_curated_record(sanitized))
 
-    for field in FLEET_OPTION_FIELDS:
-        if field == "extras":
-            for tag in sanitized.get("extras", []):
-                ensure_fleet_option(connection, field, tag)
-        else:
-            ensure_fleet_option(connection, field, sanitized.get(field))
 
-    row = upsert_collection_item(
+def upsert_fleet_buses(
+    connection,
+    buses: Sequence[Dict[str, Any]],
+    *,
+    overwrite: bool = True,
+) -> None:
+    if not buses:
+        return
+    columns = ", ".join(_FLEET_CURATED_COLUMNS)
+    if overwrite:
+        updated = [column for column in _FLEET_CURATED_COLUMNS if column != "reg_key"]
+        conflict = (
+            "DO UPDATE SET "
+            + ", ".join(f"{column} = EXCLUDED.{column}" for column in updated)
+            + ", updated_at = NOW() WHERE ("
+            + ", ".join(f"fleet_curated.{column}" for column in updated)
+            + ") IS DISTINCT FROM ("
+            + ", ".join(f"EXCLUDED.{column}" for column in updated)
+            + ")"
+        )
+    else:
+        conflict = "DO NOTHING"
+    template = "(" + ", ".join(
+        "%s::jsonb" if column == "gallery" else "%s::text[]" if column == "extras" else "%s"
+        for column in _FLEET_CURATED_COLUMNS
+    ) + ")"
+    store_fleet_images(connection, (image for bus in buses for image in bus.get("gallery") or []))
+    rows = []
+    for bus in buses:
+        record = _fleet_curated_record(bus)
+        record["gallery"] = Json(record["gallery"])
+        rows.append(tuple(record[column] for column in _FLEET_CURATED_COLUMNS))
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor,
+            f"""
+            INSERT INTO fleet_curated ({columns})
+            VALUES %s
+            ON CONFLICT (reg_key) {conflict}
+            """,
+            rows,
+            template=template,
+            page_size=1000,
+        )
+    ensure_fleet_options(
         connection,
-        FLEET_COLLECTION_BUSES,
-        sanitized["regKey"],
-        sanitized,
+        (entry for bus in buses for entry in _fleet_option_values(bus)),
     )
-    return (row or {}).get("data", sanitized)
+
+
+def delete_fleet_buses(connection, reg_keys: Iterable[str]) -> int:
+    keys = list(reg_keys)
+    if not keys:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM fleet_curated WHERE reg_key = ANY(%s)", (keys,))
+        return cursor.rowcount
 
 
 def replace_fleet_with_snapshots(
@@ -6071,9 +10997,7 @@ def replace_fleet_with_snapshots(
     if not snapshots:
         return []
 
-    delete_all_fleet_buses(connection)
-
-    created: List[Dict[str, Any]] = []
+    desired: Dict[str, Dict[str, Any]] = {}
     for snapshot in snapshots:
         reg_key = normalise_reg_key(snapshot.get("regKey"))
         registration = normalise_text(snapshot.get("registration")) or reg_key
@@ -6105,35 +11029,64 @@ def replace_fleet_with_snapshots(
         }
 
         try:
-            bus = upsert_fleet_bus(
-                connection,
-                payload,
-                fallback_created_at=seen_iso,
-            )
+            sanitized = sanitise_bus_payload(payload, fallback_created_at=seen_iso)
         except ApiError as exc:
             print(
                 f"[fleet-sync] Skipped snapshot for {reg_key}: {exc}",
                 flush=True,
             )
             continue
+        desired[reg_key] = _serialise_fleet_curated(_fleet_curated_record(sanitized))
 
-        created.append(bus)
-
-    if created:
-        connection.commit()
-    else:
+    if not desired:
         connection.rollback()
+        return []
 
-    return created
+    current = _fetch_fleet_curated(connection)
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    for reg_key, bus in desired.items():
+        existing = current.get(reg_key)
+        if existing is None:
+            inserts.append(bus)
+            continue
+        # A bus already in the fleet keeps its first-seen badge window, and
+        # a fresh seenAt alone is not a reason to rewrite the row.
+        for key in ("createdAt", "newUntil", "isNewBus"):
+            bus[key] = existing[key]
+        if any(bus[key] != existing.get(key) for key in bus if key != "lastUpdated"):
+            updates.append(bus)
+        else:
+            desired[reg_key] = existing
+    deletes = [reg_key for reg_key in current if reg_key not in desired]
+
+    delete_fleet_buses(connection, deletes)
+    upsert_fleet_buses(connection, inserts + updates)
+    connection.commit()
+    fleet_document.invalidate("curated")
+    print(
+        f"[fleet-sync] Snapshot diff: {len(inserts)} added, {len(updates)} updated, "
+        f"{len(deletes)} removed, {len(desired) - len(inserts) - len(updates)} unchanged",
+        flush=True,
+    )
+
+    return list(desired.values())
+
+
+def fetch_fleet_bus_keys(connection) -> Set[str]:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reg_key FROM fleet_curated")
+        return {row[0] for row in cursor.fetchall() if row[0]}
 
 
 def maybe_sync_live_buses(
-    connection,
     existing_reg_keys: Optional[Set[str]] = None,
+    *,
+    force: bool = False,
 ) -> Tuple[List[Dict[str, Any]], bool]:
     global _last_fleet_sync_attempt, _last_fleet_sync_success
 
-    if not FLEET_AUTO_SYNC_ENABLED:
+    if not FLEET_AUTO_SYNC_ENABLED and not force:
         return [], False
 
     if existing_reg_keys is None:
@@ -6141,7 +11094,8 @@ def maybe_sync_live_buses(
 
     now = time.monotonic()
     if (
-        FLEET_AUTO_SYNC_INTERVAL_SECONDS > 0
+        not force
+        and FLEET_AUTO_SYNC_INTERVAL_SECONDS > 0
         and now - _last_fleet_sync_attempt < FLEET_AUTO_SYNC_INTERVAL_SECONDS
     ):
         return [], False
@@ -6149,7 +11103,8 @@ def maybe_sync_live_buses(
     with _fleet_sync_lock:
         now = time.monotonic()
         if (
-            FLEET_AUTO_SYNC_INTERVAL_SECONDS > 0
+            not force
+            and FLEET_AUTO_SYNC_INTERVAL_SECONDS > 0
             and now - _last_fleet_sync_attempt < FLEET_AUTO_SYNC_INTERVAL_SECONDS
         ):
             return [], False
@@ -6159,7 +11114,8 @@ def maybe_sync_live_buses(
             FLEET_VEHICLE_HISTORY_DAYS
         )
         if history_success and snapshots:
-            created = replace_fleet_with_snapshots(connection, snapshots)
+            with get_connection() as connection:
+                created = replace_fleet_with_snapshots(connection, snapshots)
             if created:
                 _last_fleet_sync_success = time.monotonic()
                 print(
@@ -6172,209 +11128,1004 @@ def maybe_sync_live_buses(
                 flush=True,
             )
 
-        registrations, success = fetch_all_bus_registrations()
-        if not success or not registrations:
-            return [], False
+        registrations, success = fetch_all_bus_registrations()
+        if not success or not registrations:
+            return [], False
+
+        with get_connection() as connection:
+            created = _add_new_fleet_buses(connection, registrations, existing_reg_keys)
+        _last_fleet_sync_success = time.monotonic()
+        return created, False
+
+
+def _add_new_fleet_buses(
+    connection,
+    registrations: Dict[str, str],
+    existing_reg_keys: Set[str],
+) -> List[Dict[str, Any]]:
+    if not existing_reg_keys:
+        existing_reg_keys.update(fetch_fleet_bus_keys(connection))
+
+    seen_at = datetime.now(timezone.utc)
+    now_iso = seen_at.isoformat()
+    registration_date = seen_at.date().isoformat()
+    new_until_iso = (seen_at + NEW_BUS_DURATION).isoformat()
+    additions: Dict[str, Dict[str, Any]] = {}
+    for reg_key, registration in registrations.items():
+        normalised_key = normalise_reg_key(reg_key)
+        if not normalised_key or normalised_key in existing_reg_keys:
+            continue
+        try:
+            additions[normalised_key] = sanitise_bus_payload(
+                {
+                    "regKey": normalised_key,
+                    "registration": registration,
+                    "registrationDate": registration_date,
+                    "isNewBus": True,
+                    "extras": [NEW_BUS_EXTRA_LABEL],
+                    "newUntil": new_until_iso,
+                    "createdAt": now_iso,
+                    "lastUpdated": now_iso,
+                },
+                fallback_created_at=now_iso,
+            )
+        except ApiError as exc:
+            print(
+                f"[fleet-sync] Skipped vehicle {normalised_key}: {exc}",
+                flush=True,
+            )
+
+    created: List[Dict[str, Any]] = []
+    if additions:
+        upsert_fleet_buses(connection, list(additions.values()), overwrite=False)
+        connection.commit()
+        created = list(additions.values())
+        existing_reg_keys.update(additions)
+        fleet_document.invalidate("curated", additions)
+        print(
+            f"[fleet-sync] Added {len(created)} new vehicles from TfL feed",
+            flush=True,
+        )
+    return created
+
+
+def delete_pending_for_reg(connection, reg_key: str) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM fleet_pending WHERE reg_key = %s", (reg_key,))
+
+
+def delete_pending_change(connection, change_id: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM fleet_pending WHERE change_id = %s", (change_id,))
+        return cursor.rowcount
+
+
+def _serialise_fleet_pending(row: Dict[str, Any]) -> Dict[str, Any]:
+    pending: Dict[str, Any] = {
+        "id": row["change_id"],
+        "regKey": row["reg_key"],
+        "registration": row.get("registration") or row["reg_key"],
+        "submittedAt": normalise_datetime(row.get("submitted_at")),
+        "status": row.get("status") or "pending",
+        "data": row.get("data") or {},
+    }
+    if row.get("images"):
+        pending["images"] = row["images"]
+    if row.get("submitted_by"):
+        pending["submittedBy"] = row["submitted_by"]
+    return pending
+
+
+def get_pending_change(connection, change_id: str) -> Optional[Dict[str, Any]]:
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute("SELECT * FROM fleet_pending WHERE change_id = %s", (change_id,))
+        row = cursor.fetchone()
+    return _serialise_fleet_pending(row) if row else None
+
+
+def create_pending_change(
+    connection,
+    reg_key: str,
+    registration: str,
+    payload: Dict[str, Any],
+    *,
+    images: Optional[Sequence[Dict[str, Any]]] = None,
+    submitted_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    delete_pending_for_reg(connection, reg_key)
+
+    sanitized = sanitise_bus_payload(
+        {**payload, "regKey": reg_key, "registration": registration},
+    )
+    sanitized.pop("createdAt", None)
+    sanitized.pop("lastUpdated", None)
+    sanitized.pop("gallery", None)
+
+    pending_images = (
+        list(images)
+        if images is not None
+        else sanitise_gallery(
+            payload.get("images") or payload.get("pendingImages"),
+            status="pending",
+            submitted_by=submitted_by,
+            limit=MAX_FLEET_PENDING_IMAGES,
+        )
+    )
+    if pending_images and MAX_FLEET_PENDING_IMAGES:
+        pending_images = pending_images[:MAX_FLEET_PENDING_IMAGES]
+    missing = missing_fleet_images(connection, pending_images or [])
+    if missing:
+        raise ApiError(
+            f"Unknown image reference: {sorted(missing)[0]}. Upload the image data instead.",
+            status_code=400,
+        )
+    store_fleet_images(connection, pending_images or [])
+
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            INSERT INTO fleet_pending (
+                change_id, reg_key, registration, status, submitted_at, submitted_by, data, images
+            )
+            VALUES (%s, %s, %s, 'pending', NOW(), %s, %s, %s)
+            RETURNING *
+            """,
+            (
+                uuid.uuid4().hex,
+                reg_key,
+                registration,
+                submitted_by or None,
+                Json(sanitized),
+                Json(pending_images or []),
+            ),
+        )
+        return _serialise_fleet_pending(cursor.fetchone())
+
+
+def _load_fleet_curated(connection) -> Dict[str, Dict[str, Any]]:
+    return _fetch_fleet_curated(connection)
+
+
+def _load_fleet_pending(connection) -> List[Dict[str, Any]]:
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            SELECT *
+            FROM fleet_pending
+            WHERE status = 'pending'
+            ORDER BY submitted_at DESC
+            """
+        )
+        return [_serialise_fleet_pending(row) for row in cursor.fetchall() or []]
+
+
+def migrate_fleet_collections(connection) -> Dict[str, int]:
+    option_collections = {f"{FLEET_OPTION_PREFIX}{field}": field for field in FLEET_OPTION_FIELDS}
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            SELECT collection, item_id, data, created_at, updated_at
+            FROM app_collections
+            WHERE collection = ANY(%s)
+            FOR UPDATE
+            """,
+            ([FLEET_COLLECTION_BUSES, FLEET_COLLECTION_PENDING, *option_collections],),
+        )
+        rows = cursor.fetchall() or []
+    if not rows:
+        return {"buses": 0, "pending": 0, "options": 0}
+
+    buses: List[Dict[str, Any]] = []
+    pending_rows: List[Tuple[Any, ...]] = []
+    options: List[Tuple[str, Any]] = []
+    for row in rows:
+        collection = row["collection"]
+        data = row.get("data") or {}
+        if collection == FLEET_COLLECTION_BUSES:
+            try:
+                buses.append(
+                    sanitise_bus_payload(
+                        {**data, "regKey": data.get("regKey") or row["item_id"]},
+                        fallback_created_at=normalise_datetime(row.get("created_at")) or None,
+                    )
+                )
+            except ApiError as exc:
+                print(f"[fleet] Skipped legacy fleet entry {row['item_id']}: {exc}", flush=True)
+        elif collection == FLEET_COLLECTION_PENDING:
+            reg_key = normalise_reg_key(data.get("regKey"))
+            if not reg_key:
+                continue
+            try:
+                images = sanitise_gallery(data.get("images"), limit=MAX_FLEET_PENDING_IMAGES)
+            except ApiError as exc:
+                print(f"[fleet] Dropped images from legacy pending change {row['item_id']}: {exc}", flush=True)
+                images = []
+            store_fleet_images(connection, images)
+            pending_rows.append(
+                (
+                    normalise_text(data.get("id")) or row["item_id"],
+                    reg_key,
+                    normalise_text(data.get("registration")) or reg_key,
+                    normalise_text(data.get("status")) or "pending",
+                    parse_iso_datetime(data.get("submittedAt")) or row.get("created_at"),
+                    normalise_text(data.get("submittedBy")) or None,
+                    Json(data.get("data") or {}),
+                    Json(images),
+                )
+            )
+        else:
+            options.append((option_collections[collection], data.get("value")))
+
+    upsert_fleet_buses(connection, buses, overwrite=False)
+    ensure_fleet_options(connection, options)
+    with connection.cursor() as cursor:
+        if pending_rows:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO fleet_pending (
+                    change_id, reg_key, registration, status, submitted_at, submitted_by, data, images
+                )
+                VALUES %s
+                ON CONFLICT (change_id) DO NOTHING
+                """,
+                pending_rows,
+                page_size=1000,
+            )
+        cursor.execute(
+            "DELETE FROM app_collections WHERE collection = ANY(%s)",
+            ([FLEET_COLLECTION_BUSES, FLEET_COLLECTION_PENDING, *option_collections],),
+        )
+    return {"buses": len(buses), "pending": len(pending_rows), "options": len(options)}
+
+
+def migrate_fleet_images(connection) -> Dict[str, int]:
+    counts = {"buses": 0, "pending": 0}
+    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            """
+            SELECT reg_key, gallery FROM fleet_curated
+            WHERE gallery::text LIKE '%%"dataUrl"%%'
+            FOR UPDATE
+            """
+        )
+        for row in cursor.fetchall() or []:
+            try:
+                gallery = sanitise_gallery(row["gallery"], status="approved", limit=MAX_FLEET_GALLERY_IMAGES)
+            except ApiError as exc:
+                print(f"[fleet-images] Left gallery for {row['reg_key']} inline: {exc}", flush=True)
+                continue
+            store_fleet_images(connection, gallery)
+            cursor.execute(
+                "UPDATE fleet_curated SET gallery = %s, updated_at = NOW() WHERE reg_key = %s",
+                (Json(gallery), row["reg_key"]),
+            )
+            counts["buses"] += 1
+        cursor.execute(
+            """
+            SELECT change_id, images FROM fleet_pending
+            WHERE images::text LIKE '%%"dataUrl"%%'
+            FOR UPDATE
+            """
+        )
+        for row in cursor.fetchall() or []:
+            try:
+                images = sanitise_gallery(row["images"], limit=MAX_FLEET_PENDING_IMAGES)
+            except ApiError as exc:
+                print(f"[fleet-images] Left images for change {row['change_id']} inline: {exc}", flush=True)
+                continue
+            store_fleet_images(connection, images)
+            cursor.execute(
+                "UPDATE fleet_pending SET images = %s, updated_at = NOW() WHERE change_id = %s",
+                (Json(images), row["change_id"]),
+            )
+            counts["pending"] += 1
+    return counts
+
+
+def fetch_fleet_state(connection) -> Dict[str, Any]:
+    options = fetch_fleet_options(connection)
+    curated = _load_fleet_curated(connection)
+    buses = _build_fleet_bus_map(connection, curated)
+    pending = _load_fleet_pending(connection)
+    return {
+        "options": options,
+        "buses": buses,
+        "pendingChanges": pending,
+    }
+
+
+class FleetDocument:
+    def __init__(
+        self,
+        enabled: bool,
+        *,
+        refresh_interval: int = FLEET_DOCUMENT_REFRESH_SECONDS,
+        rebuild_interval: int = FLEET_DOCUMENT_REBUILD_SECONDS,
+        watermark_overlap: int = FLEET_DOCUMENT_WATERMARK_OVERLAP_SECONDS,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._refresh_interval = max(int(refresh_interval), 0)
+        self._rebuild_interval = max(int(rebuild_interval), 1)
+        self._watermark_overlap = timedelta(seconds=max(int(watermark_overlap), 0))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._epoch = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._options: Dict[str, List[str]] = {}
+        self._curated: Dict[str, Dict[str, Any]] = {}
+        self._canonical: Dict[str, Dict[str, Any]] = {}
+        self._buses: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._watermark: Optional[datetime] = None
+        self._dirty_sections: Set[str] = set()
+        self._dirty_regs: Set[str] = set()
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self._last_error: Optional[str] = None
+        self._stats = {
+            "requests": 0,
+            "notModified": 0,
+            "staleServed": 0,
+            "builds": 0,
+            "patches": 0,
+            "busesPatched": 0,
+            "versionBumps": 0,
+            "refreshFailures": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def invalidate(self, section: str = "all", reg_keys: Optional[Iterable[str]] = None) -> None:
+        if not self._enabled:
+            return
+        with self._lock:
+            if section == "curated" and reg_keys is not None:
+                self._dirty_regs.update(
+                    key for key in (normalise_reg_key(value) for value in reg_keys) if key
+                )
+                self._dirty_sections.add("options")
+                return
+            self._dirty_sections.add(section)
+            if section == "curated":
+                self._dirty_sections.add("options")
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self._stats["notModified"] += 1
+
+    def get(self) -> Tuple[bytes, str, int]:
+        with self._lock:
+            self._stats["requests"] += 1
+            has_body = self._body is not None
+            dirty = bool(self._dirty_sections or self._dirty_regs)
+            expired = time.monotonic() - self._refreshed_at >= self._refresh_interval
+
+        if not has_body:
+            with self._refresh_lock:
+                self._refresh()
+        elif dirty:
+            with self._refresh_lock:
+                try:
+                    self._refresh()
+                except Exception as exc:
+                    print(f"[fleet-document] Refresh failed, serving version {self._version}: {exc}", flush=True)
+                    with self._lock:
+                        self._stats["staleServed"] += 1
+        elif expired:
+            if self._refresh_lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                except Exception as exc:
+                    print(f"[fleet-document] Refresh failed, serving version {self._version}: {exc}", flush=True)
+                finally:
+                    self._refresh_lock.release()
+            else:
+                with self._lock:
+                    self._stats["staleServed"] += 1
+
+        with self._lock:
+            return self._body, self._etag, self._version
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self._enabled,
+                "version": self._version,
+                "etag": self._etag,
+                "bytes": len(self._body) if self._body is not None else 0,
+                "buses": len(self._buses),
+                "pendingChanges": len(self._pending),
+                "watermark": to_iso(self._watermark) if self._watermark else None,
+                "refreshedSecondsAgo": round(time.monotonic() - self._refreshed_at, 1)
+                if self._refreshed_at
+                else None,
+                "dirty": sorted(self._dirty_sections) + (["buses"] if self._dirty_regs else []),
+                "lastError": self._last_error,
+                **self._stats,
+            }
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            full = (
+                self._body is None
+                or "all" in self._dirty_sections
+                or now - self._built_at >= self._rebuild_interval
+            )
+            sections = set(self._dirty_sections)
+            reg_keys = set(self._dirty_regs)
+            self._dirty_sections.clear()
+            self._dirty_regs.clear()
+        try:
+            with get_connection() as connection:
+                if full:
+                    changed = self._rebuild(connection)
+                else:
+                    changed = self._patch(connection, sections, reg_keys)
+        except Exception as exc:
+            with self._lock:
+                self._dirty_sections.update(sections)
+                self._dirty_regs.update(reg_keys)
+                self._stats["refreshFailures"] += 1
+                self._last_error = str(exc)
+            raise
+        self._publish(changed)
+        with self._lock:
+            self._refreshed_at = now
+            if full:
+                self._built_at = now
+            self._last_error = None
+
+    def _database_now(self, connection) -> datetime:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT NOW()")
+            return cursor.fetchone()[0]
+
+    def _rebuild(self, connection) -> bool:
+        watermark = self._database_now(connection)
+        options = fetch_fleet_options(connection)
+        curated = _load_fleet_curated(connection)
+        canonical = _fetch_canonical_fleet_map(connection)
+        pending = _load_fleet_pending(connection)
+        buses = _merge_fleet_buses(canonical, curated)
+        changed = (
+            self._body is None
+            or options != self._options
+            or pending != self._pending
+            or buses != self._buses
+        )
+        self._options = options
+        self._curated = curated
+        self._canonical = canonical
+        self._pending = pending
+        self._buses = buses
+        self._watermark = watermark
+        with self._lock:
+            self._stats["builds"] += 1
+        return changed
+
+    def _patch(self, connection, sections: Set[str], reg_keys: Set[str]) -> bool:
+        changed = False
+        watermark = self._database_now(connection)
+
+        if "options" in sections:
+            options = fetch_fleet_options(connection)
+            if options != self._options:
+                self._options = options
+                changed = True
+
+        if "pending" in sections:
+            pending = _load_fleet_pending(connection)
+            if pending != self._pending:
+                self._pending = pending
+                changed = True
+
+        touched: Set[str] = set()
+        if "curated" in sections:
+            curated = _load_fleet_curated(connection)
+            touched.update(curated)
+            touched.update(self._curated)
+            self._curated = curated
+        elif reg_keys:
+            fetched = _fetch_fleet_curated(connection, reg_keys)
+            for reg_key in reg_keys:
+                if reg_key in fetched:
+                    self._curated[reg_key] = fetched[reg_key]
+                else:
+                    self._curated.pop(reg_key, None)
+            touched.update(reg_keys)
+
+        since = self._watermark - self._watermark_overlap if self._watermark else None
+        for reg_key, record in _fetch_canonical_fleet_map(connection, since=since).items():
+            if self._canonical.get(reg_key) != record:
+                self._canonical[reg_key] = record
+                touched.add(reg_key)
+        self._watermark = watermark
+
+        patched = 0
+        for reg_key in touched:
+            entry = _fleet_bus_entry(reg_key, self._canonical.get(reg_key), self._curated.get(reg_key))
+            if entry is None:
+                if self._buses.pop(reg_key, None) is not None:
+                    patched += 1
+            elif self._buses.get(reg_key) != entry:
+                self._buses[reg_key] = entry
+                patched += 1
+
+        with self._lock:
+            self._stats["patches"] += 1
+            self._stats["busesPatched"] += patched
+        return changed or patched > 0
+
+    def _publish(self, changed: bool) -> None:
+        if not changed:
+            return
+        version = self._version + 1
+        body = app.json.dumps(
+            {
+                "version": version,
+                "options": self._options,
+                "buses": self._buses,
+                "pendingChanges": self._pending,
+            }
+        ).encode("utf-8")
+        with self._lock:
+            self._version = version
+            self._body = body
+            self._etag = f"fleet-{self._epoch}-{version}"
+            self._stats["versionBumps"] += 1
+
+
+fleet_document = FleetDocument(enabled=FLEET_DOCUMENT_CACHE_ENABLED)
+
+
+class BadgeExpirySweeper:
+    def __init__(
+        self,
+        enabled: bool,
+        *,
+        horizon: int = BADGE_EXPIRY_HORIZON_SECONDS,
+        reload_interval: int = BADGE_EXPIRY_RELOAD_SECONDS,
+        batch_size: int = BADGE_EXPIRY_BATCH_SIZE,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._horizon = timedelta(seconds=max(int(horizon), 60))
+        self._reload_interval = max(int(reload_interval), 10)
+        self._batch_size = max(int(batch_size), 1)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._heap: List[Tuple[datetime, str, str]] = []
+        self._due: Dict[Tuple[str, str], datetime] = {}
+        self._next_reload_at = 0.0
+        self._last_reload_at: Optional[str] = None
+        self._last_sweep_at: Optional[str] = None
+        self._last_error: Optional[str] = None
+        self._stats = {
+            "scheduled": 0,
+            "reloads": 0,
+            "batches": 0,
+            "newExpired": 0,
+            "rareExpired": 0,
+            "curatedExpired": 0,
+            "unchanged": 0,
+            "failures": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> bool:
+        if not self._enabled:
+            return False
+        if self.is_running:
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="badge-expiry", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        self._wake_event.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout)
+
+    def schedule(self, kind: str, key: Optional[str], due_at: Any) -> None:
+        if not self._enabled or not key:
+            return
+        if not isinstance(due_at, datetime):
+            due_at = parse_iso_datetime(due_at)
+            if due_at is None:
+                return
+        if due_at.tzinfo is None:
+            due_at = due_at.replace(tzinfo=timezone.utc)
+        if due_at > datetime.now(timezone.utc) + self._horizon:
+            return
+        with self._lock:
+            current = self._due.get((kind, key))
+            if current is not None and current <= due_at:
+                return
+            self._due[(kind, key)] = due_at
+            heapq.heappush(self._heap, (due_at, kind, key))
+            self._stats["scheduled"] += 1
+            earliest = self._heap[0][0] == due_at
+        if earliest:
+            self._wake_event.set()
+
+    def reload(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now(timezone.utc)
+        limit = now + self._horizon
+        self._next_reload_at = time.monotonic() + self._reload_interval
+        with get_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT
+                        reg,
+                        LEAST(
+                            CASE WHEN badges ? %s THEN new_badge_extended_until END,
+                            CASE WHEN badges ? %s THEN rare_badge_decay_at END
+                        )
+                    FROM buses
+                    WHERE (badges ? %s AND new_badge_extended_until <= %s)
+                       OR (badges ? %s AND rare_badge_decay_at <= %s)
+                    """,
+                    (
+                        BADGE_NEW_BUS,
+                        BADGE_RARE_WORKING,
+                        BADGE_NEW_BUS,
+                        limit,
+                        BADGE_RARE_WORKING,
+                        limit,
+                    ),
+                )
+                bus_rows = cursor.fetchall()
+                cursor.execute(
+                    """
+                    SELECT reg_key, new_until, is_new_bus
+                    FROM fleet_curated
+                    WHERE new_until IS NOT NULL OR is_new_bus
+                    """
+                )
+                curated_rows = cursor.fetchall()
+        count = 0
+        for reg, due_at in bus_rows:
+            if due_at is not None:
+                self.schedule("bus", reg, due_at)
+                count += 1
+        for reg_key, new_until, is_new in curated_rows:
+            due_at = new_until if new_until is not None and is_new else now
+            if due_at <= limit:
+                self.schedule("curated", reg_key, due_at)
+                count += 1
+        with self._lock:
+            self._stats["reloads"] += 1
+            self._last_reload_at = iso_now()
+        return count
+
+    def run_once(self) -> Dict[str, int]:
+        ensure_database_initialised()
+        if time.monotonic() >= self._next_reload_at:
+            self.reload()
+        totals = {"bus": 0, "curated": 0}
+        while not self._stop_event.is_set():
+            now = datetime.now(timezone.utc)
+            batch = self._pop_due(now)
+            if not batch:
+                break
+            try:
+                with get_connection() as connection:
+                    if batch.get("bus"):
+                        totals["bus"] += self._expire_buses(connection, batch["bus"], now)
+                    curated: List[str] = []
+                    if batch.get("curated"):
+                        curated = self._expire_curated(connection, batch["curated"], now)
+                        totals["curated"] += len(curated)
+                    connection.commit()
+            except Exception as exc:
+                retry_at = now + timedelta(seconds=30)
+                for kind, keys in batch.items():
+                    for key in keys:
+                        self.schedule(kind, key, retry_at)
+                with self._lock:
+                    self._stats["failures"] += 1
+                    self._last_error = str(exc)
+                raise
+            if curated:
+                fleet_document.invalidate("curated", curated)
+            with self._lock:
+                self._stats["batches"] += 1
+                self._last_sweep_at = iso_now()
+                self._last_error = None
+        return totals
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            next_due = self._heap[0][0] if self._heap else None
+            return {
+                "enabled": self._enabled,
+                "running": self.is_running,
+                "queued": len(self._due),
+                "nextDueAt": to_iso(next_due) if next_due else None,
+                "horizonSeconds": int(self._horizon.total_seconds()),
+                "lastReloadAt": self._last_reload_at,
+                "lastSweepAt": self._last_sweep_at,
+                "lastError": self._last_error,
+                **self._stats,
+            }
+
+    def _pop_due(self, now: datetime) -> Dict[str, List[str]]:
+        batch: Dict[str, List[str]] = defaultdict(list)
+        taken = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and taken < self._batch_size:
+                due_at, kind, key = heapq.heappop(self._heap)
+                if self._due.get((kind, key)) != due_at:
+                    continue
+                del self._due[(kind, key)]
+                batch[kind].append(key)
+                taken += 1
+        return dict(batch)
 
-        created: List[Dict[str, Any]] = []
-        for reg_key, registration in registrations.items():
-            normalised_key = normalise_reg_key(reg_key)
-            if not normalised_key:
-                continue
-            if normalised_key in existing_reg_keys:
-                continue
+    def _expire_buses(self, connection, reg_keys: List[str], now: datetime) -> int:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT reg, badges, badge_overrides, rare_score,
+                       new_badge_extended_until, rare_badge_decay_at
+                FROM buses
+                WHERE reg = ANY(%s)
+                ORDER BY reg
+                FOR UPDATE
+                """,
+                (reg_keys,),
+            )
+            rows = cursor.fetchall() or []
 
-            existing_bus = get_fleet_bus(connection, normalised_key)
-            if existing_bus:
-                existing_reg_keys.add(normalised_key)
+        updates: Dict[str, Dict[str, Any]] = {}
+        new_expired = rare_expired = unchanged = 0
+        for row in rows:
+            reg = row["reg"]
+            badges = {badge for badge in (row.get("badges") or []) if badge}
+            new_until = row.get("new_badge_extended_until")
+            decay_at = row.get("rare_badge_decay_at")
+            expired: Set[str] = set()
+            if BADGE_NEW_BUS in badges:
+                if new_until is None or new_until <= now:
+                    expired.add(BADGE_NEW_BUS)
+                else:
+                    self.schedule("bus", reg, new_until)
+            if BADGE_RARE_WORKING in badges:
+                if decay_at is None or decay_at <= now:
+                    expired.add(BADGE_RARE_WORKING)
+                else:
+                    self.schedule("bus", reg, decay_at)
+            if not expired:
+                unchanged += 1
                 continue
-
-            seen_at = datetime.now(timezone.utc)
-            now_iso = seen_at.isoformat()
-            registration_date = seen_at.date().isoformat()
-            new_until_iso = (seen_at + NEW_BUS_DURATION).isoformat()
-            try:
-                bus = upsert_fleet_bus(
+            overrides = row.get("badge_overrides") if isinstance(row.get("badge_overrides"), dict) else None
+            final_badges = apply_badge_overrides(badges - expired, overrides)
+            if final_badges == sorted(badges):
+                unchanged += 1
+                continue
+            update: Dict[str, Any] = {"badges": Json(final_badges)}
+            if BADGE_RARE_WORKING in expired and BADGE_RARE_WORKING not in final_badges:
+                rare_score = dict(row.get("rare_score") or {})
+                rare_score["active"] = False
+                update["rare_score"] = Json(rare_score)
+                update["rare_badge_decay_at"] = None
+                rare_expired += 1
+            if BADGE_NEW_BUS in expired and BADGE_NEW_BUS not in final_badges:
+                new_expired += 1
+            updates[reg] = update
+
+        if updates:
+            update_bus_records(connection, updates)
+        with self._lock:
+            self._stats["newExpired"] += new_expired
+            self._stats["rareExpired"] += rare_expired
+            self._stats["unchanged"] += unchanged
+        return len(updates)
+
+    def _expire_curated(self, connection, reg_keys: List[str], now: datetime) -> List[str]:
+        curated = _fetch_fleet_curated(connection, reg_keys, for_update=True)
+
+        changed: List[str] = []
+        for reg_key, data in curated.items():
+            if update_new_bus_state(data, now=now):
+                upsert_fleet_bus(
                     connection,
-                    {
-                        "regKey": normalised_key,
-                        "registration": registration,
-                        "registrationDate": registration_date,
-                        "isNewBus": True,
-                        "extras": [NEW_BUS_EXTRA_LABEL],
-                        "newUntil": new_until_iso,
-                        "createdAt": now_iso,
-                        "lastUpdated": now_iso,
-                    },
-                    fallback_created_at=now_iso,
-                )
-            except ApiError as exc:
-                print(
-                    f"[fleet-sync] Skipped vehicle {normalised_key}: {exc}",
-                    flush=True,
+                    data,
+                    fallback_created_at=data.get("createdAt") or iso_now(),
                 )
-                continue
-            created.append(bus)
-            existing_reg_keys.add(normalised_key)
-
-        if created:
-            connection.commit()
-            print(
-                f"[fleet-sync] Added {len(created)} new vehicles from TfL feed",
-                flush=True,
-            )
-        _last_fleet_sync_success = time.monotonic()
-        return created, False
-
-
-def delete_pending_for_reg(connection, reg_key: str) -> None:
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            DELETE FROM app_collections
-            WHERE collection = %s AND data->>'regKey' = %s
-            """,
-            (FLEET_COLLECTION_PENDING, reg_key),
-        )
-
-
-def delete_all_fleet_buses(connection) -> None:
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            DELETE FROM app_collections
-            WHERE collection = %s
-            """,
-            (FLEET_COLLECTION_BUSES,),
-        )
-
+                changed.append(reg_key)
+            new_until = parse_iso_datetime(data.get("newUntil"))
+            if new_until and new_until > now:
+                self.schedule("curated", reg_key, new_until)
+        with self._lock:
+            self._stats["curatedExpired"] += len(changed)
+            self._stats["unchanged"] += len(curated) - len(changed)
+        return changed
 
-def get_pending_change(connection, change_id: str) -> Optional[Dict[str, Any]]:
-    with connection.cursor(cursor_factory=RealDictCursor) as cursor:
-        cursor.execute(
-            """
-            SELECT item_id, data
-            FROM app_collections
-            WHERE collection = %s AND item_id = %s
-            """,
-            (FLEET_COLLECTION_PENDING, change_id),
-        )
-        row = cursor.fetchone()
-        if not row:
-            return None
-        data = row.get("data") or {}
-        data.setdefault("id", row.get("item_id") or change_id)
-        return data
+    def _seconds_until_next(self) -> float:
+        wait = max(self._next_reload_at - time.monotonic(), 0.0)
+        with self._lock:
+            if self._heap:
+                due_in = (self._heap[0][0] - datetime.now(timezone.utc)).total_seconds()
+                wait = min(wait, max(due_in, 0.0))
+        return max(wait, 0.05)
 
+    def _run(self) -> None:
+        set_connection_class("maintenance")
+        failures = 0
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                failures += 1
+                with self._lock:
+                    self._last_error = str(exc)
+                # A failed reload leaves nothing scheduled, so back off rather
+                # than retrying at the polling floor.
+                backoff = min(self._reload_interval, 2 ** min(failures - 1, 10))
+                print(f"[badge-expiry] Sweep failed, retrying in {backoff}s: {exc}", flush=True)
+                if self._stop_event.wait(backoff):
+                    break
+                continue
+            failures = 0
+            self._wake_event.wait(self._seconds_until_next())
+            self._wake_event.clear()
 
-def create_pending_change(
-    connection,
-    reg_key: str,
-    registration: str,
-    payload: Dict[str, Any],
-    *,
-    images: Optional[Sequence[Dict[str, Any]]] = None,
-    submitted_by: Optional[str] = None,
-) -> Dict[str, Any]:
-    delete_pending_for_reg(connection, reg_key)
 
-    change_id = uuid.uuid4().hex
-    sanitized = sanitise_bus_payload(
-        {**payload, "regKey": reg_key, "registration": registration},
-    )
-    sanitized.pop("createdAt", None)
-    sanitized.pop("lastUpdated", None)
-    sanitized.pop("gallery", None)
+badge_expiry_sweeper = BadgeExpirySweeper(enabled=BADGE_EXPIRY_SWEEPER_ENABLED)
+if badge_expiry_sweeper.enabled:
+    try:
+        badge_expiry_sweeper.start()
+    except Exception as exc:
+        print(f"[badge-expiry] Failed to start sweeper thread: {exc}", flush=True)
 
-    pending_images = (
-        list(images)
-        if images is not None
-        else sanitise_gallery(
-            payload.get("images") or payload.get("pendingImages"),
-            status="pending",
-            submitted_by=submitted_by,
-            limit=MAX_FLEET_PENDING_IMAGES,
-        )
-    )
-    if pending_images and MAX_FLEET_PENDING_IMAGES:
-        pending_images = pending_images[:MAX_FLEET_PENDING_IMAGES]
 
-    pending_data = {
-        "id": change_id,
-        "regKey": reg_key,
-        "registration": registration,
-        "submittedAt": iso_now(),
-        "status": "pending",
-        "data": sanitized,
-    }
+class FleetSyncJob:
+    def __init__(
+        self,
+        enabled: bool,
+        *,
+        interval: int = FLEET_AUTO_SYNC_INTERVAL_SECONDS,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._interval = max(int(interval), 60)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._state = "idle"
+        self._runs = 0
+        self._failures = 0
+        self._last_started_at: Optional[str] = None
+        self._last_finished_at: Optional[str] = None
+        self._last_success_at: Optional[str] = None
+        self._last_duration: Optional[float] = None
+        self._last_result: Dict[str, Any] = {}
+        self._last_error: Optional[str] = None
+        self._next_run_at: Optional[float] = None
 
-    if pending_images:
-        pending_data["images"] = pending_images
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
 
-    if submitted_by:
-        pending_data["submittedBy"] = submitted_by
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
 
-    upsert_collection_item(
-        connection,
-        FLEET_COLLECTION_PENDING,
-        change_id,
-        pending_data,
-    )
-    return pending_data
+    def start(self) -> bool:
+        if not self._enabled:
+            return False
+        if self.is_running:
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="fleet-sync", daemon=True)
+        self._thread.start()
+        return True
 
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        self._wake_event.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout)
 
-def fetch_fleet_state(connection) -> Dict[str, Any]:
-    options = fetch_fleet_options(connection)
+    def trigger(self) -> bool:
+        if not self.is_running:
+            return False
+        self._wake_event.set()
+        return True
 
-    curated: Dict[str, Dict[str, Any]] = {}
-    pending_updates: List[Dict[str, Any]] = []
-    for row in fetch_collection_items(connection, FLEET_COLLECTION_BUSES):
-        data = row.get("data") or {}
-        reg_key = normalise_reg_key(data.get("regKey") or row.get("item_id"))
-        if not reg_key:
-            continue
-        data.setdefault("regKey", reg_key)
-        data.setdefault("registration", data.get("registration") or reg_key)
-        if update_new_bus_state(data):
-            pending_updates.append(data)
-        curated[reg_key] = data
-
-    if pending_updates:
-        for bus in pending_updates:
-            upsert_fleet_bus(
-                connection,
-                bus,
-                fallback_created_at=bus.get("createdAt") or iso_now(),
-            )
-        connection.commit()
+    def run_once(self) -> Dict[str, Any]:
+        ensure_database_initialised()
+        started = time.monotonic()
+        with self._lock:
+            self._state = "running"
+            self._last_started_at = iso_now()
+        try:
+            existing_keys: Set[str] = set()
+            synced, replaced = maybe_sync_live_buses(existing_keys, force=True)
+        except Exception as exc:
+            with self._lock:
+                self._state = "failed"
+                self._failures += 1
+                self._runs += 1
+                self._last_error = str(exc)
+                self._last_finished_at = iso_now()
+                self._last_duration = round(time.monotonic() - started, 3)
+            raise
+        result = {
+            "mode": "replaced" if replaced else "incremental",
+            "vehicles": len(synced),
+            "fleetSize": len(existing_keys) if not replaced else len(synced),
+        }
+        with self._lock:
+            self._state = "idle"
+            self._runs += 1
+            self._last_result = result
+            self._last_error = None
+            self._last_finished_at = iso_now()
+            self._last_success_at = self._last_finished_at
+            self._last_duration = round(time.monotonic() - started, 3)
+        return result
 
-    existing_keys = set(curated.keys())
-    synced_buses, replaced = maybe_sync_live_buses(connection, existing_keys)
-    if replaced:
-        curated = {}
-    for bus in synced_buses:
-        reg_key = normalise_reg_key(bus.get("regKey"))
-        if not reg_key:
-            continue
-        curated[reg_key] = bus
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            next_run = self._next_run_at
+            return {
+                "enabled": self._enabled,
+                "running": self.is_running,
+                "state": self._state,
+                "intervalSeconds": self._interval,
+                "runs": self._runs,
+                "failures": self._failures,
+                "lastStartedAt": self._last_started_at,
+                "lastFinishedAt": self._last_finished_at,
+                "lastSuccessAt": self._last_success_at,
+                "lastDurationSeconds": self._last_duration,
+                "lastResult": dict(self._last_result),
+                "lastError": self._last_error,
+                "nextRunInSeconds": round(max(next_run - time.monotonic(), 0.0), 1)
+                if next_run is not None and self.is_running
+                else None,
+            }
 
-    buses = _build_fleet_bus_map(connection, curated)
+    def _run(self) -> None:
+        set_connection_class("ingest")
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                print(f"[fleet-sync] Sync failed: {exc}", flush=True)
+            with self._lock:
+                self._next_run_at = time.monotonic() + self._interval
+            self._wake_event.wait(self._interval)
+            self._wake_event.clear()
 
-    pending: List[Dict[str, Any]] = []
-    for row in fetch_collection_items(connection, FLEET_COLLECTION_PENDING):
-        data = row.get("data") or {}
-        status = normalise_text(data.get("status")) or "pending"
-        if status != "pending":
-            continue
-        data.setdefault("id", row.get("item_id"))
-        pending.append(data)
-    pending.sort(key=lambda item: item.get("submittedAt") or "", reverse=True)
 
-    return {
-        "options": options,
-        "buses": buses,
-        "pendingChanges": pending,
-    }
+fleet_sync_job = FleetSyncJob(enabled=FLEET_AUTO_SYNC_ENABLED)
+if fleet_sync_job.enabled:
+    try:
+        fleet_sync_job.start()
+    except Exception as exc:
+        print(f"[fleet-sync] Failed to start sync thread: {exc}", flush=True)
 
 
 def require_fleet_admin() -> Dict[str, Any]:
@@ -6807,17 +12558,132 @@ def favourites_item(uid: str, favourite_id: str):
     return jsonify({"status": "deleted"}), 200
 
 
+@app.route("/api/fleet/live/lines", methods=["GET"])
+def fleet_live_line_schedule():
+    return jsonify(live_tracker.line_schedule())
+
+
 @app.route("/api/fleet/live", methods=["GET"])
 def fleet_live_snapshot():
-    snapshot = live_tracker.snapshot()
     if not live_tracker.enabled:
+        snapshot = live_tracker.snapshot()
         meta = snapshot.setdefault("meta", {})
         meta.setdefault("enabled", False)
         meta["message"] = (
             "Live fleet tracking is disabled. Set FLEET_LIVE_TRACKING_ENABLED=true to enable the poller."
         )
         return jsonify(snapshot), 503
-    return jsonify(snapshot)
+
+    since = normalise_text(request.args.get("since")) or None
+    fields = tuple(
+        dict.fromkeys(name for name in re.split(r"[,\s]+", request.args.get("fields") or "") if name)
+    )[:32]
+    if fields and "key" not in fields and "vehicleKey" not in fields:
+        fields = ("key", *fields)
+    include_sightings = _as_bool(request.args.get("sightings"), default=True)
+
+    published = live_tracker.published()
+    if published.etag and request.if_none_match.contains(published.etag):
+        live_tracker.record_request(not_modified=True, delta=bool(since))
+        response = make_response("", 304)
+    else:
+        if since or fields or not include_sightings:
+            body, gzip_body = published.variant(since=since, fields=fields, sightings=include_sightings)
+        else:
+            body, gzip_body = published.body, published.gzip_body
+        gzipped = gzip_body is not None and request.accept_encodings["gzip"] > 0
+        live_tracker.record_request(gzipped=gzipped, delta=bool(since), size=len(gzip_body if gzipped else body))
+        response = make_response(gzip_body if gzipped else body)
+        response.mimetype = "application/json"
+        if gzipped:
+            response.headers["Content-Encoding"] = "gzip"
+    if published.etag:
+        response.set_etag(published.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _live_push_filter_values(*names: str) -> List[str]:
+    values: List[str] = []
+    for name in names:
+        for raw in request.args.getlist(name):
+            values.extend(part.strip() for part in raw.split(",") if part.strip())
+    return values[:200]
+
+
+def _live_push_bbox() -> Optional[Tuple[float, float, float, float]]:
+    raw = normalise_text(request.args.get("bbox"))
+    if not raw:
+        return None
+    parts = [coerce_float(part) for part in raw.split(",")]
+    if len(parts) != 4 or any(part is None for part in parts):
+        raise ApiError("bbox must be minLon,minLat,maxLon,maxLat.", status_code=400)
+    min_lon, min_lat, max_lon, max_lat = parts
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ApiError("bbox must be minLon,minLat,maxLon,maxLat.", status_code=400)
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@app.route("/api/fleet/live/stream", methods=["GET"])
+def fleet_live_stream():
+    if not live_broadcaster.enabled:
+        raise ApiError("Live push updates are disabled.", status_code=503)
+
+    subscription = live_broadcaster.subscribe(
+        lines={value.upper() for value in _live_push_filter_values("line", "lines")},
+        operators={value.lower() for value in _live_push_filter_values("operator", "operators")},
+        registrations={
+            key
+            for key in (normalise_reg_key(value) for value in _live_push_filter_values("registration", "registrations", "reg"))
+            if key
+        },
+        bbox=_live_push_bbox(),
+    )
+    if subscription is None:
+        raise ApiError("Too many live subscribers; fall back to polling /api/fleet/live.", status_code=503)
+
+    def snapshot_event() -> str:
+        published = live_tracker.published()
+        channel = subscription.channel
+        vehicles = [
+            update
+            for update in (_live_update_from_entry(entry) for entry in published.fleet)
+            if channel.matches(update)
+        ]
+        if channel.filtered:
+            with channel.condition:
+                channel.known.update(update["key"] for update in vehicles)
+        return _sse_event(
+            "snapshot",
+            app.json.dumps({"batchId": published.batch_id or None, "vehicles": vehicles}),
+        )
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield snapshot_event()
+            while True:
+                entries = subscription.next_batch(LIVE_PUSH_HEARTBEAT_SECONDS)
+                if entries is None:
+                    live_broadcaster.record_resync()
+                    yield snapshot_event()
+                elif entries:
+                    yield _sse_event("vehicles", '{"updates":[' + ",".join(entries) + "]}")
+                else:
+                    yield ": ping\n\n"
+        finally:
+            live_broadcaster.unsubscribe(subscription)
+
+    response = Response(stream(), mimetype="text/event-stream")
+    response.call_on_close(lambda: live_broadcaster.unsubscribe(subscription))
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
 @app.route("/api/fleet/<reg_key>", methods=["GET"])
@@ -6889,13 +12755,32 @@ def fleet_search_endpoint():
     except ValueError:
         limit_value = 25
 
-    with get_connection() as connection:
-        rows = search_buses(connection, query, limit=limit_value)
-        now = datetime.now(timezone.utc)
-        results = [serialise_bus_summary(row, now=now) for row in rows]
+    if not fleet_search_index.enabled:
+        with get_connection() as connection:
+            rows = search_buses(connection, query, limit=limit_value)
+    else:
+        regs = fleet_search_index.search(query, limit=limit_value)
+        with get_connection() as connection:
+            rows_by_reg = fetch_bus_rows(connection, regs)
+        rows = [rows_by_reg[reg] for reg in regs if reg in rows_by_reg]
+    now = datetime.now(timezone.utc)
+    results = [serialise_bus_summary(row, now=now) for row in rows]
     return jsonify({"results": results, "query": query})
 
 
+@app.route("/api/fleet/search/suggest", methods=["GET"])
+def fleet_search_suggest_endpoint():
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", "10")
+    try:
+        limit_value = max(1, min(int(limit), 25))
+    except ValueError:
+        limit_value = 10
+    if not fleet_search_index.enabled:
+        raise ApiError("Fleet search suggestions are disabled.", status_code=404)
+    return jsonify({"query": query, "suggestions": fleet_search_index.suggest(query, limit=limit_value)})
+
+
 @app.route("/api/fleet/rare", methods=["GET"])
 def fleet_rare_endpoint():
     limit = request.args.get("limit", "50")
@@ -6924,40 +12809,42 @@ def fleet_ingest_sightings():
     errors: List[Dict[str, Any]] = []
 
     with get_connection() as connection:
-        for entry in entries:
-            if not isinstance(entry, dict):
-                errors.append({"error": "invalid", "entry": entry})
-                continue
+        for start in range(0, len(entries), FLEET_SIGHTING_BATCH_SIZE):
+            chunk = entries[start : start + FLEET_SIGHTING_BATCH_SIZE]
             try:
-                outcome = record_bus_sighting(connection, entry)
+                outcomes, chunk_errors = record_bus_sightings_batch(connection, chunk)
                 connection.commit()
-            except ApiError as exc:
-                connection.rollback()
-                errors.append(
-                    {
-                        "error": str(exc),
-                        "registration": entry.get("registration") or entry.get("vehicleId"),
-                    }
-                )
-                continue
             except Exception as exc:
                 connection.rollback()
-                errors.append(
+                operator_cache.invalidate()
+                errors.extend(
                     {
+                        "index": start + offset,
                         "error": str(exc),
-                        "registration": entry.get("registration") or entry.get("vehicleId"),
+                        "registration": entry.get("registration") or entry.get("vehicleId")
+                        if isinstance(entry, dict)
+                        else None,
                     }
+                    for offset, entry in enumerate(chunk)
                 )
                 continue
 
-            if outcome:
-                results.append(
-                    {
-                        "reg": outcome["bus"].get("reg") if outcome.get("bus") else None,
-                        "badges": outcome.get("badges"),
-                        "sighting": serialise_sighting(outcome.get("sighting")),
-                    }
-                )
+            for error in chunk_errors:
+                offset = error.get("index", 0)
+                if error.get("error") == "invalid":
+                    errors.append({"index": start + offset, "error": "invalid", "entry": chunk[offset]})
+                else:
+                    errors.append({**error, "index": start + offset})
+
+            for outcome in outcomes:
+                if outcome:
+                    results.append(
+                        {
+                            "reg": outcome["bus"].get("reg") if outcome.get("bus") else None,
+                            "badges": outcome.get("badges"),
+                            "sighting": serialise_sighting(outcome.get("sighting")),
+                        }
+                    )
 
     status_code = 200 if not errors else 207
     return jsonify({"ingested": len(results), "results": results, "errors": errors}), status_code
@@ -6966,22 +12853,22 @@ def fleet_ingest_sightings():
 @app.route("/api/operators", methods=["GET"])
 def operators_list():
     with get_connection() as connection:
-        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        rows = operator_cache.rows(connection)
+        with connection.cursor() as cursor:
             cursor.execute(
                 """
-                SELECT o.*, COUNT(b.reg) AS fleet_size
-                FROM operators o
-                LEFT JOIN buses b ON b.operator_id = o.operator_id
-                GROUP BY o.operator_id
-                ORDER BY o.name ASC
+                SELECT operator_id, COUNT(*)
+                FROM buses
+                WHERE operator_id IS NOT NULL
+                GROUP BY operator_id
                 """
             )
-            rows = cursor.fetchall() or []
+            fleet_sizes = {operator_id: count for operator_id, count in cursor.fetchall() or []}
     operators = []
     for row in rows:
         operator = serialise_operator(row)
         if operator:
-            operator["fleetSize"] = int(row.get("fleet_size") or 0)
+            operator["fleetSize"] = int(fleet_sizes.get(row.get("operator_id")) or 0)
             operators.append(operator)
     return jsonify({"operators": operators})
 
@@ -7124,9 +13011,62 @@ def edits_reject(request_id: str):
 
 @app.route("/api/fleet", methods=["GET"])
 def fleet_state():
-    with get_connection() as connection:
-        state = fetch_fleet_state(connection)
-    return jsonify(state)
+    if not fleet_document.enabled:
+        with get_connection() as connection:
+            state = fetch_fleet_state(connection)
+        return jsonify(state)
+
+    body, etag, version = fleet_document.get()
+    if request.if_none_match.contains(etag):
+        fleet_document.record_not_modified()
+        response = make_response("", 304)
+    else:
+        response = make_response(body)
+        response.mimetype = "application/json"
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Fleet-Version"] = str(version)
+    return response
+
+
+@app.route("/api/fleet/images/<image_hash>", methods=["GET"])
+@app.route("/api/fleet/images/<image_hash>/<variant>", methods=["GET"])
+def fleet_image(image_hash: str, variant: str = "original"):
+    image_hash = image_hash.lower()
+    if not FLEET_IMAGE_HASH_PATTERN.fullmatch(image_hash) or variant not in {"original", "thumbnail"}:
+        raise ApiError("Image not found.", status_code=404)
+
+    etag = f"{image_hash}-{variant}"
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+        response.set_etag(etag)
+    else:
+        with get_connection() as connection:
+            image = fetch_fleet_image(connection, image_hash, thumbnail=variant == "thumbnail")
+        if image is None:
+            raise ApiError("Image not found.", status_code=404)
+        content_type, data = image
+        if not content_type.startswith("image/") or content_type == "image/svg+xml":
+            content_type = "application/octet-stream"
+        response = Response(data, mimetype=content_type)
+        response.set_etag(etag)
+        response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+    response.headers["Cache-Control"] = f"public, max-age={FLEET_IMAGE_CACHE_MAX_AGE_SECONDS}, immutable"
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+@app.route("/api/fleet/sync", methods=["GET"])
+def fleet_sync_status():
+    return jsonify(fleet_sync_job.snapshot())
+
+
+@app.route("/api/fleet/sync", methods=["POST"])
+def fleet_sync_trigger():
+    require_fleet_admin()
+    if not fleet_sync_job.trigger():
+        raise ApiError("Fleet sync is not running.", status_code=409)
+    return jsonify(fleet_sync_job.snapshot()), 202
 
 
 @app.route("/api/fleet/submit", methods=["POST"])
@@ -7181,6 +13121,9 @@ def fleet_submit():
                     submitted_by=submitted_by,
                 )
             connection.commit()
+            fleet_document.invalidate("curated", [reg_key])
+            if pending_change:
+                fleet_document.invalidate("pending")
             response: Dict[str, Any] = {"status": "created", "bus": bus}
             if pending_change:
                 response["pendingImages"] = len(pending_change.get("images") or [])
@@ -7195,6 +13138,7 @@ def fleet_submit():
             submitted_by=submitted_by,
         )
         connection.commit()
+        fleet_document.invalidate("pending")
         return jsonify({"status": "pending", "change": pending}), 202
 
 
@@ -7213,6 +13157,7 @@ def fleet_add_option():
         ensure_fleet_option(connection, field, value)
         options = fetch_fleet_options(connection)
         connection.commit()
+    fleet_document.invalidate("options")
 
     return jsonify({"field": field, "options": options.get(field, [])}), 201
 
@@ -7267,6 +13212,14 @@ def fleet_approve(change_id: str):
                     sanitized["approvedAt"] = iso_now()
                 approved_images.append(sanitized)
 
+        missing = missing_fleet_images(connection, approved_images)
+        if missing:
+            print(
+                f"[fleet] Dropped {len(missing)} image(s) with no stored data from change {change_key}",
+                flush=True,
+            )
+            approved_images = [image for image in approved_images if image["hash"] not in missing]
+
         if approved_images:
             merged["gallery"] = merge_gallery_entries(
                 merged.get("gallery") or existing.get("gallery") or [],
@@ -7280,8 +13233,10 @@ def fleet_approve(change_id: str):
             fallback_created_at=created_at,
         )
 
-        delete_collection_item(connection, FLEET_COLLECTION_PENDING, pending.get("id") or change_key)
+        delete_pending_change(connection, pending.get("id") or change_key)
         connection.commit()
+    fleet_document.invalidate("curated", [reg_key])
+    fleet_document.invalidate("pending")
 
     return jsonify({"status": "approved", "bus": bus})
 
@@ -7297,15 +13252,33 @@ def fleet_reject(change_id: str):
         pending = get_pending_change(connection, change_key)
         if pending is None:
             raise ApiError("Pending update not found.", status_code=404)
-        delete_collection_item(connection, FLEET_COLLECTION_PENDING, pending.get("id") or change_key)
+        delete_pending_change(connection, pending.get("id") or change_key)
         connection.commit()
+    fleet_document.invalidate("pending")
 
     return jsonify({"status": "rejected"})
 
 
 @app.route("/api/health", methods=["GET"])
 def healthcheck():
-    return jsonify({"status": "ok"})
+    return jsonify(
+        {
+            "status": "ok",
+            "operatorCache": operator_cache.stats(),
+            "copyWriters": {"vehicleHistory": vehicle_history_writer.stats()},
+            "partitions": partition_maintainer.snapshot(),
+            "fleetSync": fleet_sync_job.snapshot(),
+            "fleetDocument": fleet_document.snapshot(),
+            "badgeExpiry": badge_expiry_sweeper.snapshot(),
+            "fleetSearch": fleet_search_index.stats(),
+            "liveSnapshot": live_tracker.stats(),
+            "livePush": live_broadcaster.stats(),
+            "stream": stream_listener.snapshot(),
+            "connectionPool": connection_pool_stats(),
+            "tflHttp": tfl_http.stats(),
+            "tflProxyCache": tfl_proxy_cache.stats(),
+        }
+    )
 
 
 if __name__ == "__main__":
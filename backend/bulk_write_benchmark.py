@@ -0,0 +1,174 @@
+"""Benchmark the COPY-based bulk writers against the per-row insert path.
+
+Synthetic ``vehicle_history`` and ``bus_sightings`` rows are written once via
+the original row-at-a-time helpers and once via ``COPY FROM STDIN`` (the
+buffered writer for ``vehicle_history`` and the staging-table merge for
+``bus_sightings``). Every run happens inside a transaction that is rolled back,
+so the benchmark leaves no data behind::
+
+    python -m backend.bulk_write_benchmark --sizes 1000 10000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import api
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+BENCHMARK_REG_PREFIX = "BENCH"
+
+
+def _history_infos(size: int, now: datetime) -> List[Dict[str, Any]]:
+    """Build stream prediction dictionaries shaped like ``_prepare_stream_prediction`` output."""
+    infos = []
+    for index in range(size):
+        infos.append(
+            {
+                "timestamp": now - timedelta(seconds=index),
+                "registration": f"{BENCHMARK_REG_PREFIX}{index % 500:04d}",
+                "vehicle_id": f"bench-{index % 500}",
+                "line_id": str(index % 200),
+                "line_name": str(index % 200),
+                "direction": index % 2 + 1,
+                "stop_id": f"490{index % 9000:06d}",
+                "stop_name": "Benchmark Stop",
+                "latitude": 51.5 + (index % 100) / 1000,
+                "longitude": -0.12 - (index % 100) / 1000,
+                "visit_number": index % 60,
+                "trip_id": index,
+                "estimated_time": now + timedelta(minutes=index % 30),
+                "base_version": "bench",
+                "destination": "Benchmark Garage",
+            }
+        )
+    return infos
+
+
+def _sighting_entries(size: int, now: datetime) -> List[Tuple[str, datetime, Dict[str, Any], None]]:
+    """Build ``upsert_bus_sightings`` entries spread across 500 benchmark buses."""
+    entries = []
+    for index in range(size):
+        reg = f"{BENCHMARK_REG_PREFIX}{index % 500:04d}"
+        payload = {
+            "vehicleRegistrationNumber": reg,
+            "route": str(index % 200),
+            "lat": 51.5 + (index % 100) / 1000,
+            "lon": -0.12 - (index % 100) / 1000,
+            "stopCode": f"490{index % 9000:06d}",
+            "destination": "Benchmark Garage",
+        }
+        entries.append((reg, now - timedelta(seconds=index), payload, None))
+    return entries
+
+
+def _create_benchmark_buses(connection, now: datetime) -> None:
+    """Create the parent ``buses`` rows that benchmark sightings reference."""
+    regs = [f"{BENCHMARK_REG_PREFIX}{index:04d}" for index in range(500)]
+    api.create_bus_profiles(
+        connection,
+        [(reg, reg, now, {}, None) for reg in regs],
+    )
+
+
+def _timed(connection, setup: Optional[Callable[[Any], None]], work: Callable[[Any], None]) -> float:
+    """Run ``work`` in a rolled-back transaction and return its duration in seconds."""
+    try:
+        if setup:
+            setup(connection)
+        started = time.perf_counter()
+        work(connection)
+        return time.perf_counter() - started
+    finally:
+        connection.rollback()
+
+
+def run_benchmark(sizes: Sequence[int]) -> List[Dict[str, Any]]:
+    """Time per-row and COPY writes for each size and return one result per table and size."""
+    api.init_database()
+    now = datetime.now(timezone.utc)
+    results: List[Dict[str, Any]] = []
+
+    with api.get_connection() as connection:
+        for size in sizes:
+            infos = _history_infos(size, now)
+
+            def per_row_history(conn) -> None:
+                for info in infos:
+                    api._insert_vehicle_history(conn, info, now)
+
+            def copy_history(conn) -> None:
+                writer = api.BufferedCopyWriter(
+                    "vehicle_history",
+                    api.VEHICLE_HISTORY_COLUMNS,
+                    flush_rows=size + 1,
+                    max_buffered_rows=size + 1,
+                )
+                writer.add(api._vehicle_history_row(info, now) for info in infos)
+                writer.flush(connection=conn)
+
+            results.append(
+                {
+                    "table": "vehicle_history",
+                    "rows": size,
+                    "perRowSeconds": _timed(connection, None, per_row_history),
+                    "copySeconds": _timed(connection, None, copy_history),
+                }
+            )
+
+            entries = _sighting_entries(size, now)
+
+            def setup(conn) -> None:
+                _create_benchmark_buses(conn, now)
+
+            def per_row_sightings(conn) -> None:
+                for reg, seen_at, payload, operator_id in entries:
+                    api.upsert_bus_sighting(conn, reg, seen_at, payload, operator_id)
+
+            def copy_sightings(conn) -> None:
+                api.upsert_bus_sightings(conn, entries)
+
+            results.append(
+                {
+                    "table": "bus_sightings",
+                    "rows": size,
+                    "perRowSeconds": _timed(connection, setup, per_row_sightings),
+                    "copySeconds": _timed(connection, setup, copy_sightings),
+                }
+            )
+
+    return results
+
+
+def _format_results(results: Sequence[Dict[str, Any]]) -> str:
+    lines = [f"{'table':<16}{'rows':>9}{'per-row s':>12}{'copy s':>10}{'rows/s copy':>14}{'speedup':>9}"]
+    for result in results:
+        per_row = result["perRowSeconds"]
+        copy = result["copySeconds"]
+        lines.append(
+            f"{result['table']:<16}{result['rows']:>9}{per_row:>12.3f}{copy:>10.3f}"
+            f"{result['rows'] / max(copy, 1e-9):>14.0f}{per_row / max(copy, 1e-9):>8.1f}x"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    args = parser.parse_args(argv)
+    try:
+        print(_format_results(run_benchmark(args.sizes)))
+        return 0
+    finally:
+        try:
+            api.close_connection_pool()
+        except Exception:  # pragma: no cover - never hide the benchmark's own error
+            pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""Profile the cached field-resolution plans against the previous per-call lookups.
+
+Stream predictions and vehicle snapshot entries used to resolve every field by
+probing candidate names and scanning the whole dict with ``str.lower`` on each
+miss. They now compile one plan per distinct key layout (see
+``FieldPlanCache``). This module times both paths on synthetic payloads shaped
+like the TfL feeds, checks that they return the same results and prints the
+per-call cost::
+
+    python -m backend.field_plan_profile --iterations 20000
+    python -m backend.field_plan_profile --cprofile prediction
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import api
+from .api import (
+    _coalesce_registration,
+    _prediction_as_datetime,
+    _prediction_as_float,
+    _prediction_as_int,
+    normalise_text,
+)
+
+# The functions below are the implementations that predate the field plans,
+# kept verbatim so the report compares like with like.
+
+
+def _legacy_prediction_field(prediction: Dict[str, Any], *candidates: str) -> Any:
+    if not isinstance(prediction, dict):
+        return None
+    for candidate in candidates:
+        if candidate in prediction:
+            return prediction.get(candidate)
+        lowered = candidate.lower()
+        for key, value in prediction.items():
+            if isinstance(key, str) and key.lower() == lowered:
+                return value
+    return None
+
+
+def _legacy_prepare_stream_prediction(
+    prediction: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    if not isinstance(prediction, dict):
+        return None
+
+    header_type = normalise_text(prediction.get("type") or prediction.get("Type"))
+    if header_type.lower() == "heartbeat":
+        return None
+
+    vehicle_id = normalise_text(
+        _legacy_prediction_field(prediction, "VehicleID", "VehicleId", "vehicleId", "VehicleRef")
+    )
+    if not vehicle_id:
+        payload = prediction.get("payload")
+        if isinstance(payload, dict):
+            vehicle_id = normalise_text(
+                _legacy_prediction_field(payload, "VehicleID", "VehicleId", "vehicleId")
+            )
+            if vehicle_id:
+                prediction = payload
+    if not vehicle_id:
+        return None
+
+    registration_text = _legacy_prediction_field(
+        prediction,
+        "RegistrationNumber",
+        "VehicleRegistrationNumber",
+        "VehicleReg",
+        "registration",
+    )
+    registration = _coalesce_registration(registration_text, vehicle_id)
+    if not registration:
+        registration = ""
+
+    timestamp_value = _legacy_prediction_field(
+        prediction,
+        "Timestamp",
+        "TimeStamp",
+        "RecordedAtTime",
+        "RecordedTime",
+        "ReportTime",
+        "GeneratedTime",
+        "MessageTimestamp",
+    )
+    timestamp = _prediction_as_datetime(timestamp_value)
+
+    stop_id = normalise_text(
+        _legacy_prediction_field(prediction, "StopID", "StopPointId", "StopCode", "StopPoint")
+    )
+    stop_name = normalise_text(
+        _legacy_prediction_field(prediction, "StopPointName", "StopName", "StationName")
+    )
+    stop_code1 = normalise_text(_legacy_prediction_field(prediction, "StopCode1", "SmsCode", "NaptanId"))
+    stop_code2 = normalise_text(_legacy_prediction_field(prediction, "StopCode2"))
+    stop_state = normalise_text(_legacy_prediction_field(prediction, "StopPointState"))
+    stop_type = normalise_text(_legacy_prediction_field(prediction, "StopPointType"))
+    stop_indicator = normalise_text(
+        _legacy_prediction_field(prediction, "StopPointIndicator", "Indicator", "PlatformName")
+    )
+    stop_towards = normalise_text(_legacy_prediction_field(prediction, "Towards"))
+    stop_bearing = _prediction_as_int(_legacy_prediction_field(prediction, "Bearing"))
+
+    line_id = normalise_text(_legacy_prediction_field(prediction, "LineID", "LineId", "RouteId", "Line"))
+    line_name = normalise_text(_legacy_prediction_field(prediction, "LineName", "Route", "RouteName"))
+    if not line_name:
+        line_name = line_id
+    line_mode = normalise_text(
+        _legacy_prediction_field(prediction, "Mode", "ModeName", "ModeId", "ServiceType")
+    ) or "bus"
+
+    direction = _prediction_as_int(_legacy_prediction_field(prediction, "DirectionID", "Direction"))
+    destination = normalise_text(
+        _legacy_prediction_field(prediction, "DestinationText", "DestinationName", "Destination")
+    )
+
+    visit_number = _prediction_as_int(_legacy_prediction_field(prediction, "VisitNumber", "Visit", "Sequence"))
+    trip_id = _prediction_as_int(_legacy_prediction_field(prediction, "TripID", "TripId", "JourneyId"))
+
+    latitude = _prediction_as_float(_legacy_prediction_field(prediction, "Latitude", "Lat"))
+    longitude = _prediction_as_float(_legacy_prediction_field(prediction, "Longitude", "Lon"))
+
+    estimated_time_value = _legacy_prediction_field(
+        prediction,
+        "EstimatedTime",
+        "ExpectedArrival",
+        "ExpectedTime",
+        "EstimatedArrivalTime",
+    )
+    estimated_time = _prediction_as_datetime(estimated_time_value)
+
+    expire_value = _legacy_prediction_field(prediction, "ExpireTime", "ExpiryTime", "Expiry")
+    expire_time = _prediction_as_datetime(expire_value)
+    expire_is_delete = False
+    if expire_value not in (None, ""):
+        text = normalise_text(expire_value)
+        if text == "0" or text.lower() == "false":
+            expire_time = None
+            expire_is_delete = True
+
+    base_version = normalise_text(_legacy_prediction_field(prediction, "BaseVersion", "baseVersion"))
+
+    return {
+        "vehicle_id": vehicle_id,
+        "registration": registration or None,
+        "line_id": line_id or None,
+        "line_name": line_name or None,
+        "line_mode": line_mode or "bus",
+        "direction": direction,
+        "destination": destination or None,
+        "stop_id": stop_id or None,
+        "stop_name": stop_name or None,
+        "stop_code1": stop_code1 or None,
+        "stop_code2": stop_code2 or None,
+        "stop_state": stop_state or None,
+        "stop_type": stop_type or None,
+        "stop_indicator": stop_indicator or None,
+        "stop_towards": stop_towards or None,
+        "stop_bearing": stop_bearing,
+        "latitude": latitude,
+        "longitude": longitude,
+        "visit_number": visit_number,
+        "trip_id": trip_id,
+        "estimated_time": estimated_time,
+        "expire_time": expire_time,
+        "expire_is_delete": expire_is_delete,
+        "base_version": base_version or None,
+        "timestamp": timestamp,
+        "raw": prediction,
+    }
+
+
+def _legacy_extract_field_value(entry: Any, candidate_keys: Tuple[str, ...]) -> str:
+    if not candidate_keys:
+        return ""
+    lowered = [key.lower() for key in candidate_keys]
+    queue: List[Any] = [entry]
+
+    while queue:
+        current = queue.pop(0)
+        if isinstance(current, dict):
+            for raw_key, value in current.items():
+                if isinstance(value, (dict, list)):
+                    queue.append(value)
+                key = normalise_text(raw_key).lower()
+                if not key:
+                    continue
+                if any(candidate == key or candidate in key for candidate in lowered):
+                    text = normalise_text(value)
+                    if text:
+                        return text
+        elif isinstance(current, list):
+            queue.extend(current)
+
+    return ""
+
+
+def sample_stream_predictions(count: int) -> List[Dict[str, Any]]:
+    """Dict-shaped URA predictions, half with the documented casing and half lower-cased."""
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    predictions = []
+    for index in range(count):
+        prediction = {
+            "StopPointName": f"Stop {index % 500}",
+            "StopID": f"490{index % 500:06d}",
+            "StopCode1": str(index % 500),
+            "StopCode2": None,
+            "StopPointType": "STBC",
+            "Towards": "Town Centre",
+            "Bearing": index % 360,
+            "StopPointIndicator": "A",
+            "StopPointState": 0,
+            "Latitude": 51.5,
+            "Longitude": -0.12,
+            "VisitNumber": index % 60,
+            "LineID": str(index % 200),
+            "LineName": str(index % 200),
+            "DirectionID": 1,
+            "DestinationText": "Garage",
+            "DestinationName": "Garage",
+            "VehicleID": 10_000 + index % 900,
+            "TripID": index,
+            "RegistrationNumber": f"LX{index % 90:02d}ABC",
+            "EstimatedTime": now_ms + index * 1000,
+            "ExpireTime": now_ms + 3_600_000,
+        }
+        if index % 2:
+            prediction = {key.lower(): value for key, value in prediction.items()}
+        predictions.append(prediction)
+    return predictions
+
+
+def sample_vehicle_entries(count: int) -> List[Dict[str, Any]]:
+    """Nested vehicle snapshot entries like those walked by ``fetch_recent_vehicle_snapshots``."""
+    entries = []
+    for index in range(count):
+        entries.append(
+            {
+                "registration": f"LX{index % 90:02d}ABC",
+                "operator": {"name": "Example Buses", "code": "EX"},
+                "lastSeen": "2026-10-17T10:00:00Z",
+                "trip": {"lineName": str(index % 200), "destination": "Garage"},
+                "vehicle": {"vehicleRef": f"V{index}", "type": "E400"},
+            }
+        )
+    return entries
+
+
+def _bench(func: Callable[[Any], Any], samples: Sequence[Any], iterations: int) -> float:
+    """Return microseconds per call for ``func`` over ``iterations`` calls."""
+    size = len(samples)
+    started = time.perf_counter()
+    for index in range(iterations):
+        func(samples[index % size])
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def _comparable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: item for key, item in value.items() if key != "raw"}
+    return value
+
+
+def cases() -> List[Tuple[str, Callable, Callable, List[Any]]]:
+    predictions = sample_stream_predictions(256)
+    vehicles = sample_vehicle_entries(256)
+    candidates = ("lineName", "lineId", "routeId", "serviceId")
+    return [
+        ("prediction", _legacy_prepare_stream_prediction, api._prepare_stream_prediction, predictions),
+        (
+            "field-value",
+            lambda entry: _legacy_extract_field_value(entry, candidates),
+            lambda entry: api._extract_field_value(entry, candidates),
+            vehicles,
+        ),
+    ]
+
+
+def run_report(iterations: int) -> List[Dict[str, Any]]:
+    """Check both paths agree, then time them and return one row per case."""
+    rows = []
+    for name, before, after, samples in cases():
+        for sample in samples:
+            if _comparable(before(sample)) != _comparable(after(sample)):
+                raise AssertionError(f"{name}: cached plan result differs for {sample!r}")
+        before_us = _bench(before, samples, iterations)
+        after_us = _bench(after, samples, iterations)
+        rows.append({"case": name, "beforeMicros": before_us, "afterMicros": after_us})
+    return rows
+
+
+def _format_report(rows: Sequence[Dict[str, Any]]) -> str:
+    lines = [f"{'case':<14}{'before us/call':>16}{'after us/call':>16}{'speedup':>10}"]
+    for row in rows:
+        lines.append(
+            f"{row['case']:<14}{row['beforeMicros']:>16.2f}{row['afterMicros']:>16.2f}"
+            f"{row['beforeMicros'] / max(row['afterMicros'], 1e-9):>9.1f}x"
+        )
+    return "\n".join(lines)
+
+
+def _cprofile(case: str, iterations: int) -> None:
+    for name, before, after, samples in cases():
+        if name != case:
+            continue
+        for label, func in (("before", before), ("after", after)):
+            profiler = cProfile.Profile()
+            profiler.enable()
+            for index in range(iterations):
+                func(samples[index % len(samples)])
+            profiler.disable()
+            print(f"--- {name} ({label}) ---")
+            pstats.Stats(profiler).sort_stats("tottime").print_stats(8)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument(
+        "--cprofile",
+        choices=("prediction", "field-value"),
+        help="print cProfile hot spots for one case instead of the summary",
+    )
+    args = parser.parse_args(argv)
+    if args.cprofile:
+        _cprofile(args.cprofile, args.iterations)
+        return 0
+    print(_format_report(run_report(max(args.iterations, 1))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Benchmark fleet search: the ILIKE scan against the in-memory search index.
+
+A synthetic fleet of buses is created inside a transaction that is rolled back
+afterwards. The script then times ``search_buses`` (the SQL ``ILIKE`` path), the
+``FleetSearchIndex`` ranking used by ``GET /api/fleet/search`` and the typeahead
+suggestions behind ``GET /api/fleet/search/suggest``. It runs exact, prefix,
+infix and misspelt queries against each and reports median and p95 latencies::
+
+    python -m backend.fleet_search_benchmark --sizes 1000 10000 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import api
+
+DEFAULT_SIZES = (1_000, 10_000)
+DEFAULT_REPEAT = 50
+LETTERS = "ABCDEFGHJKLMNOPRSTUVWXYZ"
+
+
+def _registrations(size: int) -> List[str]:
+    """Return ``size`` distinct UK-style registrations ending in ``Z`` (unused by real plates here)."""
+    rng = random.Random(size)
+    regs: List[str] = []
+    seen = set()
+    while len(regs) < size:
+        reg = (
+            rng.choice(("LX", "LJ", "SN", "YX", "BV", "LF", "LK"))
+            + f"{rng.choice(list(range(51, 75)) + list(range(11, 25))):02d}"
+            + "".join(rng.choice(LETTERS) for _ in range(2))
+            + "Z"
+        )
+        if reg not in seen:
+            seen.add(reg)
+            regs.append(reg)
+    return regs
+
+
+def _create_benchmark_fleet(connection, size: int, now: datetime) -> None:
+    """Insert ``size`` buses spread across 300 routes with realistic fleet numbers."""
+    entries = []
+    for index, reg in enumerate(_registrations(size)):
+        payload = {
+            "fleetNumber": f"{('LT', 'WVL', 'SEe', 'EH')[index % 4]}{index}",
+            "route": f"{'N' if index % 10 == 0 else ''}{index % 300 + 1}",
+        }
+        entries.append((reg, reg, now - timedelta(seconds=index), payload, None))
+    for start in range(0, size, 1000):
+        api.create_bus_profiles(connection, entries[start:start + 1000])
+
+
+def _queries(size: int) -> Dict[str, str]:
+    target = _registrations(size)[size // 2]
+    return {
+        "exact": target,
+        "prefix": target[:4],
+        "infix": target[2:6],
+        "fleet number": f"WVL{size // 12 * 4 + 1}",
+        "route": "N21",
+        "misspelt": target[:4] + target[5] + target[4] + target[6:],
+    }
+
+
+def _latencies(work: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Return median and p95 wall time in milliseconds for ``repeat`` calls of ``work``."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        work()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def run_benchmark(sizes: Sequence[int], repeat: int) -> List[Dict[str, Any]]:
+    """Time SQL search, indexed search and suggestions for each fleet size and query kind."""
+    api.init_database()
+    now = datetime.now(timezone.utc)
+    results: List[Dict[str, Any]] = []
+
+    with api.get_connection() as connection:
+        for size in sizes:
+            try:
+                _create_benchmark_fleet(connection, size, now)
+                index = api.FleetSearchIndex(enabled=True, refresh_interval=3600)
+                started = time.perf_counter()
+                documents = index.refresh(connection, full=True)
+                build_ms = (time.perf_counter() - started) * 1000
+                index.search("")
+
+                for kind, query in _queries(size).items():
+                    results.append(
+                        {
+                            "size": size,
+                            "query": kind,
+                            "documents": documents,
+                            "buildMs": build_ms,
+                            "sql": _latencies(lambda: api.search_buses(connection, query, limit=25), repeat),
+                            "index": _latencies(lambda: index.search(query, limit=25), repeat),
+                            "suggest": _latencies(lambda: index.suggest(query, limit=10), repeat),
+                            "topHit": (index.search(query, limit=1) or [None])[0],
+                        }
+                    )
+            finally:
+                connection.rollback()
+
+    return results
+
+
+def _format_results(results: Sequence[Dict[str, Any]]) -> str:
+    lines = [
+        f"{'size':>7} {'query':<13}{'sql p50/p95 ms':>17}{'index p50/p95 ms':>19}"
+        f"{'suggest p50/p95 ms':>21}  top hit"
+    ]
+    for result in results:
+        columns = [
+            f"{result[name]['p50']:.2f}/{result[name]['p95']:.2f}" for name in ("sql", "index", "suggest")
+        ]
+        lines.append(
+            f"{result['size']:>7} {result['query']:<13}{columns[0]:>17}{columns[1]:>19}{columns[2]:>21}"
+            f"  {result['topHit']}"
+        )
+    builds = {result["size"]: (result["documents"], result["buildMs"]) for result in results}
+    for size, (documents, build_ms) in builds.items():
+        lines.append(f"index build for {size} buses: {documents} documents in {build_ms:.0f} ms")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+    try:
+        print(_format_results(run_benchmark(args.sizes, max(args.repeat, 1))))
+        return 0
+    finally:
+        try:
+            api.close_connection_pool()
+        except Exception:  # pragma: no cover - never hide the benchmark's own error
+            pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Maintenance commands for the per-day route distribution counters.
+
+``bus_route_daily_counts`` holds one row per (registration, day, route) and is
+kept up to date as sightings are upserted, so usual-route distributions can be
+summed from at most 90 small buckets instead of re-aggregating raw
+``bus_sightings``. This module rebuilds those counters from the raw table and
+checks that the two still agree::
+
+    python -m backend.route_counters backfill --days 90
+    python -m backend.route_counters check --days 7 --repair
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from . import api
+
+
+def _since(days: Optional[int]) -> Optional[date]:
+    """Translate a ``--days`` window into the first UTC day it covers."""
+    if not days:
+        return None
+    return (datetime.now(timezone.utc) - timedelta(days=days - 1)).date()
+
+
+def _reg_keys(values: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """Normalise ``--reg`` arguments to the keys stored in ``buses.reg``."""
+    if not values:
+        return None
+    keys = [api.normalise_reg_key(value) for value in values]
+    return [key for key in keys if key] or None
+
+
+def run_backfill(days: Optional[int] = None, regs: Optional[Sequence[str]] = None) -> int:
+    """Rebuild counters from ``bus_sightings`` and return the bucket count.
+
+    Writers to ``bus_sightings`` are blocked for the duration of the rebuild so
+    concurrent ingestion cannot be counted twice.
+    """
+
+    api.init_database()
+    with api.get_connection() as connection:
+        buckets = api.backfill_route_counters(connection, since=_since(days), reg_keys=_reg_keys(regs))
+        connection.commit()
+    return buckets
+
+
+def run_check(
+    days: Optional[int] = None,
+    regs: Optional[Sequence[str]] = None,
+    limit: int = 100,
+) -> List[dict]:
+    """Return counter buckets that disagree with the raw sightings table."""
+    api.init_database()
+    with api.get_connection() as connection:
+        mismatches = api.check_route_counters(
+            connection,
+            since=_since(days),
+            reg_keys=_reg_keys(regs),
+            limit=limit,
+        )
+        connection.rollback()
+    return mismatches
+
+
+def _print_mismatches(mismatches: Sequence[dict]) -> None:
+    for row in mismatches:
+        print(
+            f"{row['reg']} {row['day']} route {row['route']}: "
+            f"expected {row['expected']} (last {api.normalise_datetime(row['expected_last_seen'])}), "
+            f"counted {row['actual']} (last {api.normalise_datetime(row['actual_last_seen'])})"
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subcommands.add_parser("backfill", help="rebuild counters from bus_sightings")
+    check = subcommands.add_parser("check", help="compare counters against bus_sightings")
+    for command in (backfill, check):
+        command.add_argument("--days", type=int, default=None, help="only cover the last N days")
+        command.add_argument("--reg", action="append", help="limit to a registration (repeatable)")
+    check.add_argument("--limit", type=int, default=100, help="maximum mismatches to report")
+    check.add_argument("--repair", action="store_true", help="rebuild the checked range on mismatch")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "backfill":
+            buckets = run_backfill(args.days, args.reg)
+            print(f"Rebuilt {buckets} route counter buckets.")
+            return 0
+
+        mismatches = run_check(args.days, args.reg, args.limit)
+        if not mismatches:
+            print("Route counters match bus_sightings.")
+            return 0
+        _print_mismatches(mismatches)
+        print(f"{len(mismatches)} mismatched bucket(s) found.", file=sys.stderr)
+        if args.repair:
+            buckets = run_backfill(args.days, args.reg)
+            print(f"Rebuilt {buckets} route counter buckets.")
+            return 0
+        return 1
+    finally:
+        try:
+            api.close_connection_pool()
+        except Exception:  # pragma: no cover - never hide the command's own error
+            pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Benchmark the positional URA stream decoder against the previous buffer decoder.
+
+The TfL URA stream is line-delimited JSON arrays whose fields follow the
+``TFL_STREAM_RETURN_LIST`` schema. This module replays a recorded stream file
+(one array per line, as written by ``--record``) through both decoders and
+reports lines and predictions per second::
+
+    python -m backend.stream_decode_benchmark --record stream.jsonl --seconds 60
+    python -m backend.stream_decode_benchmark --input stream.jsonl --repeat 5
+
+Without a recording, ``--synthetic N`` generates ``N`` prediction lines in the
+same positional format so the decoders can still be compared offline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+from requests.auth import HTTPDigestAuth
+
+from . import api
+
+
+class LegacyStreamDecoder:
+    """The previous decoder: a growing ``str`` buffer drained with ``raw_decode``.
+
+    Positional arrays are mapped onto a field-name dictionary and resolved with
+    the case-insensitive ``_prepare_stream_prediction`` lookups, which is what
+    the old path needed to turn a URA array into a prediction.
+    """
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        self._fields = tuple(fields)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+
+    def feed_line(self, chunk: str) -> List[Dict[str, Any]]:
+        infos: List[Dict[str, Any]] = []
+        self._buffer += chunk
+        while True:
+            stripped = self._buffer.lstrip()
+            if not stripped:
+                self._buffer = ""
+                break
+            if len(self._buffer) != len(stripped):
+                self._buffer = stripped
+            try:
+                value, index = self._decoder.raw_decode(self._buffer)
+            except ValueError:
+                break
+            self._buffer = self._buffer[index:]
+            if isinstance(value, list) and value and value[0] == api.URA_RESPONSE_PREDICTION:
+                info = api._prepare_stream_prediction(dict(zip(self._fields, value[1:])))
+                if info:
+                    infos.append(info)
+        if len(self._buffer) > 1_000_000:
+            self._buffer = ""
+        return infos
+
+
+def synthetic_lines(count: int, fields: Sequence[str], seed: int = 1) -> List[str]:
+    """Generate ``count`` URA prediction lines for the given field order."""
+    rng = random.Random(seed)
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    lines = [json.dumps([api.URA_RESPONSE_VERSION, "1.0", now_ms]), json.dumps([api.URA_RESPONSE_BASE_VERSION, "20261017"])]
+    for index in range(count):
+        vehicle = rng.randrange(9000)
+        stop = rng.randrange(20000)
+        sample = {
+            "StopPointName": f"Stop {stop}",
+            "StopID": f"490{stop:06d}",
+            "StopCode1": str(stop),
+            "StopCode2": None,
+            "StopPointType": "STBC",
+            "Towards": "Town Centre",
+            "Bearing": rng.randrange(360),
+            "StopPointIndicator": "Stop A",
+            "StopPointState": 0,
+            "Latitude": 51.3 + rng.random() * 0.4,
+            "Longitude": -0.5 + rng.random() * 0.7,
+            "VisitNumber": rng.randrange(1, 80),
+            "LineID": str(rng.randrange(1, 500)),
+            "LineName": str(rng.randrange(1, 500)),
+            "DirectionID": rng.choice((1, 2)),
+            "DestinationText": "Garage",
+            "DestinationName": "Garage",
+            "VehicleID": vehicle,
+            "TripID": rng.randrange(1, 10**6),
+            "RegistrationNumber": f"LX{vehicle % 100:02d}ABC",
+            "EstimatedTime": now_ms + rng.randrange(1, 3600) * 1000,
+            "ExpireTime": now_ms + 3_600_000 + index,
+        }
+        lines.append(json.dumps([api.URA_RESPONSE_PREDICTION] + [sample[name] for name in fields]))
+    return lines
+
+
+def record_stream(path: str, seconds: int) -> int:
+    """Write raw stream lines from the live URA endpoint to ``path`` for ``seconds``."""
+    listener = api.TfLStreamIngestor(
+        enabled=True,
+        stream_path=api.TFL_STREAM_PATH,
+        return_list=api.TFL_STREAM_RETURN_LIST,
+        username=api.TFL_STREAM_USERNAME,
+        password=api.TFL_STREAM_PASSWORD,
+    )
+    params, headers = listener._build_request_kwargs()
+    auth = None
+    if api.TFL_STREAM_USERNAME and api.TFL_STREAM_PASSWORD:
+        auth = HTTPDigestAuth(api.TFL_STREAM_USERNAME, api.TFL_STREAM_PASSWORD)
+    deadline = time.monotonic() + seconds
+    written = 0
+    with requests.get(
+        listener._resolve_url(),
+        params=params or None,
+        headers=headers or None,
+        auth=auth,
+        stream=True,
+        timeout=(30, api.FLEET_STREAM_READ_TIMEOUT_SECONDS),
+    ) as response, open(path, "w", encoding="utf-8") as handle:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True, chunk_size=8192):
+            if line:
+                handle.write(line + "\n")
+                written += 1
+            if time.monotonic() >= deadline:
+                break
+    return written
+
+
+def _time_decoder(lines: Sequence[str], feed, repeat: int) -> Dict[str, float]:
+    best = None
+    predictions = 0
+    for _ in range(repeat):
+        decoder = feed()
+        started = time.perf_counter()
+        count = 0
+        for line in lines:
+            count += len(decoder(line))
+        elapsed = time.perf_counter() - started
+        predictions = count
+        best = elapsed if best is None else min(best, elapsed)
+    return {"seconds": best or 0.0, "predictions": predictions}
+
+
+def run_benchmark(lines: Sequence[str], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Replay ``lines`` through both decoders and return the best time of ``repeat`` runs."""
+    fields = api.URAStreamDecoder(api.TFL_STREAM_RETURN_LIST).fields
+
+    def legacy():
+        return LegacyStreamDecoder(fields).feed_line
+
+    def positional():
+        decoder = api.URAStreamDecoder(api.TFL_STREAM_RETURN_LIST)
+        return lambda line: decoder.feed_line(line)[0]
+
+    return {
+        "legacy": _time_decoder(lines, legacy, repeat),
+        "positional": _time_decoder(lines, positional, repeat),
+    }
+
+
+def _format_results(results: Dict[str, Dict[str, float]], line_count: int) -> str:
+    rows = [f"{'decoder':<12}{'lines':>9}{'predictions':>13}{'seconds':>10}{'lines/s':>12}"]
+    for name, result in results.items():
+        seconds = max(result["seconds"], 1e-9)
+        rows.append(
+            f"{name:<12}{line_count:>9}{int(result['predictions']):>13}{result['seconds']:>10.3f}"
+            f"{line_count / seconds:>12.0f}"
+        )
+    speedup = results["legacy"]["seconds"] / max(results["positional"]["seconds"], 1e-9)
+    rows.append(f"speedup: {speedup:.1f}x")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="recorded stream file to replay")
+    source.add_argument("--synthetic", type=int, help="generate N synthetic prediction lines")
+    source.add_argument("--record", help="record the live stream to this file and exit")
+    parser.add_argument("--seconds", type=int, default=60, help="recording duration")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per decoder; the best is reported")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        written = record_stream(args.record, args.seconds)
+        print(f"Recorded {written} lines to {args.record}.")
+        return 0
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as handle:
+            lines = [line.rstrip("\n") for line in handle if line.strip()]
+    else:
+        fields = api.URAStreamDecoder(api.TFL_STREAM_RETURN_LIST).fields
+        lines = synthetic_lines(args.synthetic, fields)
+    print(_format_results(run_benchmark(lines, max(args.repeat, 1)), len(lines)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())